@@ -34,7 +34,39 @@ HX711_ADC LoadCell4(HX711_dout4, HX711_sck4);
 // Weight sensing variables
 const int calVal_eepromAdress = 0;
 unsigned long t = 0;
-const int serialPrintInterval = 100; // Interval between weight prints (ms)
+unsigned long serialPrintInterval = 100; // Interval between weight prints (ms, set by INTERVAL:ms)
+
+// Report-on-change (set by DEADBAND:grams or DEADBAND:n:grams, 0 = send every reading):
+// a weight is sent once it moves more than the deadband away from the last weight
+// that did, plus DEADBAND_TRAIL more readings so the host sees it settle
+const byte DEADBAND_TRAIL = 5;
+float deadband[4] = {0, 0, 0, 0};
+float deadbandAnchor[4] = {0, 0, 0, 0};
+byte deadbandTrailing[4] = {0, 0, 0, 0};
+
+// Binary telemetry framing (enabled by the MODE:BINARY command)
+// Frame: 0xA5 | type | sensor | value (int32 LE) | sequence (uint16 LE) | CRC-8
+const byte FRAME_SYNC = 0xA5;
+const byte FRAME_WEIGHT = 1;
+const byte FRAME_EVENT = 2;
+const byte FRAME_STATUS = 3;
+const byte EVENT_TAP_START = 1;
+const byte EVENT_SINGLE_TAP = 2;
+const byte EVENT_DOUBLE_TAP = 3;
+const byte EVENT_HOLD = 4;
+const byte EVENT_HOLDING = 5;
+const byte STATUS_OK = 1;
+const byte STATUS_TARE_STARTED = 3;
+const byte STATUS_TARE_ALL_STARTED = 4;
+const byte STATUS_TARE_COMPLETE = 5;
+const byte STATUS_INTERVAL_SET = 6;
+const byte STATUS_DEADBAND_SET = 7;
+const byte STATUS_BAUD_SET = 8;
+bool binaryMode = false;
+uint16_t frameSeq = 0;
+
+// Append millis() to EVENT lines (enabled by the TIMESTAMPS:ON command)
+bool timestampMode = false;
 
 // Calibration values for each load cell
 float calibrationValue1 = 758.05;
@@ -130,6 +162,95 @@ void setup() {
   Serial.println("STATUS:READY");
 }
 
+// CRC-8 (polynomial 0x07) over a frame body
+byte crc8(const byte *data, int len) {
+  byte crc = 0;
+  for (int i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+// Send one binary frame
+void sendFrame(byte type, byte sensor, long value) {
+  byte frame[10];
+  frame[0] = FRAME_SYNC;
+  frame[1] = type;
+  frame[2] = sensor;
+  frame[3] = value & 0xFF;
+  frame[4] = (value >> 8) & 0xFF;
+  frame[5] = (value >> 16) & 0xFF;
+  frame[6] = (value >> 24) & 0xFF;
+  frame[7] = frameSeq & 0xFF;
+  frame[8] = (frameSeq >> 8) & 0xFF;
+  frame[9] = crc8(frame + 1, 8);
+  Serial.write(frame, 10);
+  frameSeq++;
+}
+
+// Report a weight as "WEIGHT:n:value" or a frame with centigrams
+void reportWeight(int sensor, float weight) {
+  if (binaryMode) {
+    sendFrame(FRAME_WEIGHT, sensor, (long)(weight * 100.0 + (weight >= 0 ? 0.5 : -0.5)));
+  } else {
+    Serial.print("WEIGHT:");
+    Serial.print(sensor);
+    Serial.print(":");
+    Serial.println(weight);
+  }
+}
+
+// Report a weight unless it is within the sensor's deadband
+void reportWeightIfChanged(int sensor, float weight) {
+  int i = sensor - 1;
+  if (deadband[i] > 0) {
+    if (fabs(weight - deadbandAnchor[i]) > deadband[i]) {
+      deadbandAnchor[i] = weight;
+      deadbandTrailing[i] = DEADBAND_TRAIL;
+    } else if (deadbandTrailing[i] > 0) {
+      deadbandTrailing[i]--;
+    } else {
+      return;
+    }
+  }
+  reportWeight(sensor, weight);
+}
+
+// Report a tap event as "EVENT:name:n[:millis]" or a frame
+void reportEvent(const char *name, byte code, int sensor) {
+  if (binaryMode) {
+    sendFrame(FRAME_EVENT, sensor, code);
+  } else {
+    Serial.print("EVENT:");
+    Serial.print(name);
+    Serial.print(":");
+    Serial.print(sensor);
+    if (timestampMode) {
+      Serial.print(":");
+      Serial.print(millis());
+    }
+    Serial.println();
+  }
+}
+
+// Report a status as "STATUS:name[:n]" or a frame (sensor 0 = no sensor)
+void reportStatus(const char *name, byte code, int sensor) {
+  if (binaryMode) {
+    sendFrame(FRAME_STATUS, sensor, code);
+  } else {
+    Serial.print("STATUS:");
+    Serial.print(name);
+    if (sensor > 0) {
+      Serial.print(":");
+      Serial.print(sensor);
+    }
+    Serial.println();
+  }
+}
+
 // Function to get smoothed FSR reading for a specific sensor
 int getSmoothedFSRReading(int sensorIndex, int pin) {
   // Subtract the last reading
@@ -162,8 +283,7 @@ void processTapDetection(int sensorIndex, int fsrValue) {
     fsrState[sensorIndex].pressStartTime = currentTime;
     fsrState[sensorIndex].lastStateChangeTime = currentTime;
     digitalWrite(LED_PIN, HIGH); // Visual feedback
-    Serial.print("EVENT:TAP_START:");
-    Serial.println(sensorIndex + 1);  // Send sensor number (1-4)
+    reportEvent("TAP_START", EVENT_TAP_START, sensorIndex + 1);  // Send sensor number (1-4)
   }
   
   // Detect release
@@ -175,8 +295,7 @@ void processTapDetection(int sensorIndex, int fsrValue) {
     
     // Check if it was a hold
     if (pressDuration >= HOLD_TIME) {
-      Serial.print("EVENT:HOLD:");
-      Serial.println(sensorIndex + 1);
+      reportEvent("HOLD", EVENT_HOLD, sensorIndex + 1);
       fsrState[sensorIndex].tapCount = 0;  // Reset tap counter after hold
     }
     // Check if it was a tap
@@ -184,8 +303,7 @@ void processTapDetection(int sensorIndex, int fsrValue) {
       // Check for double tap
       if (fsrState[sensorIndex].tapCount > 0 && 
           (currentTime - fsrState[sensorIndex].lastTapTime <= DOUBLE_TAP_TIME)) {
-        Serial.print("EVENT:DOUBLE_TAP:");
-        Serial.println(sensorIndex + 1);
+        reportEvent("DOUBLE_TAP", EVENT_DOUBLE_TAP, sensorIndex + 1);
         fsrState[sensorIndex].tapCount = 0;  // Reset tap counter
       }
       else {
@@ -204,8 +322,7 @@ void processTapDetection(int sensorIndex, int fsrValue) {
     if (currentTime - fsrState[sensorIndex].pressStartTime >= HOLD_TIME) {
       // Print hold notification once per second
       if ((currentTime - fsrState[sensorIndex].pressStartTime) % 1000 < 20) {
-        Serial.print("EVENT:HOLDING:");
-        Serial.println(sensorIndex + 1);
+        reportEvent("HOLDING", EVENT_HOLDING, sensorIndex + 1);
       }
     }
   }
@@ -213,8 +330,7 @@ void processTapDetection(int sensorIndex, int fsrValue) {
   // After a certain amount of time without a second tap, declare it a single tap
   if (fsrState[sensorIndex].tapCount == 1 && 
       currentTime - fsrState[sensorIndex].lastTapTime > DOUBLE_TAP_TIME) {
-    Serial.print("EVENT:SINGLE_TAP:");
-    Serial.println(sensorIndex + 1);
+    reportEvent("SINGLE_TAP", EVENT_SINGLE_TAP, sensorIndex + 1);
     fsrState[sensorIndex].tapCount = 0;
   }
 }
@@ -236,29 +352,25 @@ void loop() {
   if (millis() > t + serialPrintInterval) {
     if (newDataReady1) {
       float weight1 = LoadCell1.getData();
-      Serial.print("WEIGHT:1:");
-      Serial.println(weight1);
+      reportWeightIfChanged(1, weight1);
       newDataReady1 = 0;
     }
     
     if (newDataReady2) {
       float weight2 = LoadCell2.getData();
-      Serial.print("WEIGHT:2:");
-      Serial.println(weight2);
+      reportWeightIfChanged(2, weight2);
       newDataReady2 = 0;
     }
     
     if (newDataReady3) {
       float weight3 = LoadCell3.getData();
-      Serial.print("WEIGHT:3:");
-      Serial.println(weight3);
+      reportWeightIfChanged(3, weight3);
       newDataReady3 = 0;
     }
     
     if (newDataReady4) {
       float weight4 = LoadCell4.getData();
-      Serial.print("WEIGHT:4:");
-      Serial.println(weight4);
+      reportWeightIfChanged(4, weight4);
       newDataReady4 = 0;
     }
     
@@ -295,8 +407,7 @@ void loop() {
             LoadCell4.tareNoDelay();
             break;
         }
-        Serial.print("STATUS:TARE_STARTED:");
-        Serial.println(sensorNum);
+        reportStatus("TARE_STARTED", STATUS_TARE_STARTED, sensorNum);
       }
     }
     else if (command == "TARE_ALL") {
@@ -304,25 +415,75 @@ void loop() {
       LoadCell2.tareNoDelay();
       LoadCell3.tareNoDelay();
       LoadCell4.tareNoDelay();
-      Serial.println("STATUS:TARE_ALL_STARTED");
+      reportStatus("TARE_ALL_STARTED", STATUS_TARE_ALL_STARTED, 0);
     }
     else if (command == "STATUS") {
-      Serial.println("STATUS:OK");
+      reportStatus("OK", STATUS_OK, 0);
+    }
+    else if (command == "MODE:BINARY") {
+      // Confirm in text, then everything after this line is binary frames
+      Serial.println("STATUS:MODE:BINARY");
+      binaryMode = true;
+    }
+    else if (command.startsWith("INTERVAL:")) {
+      long interval = command.substring(9).toInt();
+      serialPrintInterval = interval < 10 ? 10 : interval;
+      reportStatus("INTERVAL_SET", STATUS_INTERVAL_SET, 0);
+    }
+    else if (command.startsWith("DEADBAND:")) {
+      // DEADBAND:grams for every sensor or DEADBAND:n:grams for one
+      String args = command.substring(9);
+      int split = args.indexOf(':');
+      if (split < 0) {
+        for (int i = 0; i < 4; i++) {
+          deadband[i] = args.toFloat();
+          deadbandTrailing[i] = 0;
+        }
+        reportStatus("DEADBAND_SET", STATUS_DEADBAND_SET, 0);
+      } else {
+        int sensorNum = args.substring(0, split).toInt();
+        if (sensorNum >= 1 && sensorNum <= 4) {
+          deadband[sensorNum - 1] = args.substring(split + 1).toFloat();
+          deadbandTrailing[sensorNum - 1] = 0;
+          reportStatus("DEADBAND_SET", STATUS_DEADBAND_SET, sensorNum);
+        }
+      }
+    }
+    else if (command.startsWith("BAUD:")) {
+      // Confirm at the old rate, then switch; the host follows on the confirmation
+      long baud = command.substring(5).toInt();
+      if (baud == 9600 || baud == 19200 || baud == 38400 || baud == 57600 || baud == 115200 ||
+          baud == 230400 || baud == 250000 || baud == 500000 || baud == 1000000) {
+        reportStatus("BAUD_SET", STATUS_BAUD_SET, 0);
+        Serial.flush();
+        Serial.end();
+        Serial.begin(baud);
+      }
+    }
+    else if (command == "TIMESTAMPS:ON") {
+      timestampMode = true;
+    }
+    else if (command == "TIMESTAMPS:OFF") {
+      timestampMode = false;
+    }
+    else if (command == "ID") {
+      // Handshake so the host can tell the sensor board from the dispenser
+      Serial.println("ID:SENSOR");
     }
   }
 
   // Check if tares are complete
   if (LoadCell1.getTareStatus() == true) {
-    Serial.println("STATUS:TARE_COMPLETE:1");
+    reportStatus("TARE_COMPLETE", STATUS_TARE_COMPLETE, 1);
   }
   if (LoadCell2.getTareStatus() == true) {
-    Serial.println("STATUS:TARE_COMPLETE:2");
+    reportStatus("TARE_COMPLETE", STATUS_TARE_COMPLETE, 2);
   }
   if (LoadCell3.getTareStatus() == true) {
-    Serial.println("STATUS:TARE_COMPLETE:3");
+    reportStatus("TARE_COMPLETE", STATUS_TARE_COMPLETE, 3);
   }
   if (LoadCell4.getTareStatus() == true) {
-    Serial.println("STATUS:TARE_COMPLETE:4");
+    reportStatus("TARE_COMPLETE", STATUS_TARE_COMPLETE, 4);
   }
   
   // Small delay for stability
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Latency benchmark for the card detector -> game transports.
+
+A detector process sends card detections at a fixed rate over TCP
+loopback, a Unix domain socket or the shared-memory ring, and the game
+side (a DetectorServer or ShmDetectionReader on a Reactor) measures the
+one-way latency of each message.
+
+Example:
+    python benchmark_detection_transport.py --count 5000 --rate 2000
+    python benchmark_detection_transport.py --transports tcp unix
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+import numpy as np
+
+from poker_detection_protocol import encode_detection, encode_hello, parse_address
+from poker_detector_server import DetectorServer
+from poker_reactor import Reactor
+from poker_shm_transport import ShmDetectionReader, ShmDetectionWriter
+
+TRANSPORTS = ('tcp', 'unix', 'shm')
+CARDS = [f"{rank}{suit}" for rank in "23456789TJQKA" for suit in "CDHS"]
+
+
+def send_detections(transport, host, port, count, rate):
+    """Detector process: send count detections, stamped with time.monotonic()
+    (system-wide, so comparable in the game process) as their timestamp."""
+    if transport == 'shm':
+        writer = ShmDetectionWriter("benchmark", host)
+        send = lambda card, now: writer.write(card, 1.0, now)
+    else:
+        family, address = parse_address(host, port)
+        conn = socket.socket(family, socket.SOCK_STREAM)
+        conn.connect(address)
+        conn.sendall(encode_hello("benchmark"))
+        send = lambda card, now: conn.sendall(encode_detection(card, now))
+
+    interval = 1 / rate if rate else 0
+    next_time = time.monotonic()
+    for i in range(count):
+        if interval:
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_time += interval
+        send(CARDS[i % len(CARDS)], time.monotonic())
+
+    if transport == 'shm':
+        writer.close()
+    else:
+        conn.close()
+
+
+def run_benchmark(transport='tcp', count=2000, rate=1000.0, timeout=10.0):
+    """Send count detections at rate per second (None for as fast as
+    possible) over transport and return a dict of results."""
+    reactor = Reactor()
+    latencies = []
+
+    def on_messages(client, messages):
+        now = time.monotonic()
+        latencies.extend(now - message['timestamp'] for message in messages)
+
+    name = f"poker_benchmark_{os.getpid()}"
+    if transport == 'shm':
+        source = ShmDetectionReader(reactor, name, on_messages, capacity=max(count, 256))
+        host, port = name, None
+    elif transport == 'unix':
+        host, port = f"unix:{os.path.join(tempfile.gettempdir(), name + '.sock')}", None
+        source = DetectorServer(reactor, host, port, on_messages)
+    else:
+        source = DetectorServer(reactor, 'localhost', 0, on_messages)
+        host, port = source.address
+
+    detector = multiprocessing.get_context('spawn').Process(target=send_detections,
+                                                             args=(transport, host, port, count, rate))
+    start = time.monotonic()
+    detector.start()
+    deadline = start + timeout
+    while len(latencies) < count and time.monotonic() < deadline:
+        reactor.run_once(0.05)
+    elapsed = time.monotonic() - start
+    detector.join(5)
+    source.close()
+    reactor.close()
+
+    latencies = np.array(latencies) * 1000
+    received = len(latencies)
+    percentiles = np.percentile(latencies, [50, 95, 99]) if received else [float('nan')] * 3
+    return {
+        'transport': transport,
+        'sent': count,
+        'received': received,
+        'throughput': received / elapsed,
+        'latency_p50_ms': percentiles[0],
+        'latency_p95_ms': percentiles[1],
+        'latency_p99_ms': percentiles[2],
+        'latency_max_ms': float(latencies.max()) if received else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Card detector transport latency benchmark')
+    parser.add_argument('--transports', nargs='+', choices=TRANSPORTS, default=list(TRANSPORTS),
+                        help='Transports to compare')
+    parser.add_argument('--count', type=int, default=2000, help='Detections sent per transport')
+    parser.add_argument('--rate', type=float, default=1000, help='Detections per second (0 for as fast as possible)')
+    args = parser.parse_args()
+
+    print(f"{'Transport':<10} {'Received':>10} {'Rate/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for transport in args.transports:
+        result = run_benchmark(transport, args.count, args.rate or None)
+        print(f"{transport:<10} {result['received']:>5}/{result['sent']:<4} {result['throughput']:>9.0f} "
+              f"{result['latency_p50_ms']:>8.3f} {result['latency_p95_ms']:>8.3f} "
+              f"{result['latency_p99_ms']:>8.3f} {result['latency_max_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Load benchmark for PokerSignalReceiver driven by a virtual Arduino.
+
+Example:
+    python benchmark_signal_receiver.py --rate 2000 --duration 5 --binary
+    python benchmark_signal_receiver.py --replay session.psrec --speed 10
+"""
+import argparse
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+from poker_serial_manager import SerialManager
+from poker_serial_simulator import VirtualArduino, random_traffic, TAP_EVENTS
+from poker_serial_recorder import ReplaySource
+from poker_signal_receiver import PokerSignalReceiver, SignalProtocol
+
+
+class MessageCounter(SignalProtocol):
+    """Parses traffic without delivering events, to count its messages."""
+    def _emit(self, event):
+        pass
+
+
+def count_messages(path):
+    """Number of messages (lines or frames) in a serial recording."""
+    counter = MessageCounter(path)
+    ReplaySource(path, speed=None).feed(counter)
+    return counter.messages_received
+
+
+def run_benchmark(rate=1000, duration=5.0, tap_ratio=0.05, binary=False, consumer_delay=0.0, seed=0,
+                  replay=None, speed=1.0, deadband=0.0):
+    """Drive a receiver with random traffic and return a dict of results.
+
+    rate is in messages per second (None for as fast as possible) and
+    consumer_delay (s) is how long the consumer waits between queue drains,
+    e.g. 0.05 for the GUI's frame delay. With `replay`, the traffic is the
+    serial recording at that path played at `speed` (None for as fast as
+    possible) instead, and rate, duration, tap_ratio and binary are unused.
+    A deadband (g) has the virtual Arduino only send weights that moved.
+    """
+    manager = SerialManager(ready_timeout=0)
+    arduino = VirtualArduino()
+    receiver = PokerSignalReceiver(arduino.port, binary=binary, manager=manager)
+    receiver.wait_connected(5)
+    if binary:
+        deadline = time.monotonic() + 1
+        while not receiver.receiver.binary and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    if deadband:
+        # Wait for the DEADBAND_SET reply
+        before = receiver.messages_received
+        receiver.set_deadband(deadband)
+        while receiver.messages_received == before:
+            time.sleep(0.01)
+
+    # Messages received and sent before the traffic starts (e.g. the MODE:BINARY reply)
+    baseline = receiver.messages_received
+    sent_baseline = arduino.sent
+
+    tap_received = []
+    depths = []
+    done = threading.Event()
+
+    def consume():
+        while not done.is_set():
+            depths.append(receiver.event_queue.qsize())
+            try:
+                event = receiver.event_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if event['type'] in TAP_EVENTS:
+                tap_received.append(time.perf_counter())
+            while True:
+                try:
+                    event = receiver.event_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event['type'] in TAP_EVENTS:
+                    tap_received.append(time.perf_counter())
+            if consumer_delay:
+                time.sleep(consumer_delay)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+
+    start = time.perf_counter()
+    if replay is not None:
+        arduino.replay(ReplaySource(replay, speed))
+        sent = offered = count_messages(replay)
+    else:
+        offered = arduino.play(random_traffic(random.Random(seed), tap_ratio), rate, duration)
+        sent = arduino.sent - sent_baseline
+    send_time = time.perf_counter() - start
+
+    # Let the receiver catch up with what is still in flight
+    deadline = time.perf_counter() + 5
+    while receiver.messages_received - baseline < sent and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    while len(tap_received) < len(arduino.tap_times) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    done.set()
+    consumer.join()
+
+    received = receiver.messages_received - baseline
+    matched = min(len(tap_received), len(arduino.tap_times))
+    latencies = (np.array(tap_received[:matched]) - np.array(arduino.tap_times[:matched])) * 1000
+
+    receiver.disconnect()
+    manager.close()
+    arduino.close()
+
+    percentiles = np.percentile(latencies, [50, 95, 99]) if matched else [float('nan')] * 3
+    return {
+        'offered': offered,
+        'sent': sent,
+        'received': received,
+        'dropped': sent - received,
+        'dropped_frames': receiver.dropped_frames,
+        'send_rate': offered / send_time,
+        'throughput': received / elapsed,
+        'taps_sent': len(arduino.tap_times),
+        'taps_received': len(tap_received),
+        'queue_depth_max': max(depths, default=0),
+        'queue_depth_mean': float(np.mean(depths)) if depths else 0.0,
+        'latency_p50_ms': percentiles[0],
+        'latency_p95_ms': percentiles[1],
+        'latency_p99_ms': percentiles[2],
+        'latency_max_ms': float(latencies.max()) if matched else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PokerSignalReceiver load benchmark')
+    parser.add_argument('--rate', type=float, default=1000, help='Messages per second (0 for as fast as possible)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds of traffic')
+    parser.add_argument('--tap-ratio', type=float, default=0.05, help='Fraction of messages that are taps')
+    parser.add_argument('--binary', action='store_true', help='Use binary telemetry frames')
+    parser.add_argument('--consumer-delay', type=float, default=0.0, help='Seconds between queue drains')
+    parser.add_argument('--seed', type=int, default=0, help='Random traffic seed')
+    parser.add_argument('--deadband', type=float, default=0.0, help='Only send weights that moved this many grams')
+    parser.add_argument('--replay', type=str, default=None, help='Replay this serial recording instead of random traffic')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed factor (0 for as fast as possible)')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.rate or None, args.duration, args.tap_ratio, args.binary,
+                           args.consumer_delay, args.seed, args.replay, args.speed or None,
+                           args.deadband)
+
+    print(f"Messages offered:   {result['offered']} ({result['send_rate']:.0f}/s)")
+    print(f"Messages sent:      {result['sent']}")
+    print(f"Messages received:  {result['received']} ({result['throughput']:.0f}/s)")
+    print(f"Dropped:            {result['dropped']} messages, {result['dropped_frames']} frames")
+    print(f"Taps:               {result['taps_received']}/{result['taps_sent']}")
+    print(f"Queue depth:        max {result['queue_depth_max']}, mean {result['queue_depth_mean']:.2f}")
+    print(f"Tap latency (ms):   p50 {result['latency_p50_ms']:.3f}, p95 {result['latency_p95_ms']:.3f}, "
+          f"p99 {result['latency_p99_ms']:.3f}, max {result['latency_max_ms']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
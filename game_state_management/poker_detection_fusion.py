@@ -0,0 +1,190 @@
+import time
+from collections import deque
+
+from poker_detection_protocol import CARD_DETECTION
+
+
+def parse_views(text):
+    """Parse camera views ("cam-a,cam-b;cam-c": cameras watching the same spot
+    separated by commas, views by semicolons) into a detector -> view dict."""
+    views = {}
+    for i, view in enumerate(text.split(";")):
+        for detector in view.split(","):
+            if detector.strip():
+                views[detector.strip()] = f"view{i}"
+    return views
+
+
+class _Group:
+    """Detections of one card appearance in one view: the first detection's time and one vote per detector."""
+    __slots__ = ('view', 'first_time', 'first_arrival', 'votes')
+
+    def __init__(self, view, timestamp, arrival):
+        self.view = view
+        self.first_time = timestamp
+        self.first_arrival = arrival
+        # detector -> (card, confidence, timestamp, trace id)
+        self.votes = {}
+
+
+class DetectionFusion:
+    """Fuses card detections from several cameras into one card event.
+
+    Cameras watching the same spot share a view (`views` maps detector
+    names to view names; an unlisted detector is a view of its own).
+    Detections of one view whose timestamps lie within `window` seconds of
+    each other are grouped as one appearance of a card, and a conflict
+    between their labels is settled by confidence-weighted vote (each
+    detector votes once, with its most confident detection). A camera sees
+    one card at a time, so a different card from a detector that already
+    voted, or from another view, is a card of its own.
+
+    A group is decided as soon as every active detector of its view has
+    voted, or otherwise once the detectors still missing would normally
+    have arrived: each detector's lag behind the first camera of its view
+    is learnt, and a group waits at most the slowest missing detector's
+    lag plus `latency_budget`, and never longer than `window`. A decided
+    card that repeats one emitted within `duplicate_window` seconds (from
+    any view) is suppressed.
+
+    At most `max_groups` groups are open at once (the oldest is decided
+    early beyond that), and detectors not heard from for `active_timeout`
+    seconds are forgotten, so memory stays bounded.
+    """
+    # float window         : seconds of detection timestamps grouped together
+    # float latency_budget : seconds a group waits beyond the slowest missing detector's usual lag
+    # float lag_smoothing  : weight of the newest sample in each detector's lag average
+    # dict views           : detector -> view, for cameras watching the same spot
+    def __init__(self, window=0.150, latency_budget=0.005, duplicate_window=2.0, max_groups=32,
+                 active_timeout=30.0, lag_smoothing=0.2, views=None):
+        self.window = window
+        self.latency_budget = latency_budget
+        self.duplicate_window = duplicate_window
+        self.max_groups = max_groups
+        self.active_timeout = active_timeout
+        self.lag_smoothing = lag_smoothing
+        self.views = views or {}
+
+        self.groups = deque()
+
+        # Per detector: monotonic time last heard from, and lag behind the first camera of its view (s)
+        self.last_seen = {}
+        self.lags = {}
+
+        # card -> (detection timestamp, first arrival, view) of its last emission
+        self.emitted = {}
+
+        # Card events emitted, and detections/decisions suppressed as duplicates
+        self.fused = 0
+        self.suppressed = 0
+
+    def view_of(self, detector):
+        return self.views.get(detector, detector)
+
+    @property
+    def next_deadline(self):
+        """Monotonic time the oldest open group must be decided by (None if none)."""
+        if not self.groups:
+            return None
+        return min(self._deadline(group) for group in self.groups)
+
+    def add(self, message, now=None):
+        """Add a card_detection message; return the card events decided by it."""
+        now = time.monotonic() if now is None else now
+        card = message.get('card')
+        if not card:
+            return []
+        detector = str(message.get('detector') or "")
+        confidence = float(message.get('confidence', 1.0))
+        timestamp = message.get('timestamp')
+        timestamp = time.time() if timestamp is None else float(timestamp)
+
+        view = self.view_of(detector)
+        self.last_seen[detector] = now
+        self._forget_inactive(now)
+
+        # A late camera confirming a card already emitted
+        previous = self.emitted.get(card)
+        if previous is not None and abs(timestamp - previous[0]) <= self.duplicate_window:
+            if abs(timestamp - previous[0]) <= self.window and previous[2] == view:
+                self._learn_lag(detector, now - previous[1])
+            self.suppressed += 1
+            return self.poll(now)
+
+        decided = []
+        for group in self.groups:
+            vote = group.votes.get(detector)
+            if (group.view == view and abs(timestamp - group.first_time) <= self.window
+                    and (vote is None or vote[0] == card)):
+                break
+        else:
+            if len(self.groups) >= self.max_groups:
+                decided += self._decide(self.groups.popleft())
+            group = _Group(view, timestamp, now)
+            self.groups.append(group)
+
+        vote = group.votes.get(detector)
+        if vote is None:
+            self._learn_lag(detector, now - group.first_arrival)
+        if vote is None or confidence > vote[1]:
+            group.votes[detector] = (card, confidence, timestamp, message.get('trace'))
+        return decided + self.poll(now)
+
+    def poll(self, now=None):
+        """Decide the groups that are complete or out of time; return their card events."""
+        now = time.monotonic() if now is None else now
+        decided = []
+        for group in list(self.groups):
+            if now >= self._deadline(group):
+                self.groups.remove(group)
+                decided += self._decide(group)
+        return decided
+
+    def _deadline(self, group):
+        missing = [detector for detector in self.last_seen
+                   if detector not in group.votes and self.view_of(detector) == group.view]
+        if not missing:
+            return group.first_arrival
+        wait = max(self.lags.get(detector, self.window) for detector in missing) + self.latency_budget
+        return group.first_arrival + min(wait, self.window)
+
+    def _learn_lag(self, detector, lag):
+        previous = self.lags.get(detector)
+        self.lags[detector] = lag if previous is None else previous + self.lag_smoothing * (lag - previous)
+
+    def _forget_inactive(self, now):
+        for detector, seen in list(self.last_seen.items()):
+            if now - seen > self.active_timeout:
+                del self.last_seen[detector]
+                self.lags.pop(detector, None)
+
+    def _decide(self, group):
+        scores = {}
+        for card, confidence, _, _ in group.votes.values():
+            scores[card] = scores.get(card, 0.0) + confidence
+        card = max(scores, key=scores.get)
+
+        # Forget emissions too old to suppress anything
+        for other, (timestamp, _, _) in list(self.emitted.items()):
+            if abs(group.first_time - timestamp) > self.duplicate_window:
+                del self.emitted[other]
+        if card in self.emitted:
+            self.suppressed += 1
+            return []
+
+        agreeing = [(detector, vote) for detector, vote in group.votes.items() if vote[0] == card]
+        timestamp = min(vote[2] for _, vote in agreeing)
+        self.emitted[card] = (timestamp, group.first_arrival, group.view)
+        self.fused += 1
+        total = sum(scores.values())
+        return [{
+            "type": CARD_DETECTION,
+            "card": card,
+            "timestamp": timestamp,
+            "confidence": scores[card] / total if total else 0.0,
+            "detectors": sorted(detector for detector, _ in agreeing),
+            "votes": len(group.votes),
+            # Trace ids of the agreeing detections, and when the first vote arrived (monotonic)
+            "traces": [vote[3] for _, vote in agreeing if vote[3]],
+            "first_arrival": group.first_arrival
+        }]
@@ -0,0 +1,105 @@
+import json
+import socket
+import time
+
+# Card detector -> game messages: one JSON object per line (NDJSON), e.g.
+#   {"type": "hello", "detector": "cam-left"}                    (once, on connecting)
+#   {"type": "card_detection", "card": "10H", "timestamp": 1718000000.0, "detector": "cam-left",
+#    "confidence": 0.93, "trace": 2711949431}
+# "trace" is the card's trace id (poker_tracing), linking its spans in both processes.
+HELLO = "hello"
+CARD_DETECTION = "card_detection"
+
+# Detector address prefix selecting a Unix domain socket ("unix:/tmp/poker.sock")
+# instead of TCP, for a detector on the game's machine
+UNIX_PREFIX = "unix:"
+
+# Longest line accepted; a longer one is dropped as corrupt rather than buffered forever
+MAX_LINE = 64 * 1024
+
+
+def parse_address(host, port):
+    """Socket family and address for a host/port pair ("unix:/path" for AF_UNIX)."""
+    if host.startswith(UNIX_PREFIX):
+        return socket.AF_UNIX, host[len(UNIX_PREFIX):]
+    return socket.AF_INET, (host, port)
+
+
+def _encode(message):
+    return (json.dumps(message) + "\n").encode('utf-8')
+
+
+def encode_hello(detector):
+    """Encode the message naming a detector to the game."""
+    return _encode({"type": HELLO, "detector": detector})
+
+
+def encode_detection(card, timestamp=None, detector=None, confidence=None, trace_id=None):
+    """Encode a card detection as a newline-terminated JSON message (confidence 0-1)."""
+    message = {
+        "type": CARD_DETECTION,
+        "card": card,
+        "timestamp": time.time() if timestamp is None else timestamp
+    }
+    if detector is not None:
+        message["detector"] = detector
+    if confidence is not None:
+        message["confidence"] = confidence
+    if trace_id is not None:
+        message["trace"] = trace_id
+    return _encode(message)
+
+
+class DetectionDecoder:
+    """Incremental NDJSON decoder for the detector stream.
+
+    feed() takes whatever a recv() returned and returns the complete
+    messages in it; a message split across reads is kept until the rest
+    arrives, and several messages in one read all come out.
+    """
+    def __init__(self, max_line=MAX_LINE):
+        self.max_line = max_line
+        self._buffer = bytearray()
+
+        # Messages decoded, and lines dropped as malformed or too long
+        self.messages = 0
+        self.errors = 0
+
+    def feed(self, data):
+        """Add received bytes; return the list of complete messages (dicts)."""
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        start = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                break
+            line = bytes(buffer[start:end]).strip()
+            start = end + 1
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                self.errors += 1
+                print(f"Invalid detection message: {line[:80]!r}")
+                continue
+            if not isinstance(message, dict):
+                self.errors += 1
+                continue
+            messages.append(message)
+
+        # Keep only the trailing partial message
+        if start:
+            del buffer[:start]
+        if len(buffer) > self.max_line:
+            self.errors += 1
+            print(f"Detection message longer than {self.max_line} bytes dropped")
+            buffer.clear()
+        self.messages += len(messages)
+        return messages
+
+    def reset(self):
+        """Forget a partial message (e.g. when the detector reconnects)."""
+        self._buffer.clear()
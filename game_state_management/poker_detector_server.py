@@ -0,0 +1,188 @@
+import os
+import socket
+import stat
+import time
+from collections import deque
+
+from poker_detection_protocol import DetectionDecoder, HELLO, parse_address
+from poker_tracing import TRACER
+
+
+class DetectorClient:
+    """One card detector connection: its decoder, identity and traffic stats."""
+    # float rate_window : seconds of traffic the message rate is averaged over
+    def __init__(self, conn, address, rate_window=10.0):
+        self.conn = conn
+        self.address = address
+        self.decoder = DetectionDecoder()
+
+        # Name from the detector's hello message, the peer address until then
+        self.name = f"{address[0]}:{address[1]}" if isinstance(address, tuple) else str(address)
+
+        self.connected_at = time.monotonic()
+        self.last_seen = None
+        self.messages = 0
+        self.bytes = 0
+
+        # (time, message count) per read within the rate window
+        self.rate_window = rate_window
+        self._reads = deque()
+
+    def record(self, count, size, now):
+        self.messages += count
+        self.bytes += size
+        self.last_seen = now
+        if count:
+            self._reads.append((now, count))
+        while self._reads and now - self._reads[0][0] > self.rate_window:
+            self._reads.popleft()
+
+    def rate(self, now=None):
+        """Messages per second over the rate window."""
+        now = time.monotonic() if now is None else now
+        span = min(self.rate_window, now - self.connected_at)
+        recent = sum(count for t, count in self._reads if now - t <= self.rate_window)
+        return recent / span if span > 0 else 0.0
+
+    def stats(self, now=None):
+        now = time.monotonic() if now is None else now
+        return {
+            'name': self.name,
+            'address': self.address,
+            'messages': self.messages,
+            'bytes': self.bytes,
+            'errors': self.decoder.errors,
+            'rate': self.rate(now),
+            'last_seen': None if self.last_seen is None else now - self.last_seen,
+            'connected_for': now - self.connected_at
+        }
+
+
+class DetectorServer:
+    """Accepts card detector connections and reads their messages on a Reactor.
+
+    Any number of detectors may be connected. Each gets a DetectorClient
+    with its own decoder; the messages decoded from each read are passed
+    together to on_messages(client, messages) on the reactor's thread.
+    A detector that reconnects under the same name replaces its stale
+    connection, so every camera needs a name of its own. A host of
+    "unix:/path" listens on a Unix domain socket at that path instead of
+    TCP (port is then unused).
+    """
+    def __init__(self, reactor, host='localhost', port=12345, on_messages=None, backlog=16):
+        self.reactor = reactor
+        self.on_messages = on_messages
+
+        family, address = parse_address(host, port)
+        self.unix_path = address if family == socket.AF_UNIX else None
+        self.server_socket = socket.socket(family, socket.SOCK_STREAM)
+        if self.unix_path is not None:
+            # A socket file left by a game that did not shut down cleanly
+            try:
+                if stat.S_ISSOCK(os.stat(self.unix_path).st_mode):
+                    os.unlink(self.unix_path)
+            except FileNotFoundError:
+                pass
+        else:
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket.bind(address)
+        self.server_socket.listen(backlog)
+        self.server_socket.setblocking(False)
+        self.address = self.server_socket.getsockname()
+
+        # Open detector connections (socket -> DetectorClient)
+        self.connections = {}
+        reactor.register(self.server_socket, self._accept)
+
+    @property
+    def connected(self):
+        return bool(self.connections)
+
+    @property
+    def clients(self):
+        return list(self.connections.values())
+
+    def stats(self):
+        """Per-detector stats (name, message rate, seconds since last seen, ...)."""
+        now = time.monotonic()
+        return [client.stats(now) for client in self.connections.values()]
+
+    def _accept(self, server_socket):
+        while True:
+            try:
+                conn, addr = server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"Error accepting connection: {e}")
+                return
+            conn.setblocking(False)
+            if not addr:
+                # Unix socket peers are unnamed
+                addr = f"unix:{self.unix_path}#{conn.fileno()}"
+            self.connections[conn] = DetectorClient(conn, addr)
+            self.reactor.register(conn, self._read)
+            print(f"Card detector connected from {addr}")
+
+    def _read(self, conn):
+        client = self.connections.get(conn)
+        if client is None:
+            return
+        messages = []
+        size = 0
+        start = time.monotonic_ns()
+        try:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    print(f"Card detector {client.name} disconnected")
+                    self._drop(conn)
+                    break
+                size += len(data)
+                messages += client.decoder.feed(data)
+        except (BlockingIOError, InterruptedError):
+            # Everything pending has been read
+            pass
+        except OSError as e:
+            print(f"Error receiving data from {client.name}: {e}")
+            self._drop(conn)
+
+        # Hello messages name the detector and are not passed on
+        if any(message.get('type') == HELLO for message in messages):
+            for message in messages:
+                if message.get('type') == HELLO and message.get('detector'):
+                    self._identify(client, str(message['detector']))
+            messages = [message for message in messages if message.get('type') != HELLO]
+
+        if TRACER.enabled:
+            end = time.monotonic_ns()
+            for message in messages:
+                TRACER.record("receive", start, end, message.get('trace'), {"detector": client.name})
+
+        client.record(len(messages), size, time.monotonic())
+        if messages and self.on_messages is not None:
+            self.on_messages(client, messages)
+
+    def _identify(self, client, name):
+        for other in self.clients:
+            if other is not client and other.name == name:
+                print(f"Card detector {name} reconnected, closing its old connection")
+                self._drop(other.conn)
+        client.name = name
+        print(f"Card detector {client.address} is {name}")
+
+    def _drop(self, conn):
+        self.reactor.unregister(conn)
+        self.connections.pop(conn, None)
+        conn.close()
+
+    def close(self):
+        for conn in list(self.connections):
+            self._drop(conn)
+        self.reactor.unregister(self.server_socket)
+        self.server_socket.close()
+        if self.unix_path is not None:
+            try:
+                os.unlink(self.unix_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from poker_latency import LatencyMonitor
+from poker_serial_manager import SerialManager
+from poker_signal_receiver import ROLE_DISPENSER
+
+# machine_control.ino command dealing the cards of each phase
+PHASE_COMMANDS = {'preflop': 'P0', 'flop': 'P1', 'turn': 'P2', 'river': 'P3'}
+
+
+class DispenserChannel:
+    """Command channel to the card dispenser Arduino.
+
+    send_command() returns at once with a concurrent.futures.Future that is
+    resolved with the command's latency (s) when the dispenser acks it, or
+    fails with asyncio.TimeoutError / ConnectionError. Commands are pipelined:
+    the dispenser queues them and runs them in order.
+    """
+    # float timeout : seconds to wait for each ack once the dispenser can start the command
+    # int retries : times a command is resent when its ack times out
+    def __init__(self, port='/dev/ttyACM0', baud_rate=9600, timeout=30.0, retries=1, manager=None):
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.manager = manager if manager is not None else SerialManager.shared()
+        self.device = self.manager.add_device(port, baud_rate, role=ROLE_DISPENSER)
+
+        # Send-to-ack latency per command and number of failed commands
+        self.latency = LatencyMonitor()
+        self.failures = 0
+
+    @property
+    def connected(self):
+        return self.device.connected
+
+    @property
+    def state(self):
+        return self.device.state
+
+    def send_command(self, command, timeout=None, retries=None):
+        """Send a command without waiting; returns a future of its latency (s)."""
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        return asyncio.run_coroutine_threadsafe(self._send(command, timeout, retries), self.manager.loop)
+
+    async def _send(self, command, timeout, retries):
+        sent = time.monotonic()
+        try:
+            acked = await self.device.request(command, timeout, retries)
+        except Exception:
+            self.failures += 1
+            raise
+        latency = acked - sent
+        self.latency.add(command, latency * 1000)
+        return latency
+
+    def deal(self, phase):
+        """Deal the cards of a game phase; returns the command's future."""
+        return self.send_command(PHASE_COMMANDS[phase])
@@ -0,0 +1,217 @@
+import itertools
+from functools import lru_cache
+
+import numpy as np
+
+# Cards are encoded as integer ids: rank * 4 + suit
+# rank runs from 0 (deuce) to 12 (ace), suit indexes SUITS
+SUITS = ['H', 'D', 'S', 'C']
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+# Packed scores use the same layout as Score: category * 14^5 + tiebreakers
+CATEGORY_BASE = 14 ** 5
+
+STANDARD_CATEGORIES = ['no pair', 'one pair', 'two pair', 'triple', 'straight',
+                       'flush', 'full house', 'four of a kind', 'straight flush']
+
+# Short deck: flush beats full house
+SHORT_DECK_CATEGORIES = ['no pair', 'one pair', 'two pair', 'triple', 'straight',
+                         'full house', 'flush', 'four of a kind', 'straight flush']
+
+# Quinary rank keys: the sum over a 5-card hand identifies its rank multiset
+RANK_KEYS = 5 ** np.arange(13, dtype=np.int64)
+
+# Suit marker for card subsets that are not all one suit
+MIXED_SUIT = 4
+# Suit marker for the empty subset (compatible with any suit)
+ANY_SUIT = 5
+
+
+class Variant:
+    # str name : variant name
+    # int hole_cards : number of hole cards dealt to each player
+    # tuple hole_used : allowed numbers of hole cards in the best 5-card hand
+    # list ranks : card ranks in the deck (1 = Ace through 13 = King)
+    # str ranking : hand ranking rules, 'standard' or 'short_deck'
+    def __init__(self, name, hole_cards, hole_used, ranks, ranking='standard'):
+        self.name = name
+        self.hole_cards = hole_cards
+        self.hole_used = hole_used
+        self.ranks = list(ranks)
+        self.ranking = ranking
+        self.categories = SHORT_DECK_CATEGORIES if ranking == 'short_deck' else STANDARD_CATEGORIES
+
+    def __str__(self):
+        return self.name
+
+
+VARIANTS = {
+    'holdem': Variant('holdem', 2, (0, 1, 2), range(1, 14)),
+    # Exactly 2 of the 4 hole cards and 3 of the board
+    'omaha': Variant('omaha', 4, (2,), range(1, 14)),
+    # 36-card deck (6 through Ace), A-6-7-8-9 is the lowest straight
+    'short_deck': Variant('short_deck', 2, (0, 1, 2), [1] + list(range(6, 14)), 'short_deck'),
+}
+
+
+def get_variant(variant):
+    """Return the Variant for a name (or pass a Variant through)."""
+    if isinstance(variant, Variant):
+        return variant
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown poker variant: {variant}")
+    return VARIANTS[variant]
+
+
+def card_id(card):
+    """Integer id of a Card object."""
+    rank = 12 if card.rank == 1 else card.rank - 2
+    return rank * 4 + SUIT_INDEX[card.suit]
+
+
+def card_ids(cards):
+    """Integer ids of a list of Card objects."""
+    return np.array([card_id(card) for card in cards], dtype=np.int64)
+
+
+def deck_ids(variant='holdem'):
+    """Integer ids of every card in a variant's deck."""
+    ranks = [12 if rank == 1 else rank - 2 for rank in get_variant(variant).ranks]
+    return np.array(sorted(rank * 4 + suit for rank in ranks for suit in range(4)), dtype=np.int64)
+
+
+def category_name(score, variant='holdem'):
+    """Hand category of a packed score."""
+    return get_variant(variant).categories[int(score) // CATEGORY_BASE]
+
+
+@lru_cache(maxsize=None)
+def combination_index(n, k):
+    """Index table of all k-subsets of n positions, shape (C(n, k), k)."""
+    combos = list(itertools.combinations(range(n), k))
+    return np.array(combos, dtype=np.intp).reshape(len(combos), k)
+
+
+def _short_deck_score(score, ranks, suited):
+    # Re-rank a standard score under short deck rules
+    category, rest = divmod(score, CATEGORY_BASE)
+    if sorted(ranks) == [4, 5, 6, 7, 12]:
+        # A-6-7-8-9 plays as a 9-high straight
+        category = 8 if suited else 4
+        rest = 8
+    elif category == 5:
+        category = 6
+    elif category == 6:
+        category = 5
+    return category * CATEGORY_BASE + rest
+
+
+@lru_cache(maxsize=None)
+def lookup_tables(ranking='standard'):
+    """Build the 5-card lookup tables for a ranking.
+
+    Returns (flush_table, keys, values): flush_table is indexed by the 13-bit
+    rank mask of a suited hand, keys/values map the sorted quinary rank keys
+    of unsuited hands to their packed scores.
+    """
+    # Imported here as poker_logic imports this module
+    from poker_logic import Card, evaluate_hand
+
+    def to_card_rank(rank):
+        return 1 if rank == 12 else rank + 2
+
+    flush_table = np.zeros(1 << 13, dtype=np.int64)
+    entries = []
+    for ranks in itertools.combinations_with_replacement(range(13), 5):
+        if any(ranks.count(rank) > 4 for rank in ranks):
+            continue
+
+        # Consecutive positions get different suits, so the hand is never suited
+        cards = [Card(SUITS[i % 4], to_card_rank(rank)) for i, rank in enumerate(ranks)]
+        score = evaluate_hand(cards).get_score()
+        if ranking == 'short_deck':
+            score = _short_deck_score(score, ranks, False)
+        entries.append((int(RANK_KEYS[list(ranks)].sum()), score))
+
+        if len(set(ranks)) == 5:
+            suited = [Card('S', to_card_rank(rank)) for rank in ranks]
+            score = evaluate_hand(suited).get_score()
+            if ranking == 'short_deck':
+                score = _short_deck_score(score, ranks, True)
+            flush_table[sum(1 << rank for rank in ranks)] = score
+
+    entries.sort()
+    keys = np.array([key for key, _ in entries], dtype=np.int64)
+    values = np.array([score for _, score in entries], dtype=np.int64)
+    return flush_table, keys, values
+
+
+def _subset_features(ids, index):
+    # Rank key sums, rank masks and common suit of every subset ids[..., index]
+    shape = ids.shape[:-1] + (index.shape[0],)
+    if index.shape[1] == 0:
+        zeros = np.zeros(shape, dtype=np.int64)
+        return zeros, zeros, np.full(shape, ANY_SUIT, dtype=np.int64)
+
+    subsets = ids[..., index]
+    ranks = subsets >> 2
+    suits = subsets & 3
+    keys = RANK_KEYS[ranks].sum(axis=-1)
+    masks = np.bitwise_or.reduce(1 << ranks, axis=-1)
+    same_suit = (suits == suits[..., :1]).all(axis=-1)
+    suit = np.where(same_suit, suits[..., 0], MIXED_SUIT)
+    return keys, masks, suit
+
+
+def best_scores(hole_ids, board_ids, variant='holdem'):
+    """Packed score of the best legal 5-card hand for every player.
+
+    hole_ids has shape (..., players, hole cards) and board_ids has shape
+    (..., board cards); leading batch dimensions broadcast against each other,
+    so several boards can be evaluated for the same players in one call.
+    Returns an int64 array of shape (..., players).
+    """
+    variant = get_variant(variant)
+    hole_ids = np.asarray(hole_ids, dtype=np.int64)
+    board_ids = np.asarray(board_ids, dtype=np.int64)
+    n_hole = hole_ids.shape[-1]
+    n_board = board_ids.shape[-1]
+    flush_table, keys, values = lookup_tables(variant.ranking)
+
+    best = None
+    for used in variant.hole_used:
+        from_board = 5 - used
+        if used > n_hole or from_board > n_board:
+            continue
+
+        # Board subsets are evaluated once and shared by every player
+        board_keys, board_masks, board_suit = _subset_features(board_ids, combination_index(n_board, from_board))
+        hole_keys, hole_masks, hole_suit = _subset_features(hole_ids, combination_index(n_hole, used))
+
+        # Combine to shape (..., players, hole subsets, board subsets)
+        board_keys = board_keys[..., None, None, :]
+        board_masks = board_masks[..., None, None, :]
+        board_suit = board_suit[..., None, None, :]
+        hole_keys = hole_keys[..., None]
+        hole_masks = hole_masks[..., None]
+        hole_suit = hole_suit[..., None]
+
+        key = hole_keys + board_keys
+        mask = hole_masks | board_masks
+        suit = np.where(hole_suit == ANY_SUIT, board_suit,
+                        np.where(board_suit == ANY_SUIT, hole_suit,
+                                 np.where(hole_suit == board_suit, hole_suit, MIXED_SUIT)))
+
+        scores = np.where(suit < MIXED_SUIT, flush_table[mask], values[np.searchsorted(keys, key)])
+        scores = scores.reshape(scores.shape[:-2] + (-1,)).max(axis=-1)
+        best = scores if best is None else np.maximum(best, scores)
+
+    if best is None:
+        raise ValueError(f"Not enough cards for a 5-card {variant} hand")
+    return best
+
+
+def evaluate_players(hands, community, variant='holdem'):
+    """Packed best-hand scores for a list of hole card lists and a shared board."""
+    hole_ids = np.array([card_ids(hand) for hand in hands], dtype=np.int64)
+    return best_scores(hole_ids, card_ids(community), variant)
@@ -4,27 +4,78 @@ import pygame
 from pygame.locals import *
 import time
 import argparse
-import socket
+import threading
 
 
 # Import local modules
 from poker_logic import Game, Card
-from poker_signal_receiver import PokerSignalReceiver
-from poker_gui import PokerGameGUI
+from poker_signal_receiver import (PokerSignalReceiver, ROLE_SENSOR, ROLE_DISPENSER,
+                                   CONNECTED, CONNECTING, DISCONNECTED)
+from poker_serial_manager import SerialManager, port_for_role
+from poker_gui import PokerGameGUI, FPS
+from poker_latency import LatencyMonitor, stamp
+from poker_signal_filter import coalesce_events
+from poker_detection_protocol import CARD_DETECTION
+from poker_detection_fusion import DetectionFusion, parse_views
+from poker_detector_server import DetectorServer
+from poker_shm_transport import ShmDetectionReader
+from poker_state_broadcast import StatePublisher
+from poker_metrics import REGISTRY, MetricsServer
+from poker_tracing import TRACER
+from poker_reactor import Reactor
+from poker_sensor_state import SensorState, parse_seat_map
+from poker_serial_recorder import ReplaySource
+from poker_serial_simulator import VirtualArduino
+
+# Connection status colours
+STATE_COLORS = {CONNECTED: (0, 255, 0), CONNECTING: (255, 255, 0), DISCONNECTED: (255, 0, 0)}
+
+# Metrics (served with --metrics-port)
+ARDUINO_EVENTS = REGISTRY.counter("poker_arduino_events_total", "Arduino events handled")
+COALESCED_EVENTS = REGISTRY.counter("poker_arduino_events_coalesced_total",
+                                    "Arduino events made redundant by later ones in their batch")
+DEFERRED_BATCHES = REGISTRY.counter("poker_arduino_batches_deferred_total",
+                                    "Event batches cut short by the per-frame event budget")
+SERIAL_CONNECTS = REGISTRY.counter("poker_serial_connects_total", "Times the sensor Arduino (re)connected")
+DETECTIONS = REGISTRY.counter("poker_detections_received_total", "Card detection messages received")
+CARDS_DETECTED = REGISTRY.counter("poker_cards_detected_total", "Card events decided by detection fusion")
+FRAMES = REGISTRY.counter("poker_frames_rendered_total", "Frames rendered")
+RENDER_SECONDS = REGISTRY.histogram("poker_render_seconds", "Time to render a frame")
+EVENT_LATENCY = REGISTRY.histogram("poker_event_latency_seconds",
+                                   "Arduino event latency from serial read to the frame showing it")
 
 class ArduinoPokerGame(PokerGameGUI):
-    def __init__(self, signal_receiver, n_players=4, small_blind=5, initial_pot=1000):
+    """Poker table driven by the sensor Arduino and the card detectors.
+    
+    All I/O is dispatched by one Reactor: detector sockets are read as soon
+    as they are readable and Arduino events wake the loop from the serial
+    thread, so they are handled on arrival rather than at the next frame.
+    The screen is redrawn when something changed, and otherwise only
+    `idle_fps` times a second.
+    """
+    def __init__(self, signal_receiver, detectors=None, reactor=None, n_players=4, small_blind=5, initial_pot=1000,
+                 variant='holdem'):
         # Initialize the parent class
-        super().__init__(n_players, small_blind, initial_pot)
+        super().__init__(n_players, small_blind, initial_pot, variant)
+        
+        # I/O loop, and the card detector sources it reads (DetectorServer, ShmDetectionReader)
+        self.reactor = reactor if reactor is not None else Reactor()
+        self.detectors = list(detectors or [])
+        for source in self.detectors:
+            source.on_messages = self.handle_detection_messages
         
-        # Store the signal receiver
+        # Store the signal receiver, whose events wake the I/O loop
         self.signal_receiver = signal_receiver
+        signal_receiver.notify = self.notify_arduino_events
+        # Events queued before the game existed (e.g. during the settings screen)
+        self.reactor.schedule(self.handle_arduino_events)
         
-        # Store the socket connection
-        self.socket_conn = socket_conn
+        # Redraw on changes, at least idle_fps times a second (status timers, overlays)
+        self.dirty = True
+        self.idle_fps = 4
         
-        # Map sensors to player positions
-        self.sensor_to_player = {1: 1, 2: 2, 3: 3, 4: 4}
+        # Sensor readings and the sensor -> seat map (configured with --sensors/--seat-map)
+        self.sensors = signal_receiver.sensors
         
         # Chip value conversion
         self.chip_weight = 10.0
@@ -34,7 +85,7 @@ class ArduinoPokerGame(PokerGameGUI):
         self.active_player = 0
         
         # Status message display
-        self.status_message = "Arduino " + ("connected" if signal_receiver.connected else "not connected")
+        self.status_message = f"Arduino {signal_receiver.state}"
         self.status_time = pygame.time.get_ticks()
         self.status_duration = 3000
         
@@ -43,6 +94,30 @@ class ArduinoPokerGame(PokerGameGUI):
         self.last_detected_card = None
         self.card_detection_time = 0
         self.card_display_duration = 5000  # Display detected card for 5 seconds
+        
+        # Detections from all cameras are fused into one card event per card shown
+        self.fusion = DetectionFusion()
+        self.fusion_deadline = None
+        
+        # Trace ids of cards handled since the last frame (traced with --trace)
+        self.unrendered_traces = []
+        
+        # Spectator displays mirroring the table (a StatePublisher, --state-port)
+        self.state_publisher = None
+        
+        # Latency of Arduino events from serial read to screen (L: show, D: dump)
+        self.latency = LatencyMonitor()
+        self.latency_dump_path = None
+        self.show_latency = False
+        self.latency_lines = []
+        self.latency_update_time = 0
+        self.unrendered_events = []
+        
+        # Events handled per frame: all pending ones (up to max_events_per_frame), as long as
+        # handling stays within event_budget seconds; the rest waits for the next frame
+        self.max_events_per_frame = None
+        self.event_budget = 0.010
+        self.deferred_events = []
 
     def handle_card_detection(self, card):
         """Handle a card detection from the card detector."""
@@ -60,37 +135,95 @@ class ArduinoPokerGame(PokerGameGUI):
         
         print(f"Card detected: {card}")
 
+    def handle_detection_messages(self, client, messages):
+        """Handle the messages of one read from a card detector."""
+        fused = []
+        for message in messages:
+            if message.get('type') == CARD_DETECTION:
+                DETECTIONS.inc()
+                fused += self.fusion.add(message)
+        self.handle_fused_detections(fused)
+    
+    def flush_detections(self):
+        """Decide the fusion groups whose cameras are in or whose time is up."""
+        self.fusion_deadline = None
+        self.handle_fused_detections(self.fusion.poll())
+    
+    def handle_fused_detections(self, fused):
+        for detection in fused:
+            start = time.monotonic_ns()
+            self.handle_card_detection(detection['card'])
+            CARDS_DETECTED.inc()
+            self.dirty = True
+            if TRACER.enabled:
+                end = time.monotonic_ns()
+                for trace_id in detection['traces']:
+                    TRACER.record("fusion", int(detection['first_arrival'] * 1e9), start, trace_id,
+                                  {"votes": detection['votes']})
+                    TRACER.record("handle", start, end, trace_id, {"card": detection['card']})
+                self.unrendered_traces += detection['traces']
+        
+        # Wake the loop when the next undecided group is due
+        deadline = self.fusion.next_deadline
+        if deadline is not None and (self.fusion_deadline is None or deadline < self.fusion_deadline):
+            self.fusion_deadline = deadline
+            self.reactor.call_at(deadline, self.flush_detections)
+    
     def handle_events(self):
-        # First handle standard Pygame events
-        super().handle_events()
-        
-        # Then check for Arduino events
-        arduino_event = self.signal_receiver.get_next_event()
-        if arduino_event:
-            self.handle_arduino_event(arduino_event)
-        
-        # Check for card detection data
-        if self.socket_conn:
-            try:
-                # Make socket non-blocking
-                self.socket_conn.setblocking(False)
-                
-                try:
-                    # Try to receive data
-                    data = self.socket_conn.recv(1024)
-                    if data:
-                        # Process the card detection string
-                        card_class = data.decode('utf-8').strip()
-                        if card_class:  # If not empty
-                            self.handle_card_detection(card_class)
-                except BlockingIOError:
-                    # No data available, this is normal in non-blocking mode
-                    pass
-                except Exception as e:
-                    print(f"Error receiving data: {e}")
-            except Exception as e:
-                print(f"Socket error: {e}")
-                self.socket_conn = None
+        # Standard Pygame events (Arduino and detector events are dispatched by the I/O loop)
+        if pygame.event.peek():
+            self.dirty = True
+            super().handle_events()
+    
+    def notify_arduino_events(self):
+        """Called from the serial thread when Arduino events are queued."""
+        self.reactor.schedule(self.handle_arduino_events)
+    
+    def handle_arduino_events(self):
+        """Handle the pending Arduino events as one batch."""
+        events = self.deferred_events + self.signal_receiver.get_events(self.max_events_per_frame)
+        self.deferred_events = []
+        if not events:
+            return
+        self.dirty = True
+        
+        # Events made redundant by later ones in the batch count as handled right away
+        batch = coalesce_events(events)
+        COALESCED_EVENTS.inc(len(events) - len(batch))
+        kept = {id(event) for event in batch}
+        for event in events:
+            if id(event) not in kept and event['type'] != 'CONNECTION':
+                stamp(event, 'handled')
+                self.unrendered_events.append(event)
+        
+        deadline = time.monotonic() + self.event_budget
+        for i, event in enumerate(batch):
+            if i and time.monotonic() >= deadline:
+                # Over budget: let the frame render, then carry on
+                self.deferred_events = batch[i:]
+                self.reactor.schedule(self.handle_arduino_events)
+                DEFERRED_BATCHES.inc()
+                break
+            if event['type'] == 'CONNECTION':
+                self.handle_connection_event(event)
+                continue
+            self.handle_arduino_event(event)
+            stamp(event, 'handled')
+            self.unrendered_events.append(event)
+            ARDUINO_EVENTS.inc()
+    
+    def handle_key(self, key):
+        if key == K_l:
+            self.show_latency = not self.show_latency
+        elif key == K_d:
+            self.latency.dump(self.latency_dump_path)
+    
+    def handle_connection_event(self, event):
+        """Show a connection state change of the sensor Arduino."""
+        if event['state'] == CONNECTED:
+            SERIAL_CONNECTS.inc()
+        self.status_message = f"Arduino {event['state']} ({event['port']})"
+        self.status_time = pygame.time.get_ticks()
     
     def handle_arduino_event(self, event):
         """Handle events from the Arduino."""
@@ -98,8 +231,8 @@ class ArduinoPokerGame(PokerGameGUI):
         sensor_id = event['sensor']
         
         # Convert sensor ID to player ID
-        if sensor_id in self.sensor_to_player:
-            player_id = self.sensor_to_player[sensor_id]
+        player_id = self.sensors.seat_of(sensor_id)
+        if player_id is not None:
             
             # Only handle events for the current player
             if player_id == self.active_player and self.waiting_for_action:
@@ -130,6 +263,8 @@ class ArduinoPokerGame(PokerGameGUI):
                 self.status_time = pygame.time.get_ticks()
     
     def render(self):
+        render_start = time.monotonic_ns()
+        
         # Render the basic game first
         super().render()
         
@@ -141,15 +276,27 @@ class ArduinoPokerGame(PokerGameGUI):
             status_text = self.font_medium.render(self.status_message, True, (255, 255, 0))
             self.screen.blit(status_text, (50, 80))
         
-        # Display Arduino connection status
-        connection_status = "Arduino: " + ("Connected" if self.signal_receiver.connected else "Not Connected")
-        connection_color = (0, 255, 0) if self.signal_receiver.connected else (255, 0, 0)
-        status_text = self.font_small.render(connection_status, True, connection_color)
-        self.screen.blit(status_text, (20, 40))
-        
-        # Display card detector connection status
-        detector_status = "Card Detector: " + ("Connected" if self.socket_conn else "Not Connected")
-        detector_color = (0, 255, 0) if self.socket_conn else (255, 0, 0)
+        # Display Arduino connection status (and the dispenser's once it is in use)
+        status_x = 20
+        devices = [("Arduino", self.signal_receiver)]
+        if self.game.dispenser is not None:
+            devices.append(("Dispenser", self.game.dispenser))
+        for name, device in devices:
+            status_text = self.font_small.render(f"{name}: {device.state.capitalize()}", True,
+                                                 STATE_COLORS[device.state])
+            self.screen.blit(status_text, (status_x, 40))
+            status_x += status_text.get_width() + 20
+        
+        # Display card detector connection status: message rate and time since last message of each
+        detectors = [stats for source in self.detectors for stats in source.stats()]
+        if detectors:
+            detector_status = "Card Detectors: " + ", ".join(
+                f"{stats['name']} {stats['rate']:.1f}/s"
+                + (f" ({stats['last_seen']:.0f}s ago)" if stats['last_seen'] is not None else " (no data)")
+                for stats in detectors)
+        else:
+            detector_status = "Card Detector: Not Connected"
+        detector_color = (0, 255, 0) if detectors else (255, 0, 0)
         detector_text = self.font_small.render(detector_status, True, detector_color)
         self.screen.blit(detector_text, (20, 60))
         
@@ -163,43 +310,157 @@ class ArduinoPokerGame(PokerGameGUI):
             cards_text = self.font_small.render("Detected Cards: " + ", ".join(self.detected_cards[-5:]), True, (200, 200, 200))
             self.screen.blit(cards_text, (20, self.height - 30))
         
+        # Display event latency percentiles (refreshed once a second)
+        if self.show_latency:
+            if current_time - self.latency_update_time >= 1000:
+                self.latency_lines = self.latency.report()
+                self.latency_update_time = current_time
+            for i, line in enumerate(self.latency_lines):
+                latency_text = self.font_small.render(line, True, (255, 255, 255))
+                self.screen.blit(latency_text, (self.width - latency_text.get_width() - 20, 20 + i * 20))
+        
         # Update the display
         pygame.display.flip()
+        
+        # Events handled since the last frame are now on screen
+        for event in self.unrendered_events:
+            stamp(event, 'rendered')
+            self.latency.record(event)
+            stamps = event['stamps']
+            if 'rx' in stamps:
+                EVENT_LATENCY.observe(stamps['rendered'] - stamps['rx'])
+        self.unrendered_events.clear()
+        
+        # Cards handled since the last frame are now on screen
+        if self.unrendered_traces:
+            render_end = time.monotonic_ns()
+            for trace_id in self.unrendered_traces:
+                TRACER.record("render", render_start, render_end, trace_id)
+            self.unrendered_traces.clear()
+
+    def run(self):
+        """Dispatch I/O as it arrives and redraw when something changed.
+        
+        Pygame events cannot wake the selector, so the loop waits at most
+        one frame for I/O before checking them.
+        """
+        frame = 1 / FPS
+        idle_frame = 1 / self.idle_fps
+        last_render = 0.0
+        while True:
+            self.reactor.run_once(frame)
+            self.handle_events()
+            if self.dirty and self.state_publisher is not None:
+                self.state_publisher.publish(self.game)
+            now = time.monotonic()
+            if self.dirty or now - last_render >= idle_frame:
+                self.render()
+                FRAMES.inc()
+                RENDER_SECONDS.observe(time.monotonic() - now)
+                self.dirty = False
+                last_render = now
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Poker Game with Arduino Integration')
-    parser.add_argument('--port', type=str, default='/dev/ttyACM0', help='Serial port for Arduino connection')
+    parser.add_argument('--port', type=str, default='auto', help="Serial port of the sensor Arduino ('auto' to detect)")
+    parser.add_argument('--dispenser-port', type=str, default='auto', help="Serial port of the dispenser Arduino ('auto' to detect)")
     parser.add_argument('--baud', type=int, default=9600, help='Baud rate for serial connection')
+    parser.add_argument('--binary', action='store_true', help='Use binary telemetry frames from the sensor Arduino')
+    parser.add_argument('--fast-baud', type=int, default=None, help='Switch the sensor Arduino to this baud rate after connecting')
+    parser.add_argument('--print-interval', type=int, default=None, help='Weight print interval of the sensor Arduino (ms)')
+    parser.add_argument('--deadband', type=float, default=None, help='Only have weights sent that moved this many grams')
+    parser.add_argument('--fw-timestamps', action='store_true', help='Ask the sensor Arduino to send millis() with events')
+    parser.add_argument('--record', type=str, default=None, help='Record the sensor Arduino traffic to this file')
+    parser.add_argument('--replay', type=str, default=None, help='Play a recorded session instead of the sensor Arduino')
+    parser.add_argument('--replay-speed', type=float, default=1.0, help='Replay speed factor (0 for as fast as possible)')
+    parser.add_argument('--latency-dump', type=str, default=None, help='Write event latency samples to this JSON file')
     parser.add_argument('--players', type=int, default=4, help='Number of players')
-    parser.add_argument('--host', type=str, default='localhost', help='Host for socket connection')
+    parser.add_argument('--sensors', type=int, default=4, help='Number of FSR sensors on the table')
+    parser.add_argument('--seat-map', type=str, default=None, help="Sensor to seat map, e.g. '1:1,2:2,3:3' (sensor N -> seat N if not given)")
+    parser.add_argument('--variant', type=str, default='holdem', choices=['holdem', 'omaha', 'short_deck'], help='Poker variant')
+    parser.add_argument('--host', type=str, default='localhost',
+                        help="Host for socket connection ('unix:/path' for a Unix domain socket)")
     parser.add_argument('--socket-port', type=int, default=12345, help='Port for socket connection')
+    parser.add_argument('--fusion-window', type=float, default=150,
+                        help='Card detections from different cameras this many ms apart are fused into one')
+    parser.add_argument('--fusion-budget', type=float, default=5,
+                        help="Ms fusion waits beyond a missing camera's usual lag before deciding")
+    parser.add_argument('--fusion-views', type=str, default=None,
+                        help="Cameras watching the same spot, whose labels are voted on, e.g. 'cam-a,cam-b;cam-c'")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve Prometheus metrics on this local HTTP port (/metrics)')
+    parser.add_argument('--trace', type=str, default=None,
+                        help='Record pipeline trace spans and write them to this file on exit (see poker_tracing.py)')
+    parser.add_argument('--state-port', type=int, default=None,
+                        help='Broadcast the table state to spectator displays on this local TCP port')
+    parser.add_argument('--shm', type=str, action='append', default=[], metavar='NAME',
+                        help='Also take card detections from a shared-memory ring of this name (same-machine '
+                             'detectors; one ring per detector, repeat for several)')
     args = parser.parse_args()
     
-    # Create a socket object
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if args.trace:
+        TRACER.enable("poker_game_manager")
+    
+    # One I/O loop for the card detector server and the Arduino events
+    reactor = Reactor()
     
     # Define host and port
     host = args.host if hasattr(args, 'host') else 'localhost'
     port = args.socket_port if hasattr(args, 'socket_port') else 12345
     
-    # Bind the socket
+    # Listen for card detectors
     try:
-        server_socket.bind((host, port))
-        # Listen for connections
-        server_socket.listen(1)
-        server_socket.setblocking(False)  # Make socket non-blocking
-        print(f"Server listening on {host}:{port}")
+        detectors = DetectorServer(reactor, host, port)
+        print(f"Server listening on {host if detectors.unix_path else f'{host}:{port}'}")
     except Exception as e:
         print(f"Failed to bind socket: {e}")
         sys.exit(1)
     
+    # Detectors on this machine can write to a shared-memory ring instead of the socket
+    detection_sources = [detectors]
+    for name in args.shm:
+        detection_sources.append(ShmDetectionReader(reactor, name))
+        print(f"Reading card detections from shared memory {name}")
+    
+    # Detections during setup are only shown in the console
+    for source in detection_sources:
+        source.on_messages = lambda client, messages: print(f"Received from card detector {client.name} during setup: {messages}")
+    
     # Initialize pygame
     pygame.init()
     
-    # Create signal receiver
-    signal_receiver = PokerSignalReceiver(port=args.port, baud_rate=args.baud)
+    # A recorded session is played through a virtual sensor Arduino
+    replay_arduino = None
+    if args.replay:
+        replay_arduino = VirtualArduino()
+        args.port = replay_arduino.port
+    
+    # Identify the Arduinos by handshake in the background unless both ports are given;
+    # roles are filled in (from the serial thread) as each one answers
+    roles = {}
+    detection = None
+    if 'auto' in (args.port, args.dispenser_port):
+        detection = SerialManager.shared().detect_async(baud_rate=args.baud, on_role=roles.__setitem__)
+        detection.add_done_callback(lambda future: print(f"Detected serial devices: {future.result()}"))
+    
+    sensors = SensorState(args.sensors, parse_seat_map(args.seat_map) if args.seat_map else None)
+    
+    def create_signal_receiver(sensor_port):
+        receiver = PokerSignalReceiver(port=sensor_port, baud_rate=args.baud, binary=args.binary, role=ROLE_SENSOR,
+                                       sensors=sensors, record=args.record, fast_baud=args.fast_baud)
+        if args.print_interval is not None:
+            receiver.set_print_interval(args.print_interval)
+        if args.deadband is not None:
+            receiver.set_deadband(args.deadband)
+        if args.fw_timestamps:
+            receiver.enable_timestamps()
+        return receiver
+    
+    # Create signal receiver (once detection has found the sensor Arduino's port)
+    signal_receiver = None
+    if args.port != 'auto':
+        signal_receiver = create_signal_receiver(args.port)
     
     # Create settings window
     settings_screen = pygame.display.set_mode((400, 300))
@@ -233,32 +494,16 @@ def main():
     GREEN = (0, 128, 0)
     BLACK = (0, 0, 0)
     
-    # Socket connection
-    conn = None
-    
     # Main settings loop
     running = True
     while running:
-        # Try to accept a connection from the card detector
-        if conn is None:
-            try:
-                # Non-blocking accept
-                conn, addr = server_socket.accept()
-                conn.setblocking(False)  # Make the connection non-blocking too
-                print(f"Card detector connected from {addr}")
-            except BlockingIOError:
-                # No connection available yet, which is fine
-                pass
-            except Exception as e:
-                print(f"Error accepting connection: {e}")
-        
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-                if conn:
-                    conn.close()
-                server_socket.close()
-                signal_receiver.disconnect()
+                for source in detection_sources:
+                    source.close()
+                if signal_receiver is not None:
+                    signal_receiver.disconnect()
                 pygame.quit()
                 sys.exit()
                 
@@ -309,19 +554,11 @@ def main():
                     elif event.unicode.isdigit():
                         pot_text += event.unicode
         
-        # Check for data from card detector during setup
-        if conn:
-            try:
-                data = conn.recv(1024)
-                if data:
-                    print(f"Received from card detector during setup: {data.decode('utf-8').strip()}")
-                    # No need to process further during setup
-            except BlockingIOError:
-                # No data available, which is fine
-                pass
-            except Exception as e:
-                print(f"Error receiving data: {e}")
-                conn = None
+        # Bind the sensor Arduino as soon as detection has found it (or given up)
+        if signal_receiver is None:
+            sensor_port = port_for_role(roles, ROLE_SENSOR)
+            if sensor_port is not None or detection.done():
+                signal_receiver = create_signal_receiver(sensor_port or '/dev/ttyACM1')
         
         # Clear the screen
         settings_screen.fill((50, 50, 50))
@@ -331,13 +568,17 @@ def main():
         settings_screen.blit(title_text, (50, 10))
         
         # Draw connection statuses
-        arduino_status = f"Arduino: {'Connected' if signal_receiver.connected else 'Not Connected'}"
-        arduino_color = GREEN if signal_receiver.connected else (255, 0, 0)
+        if signal_receiver is None:
+            arduino_status, arduino_color = "Arduino: Detecting...", (255, 165, 0)
+        else:
+            arduino_status = f"Arduino: {'Connected' if signal_receiver.connected else 'Not Connected'}"
+            arduino_color = GREEN if signal_receiver.connected else (255, 0, 0)
         arduino_text = small_font.render(arduino_status, True, arduino_color)
         settings_screen.blit(arduino_text, (50, 35))
         
-        detector_status = f"Card Detector: {'Connected' if conn else 'Waiting...'}"
-        detector_color = GREEN if conn else (255, 165, 0)  # Orange for waiting
+        connected = sum(len(source.clients) for source in detection_sources)
+        detector_status = f"Card Detectors: {connected}" if connected else "Card Detector: Waiting..."
+        detector_color = GREEN if connected else (255, 165, 0)  # Orange for waiting
         detector_text = small_font.render(detector_status, True, detector_color)
         settings_screen.blit(detector_text, (220, 35))
         
@@ -369,31 +610,75 @@ def main():
         # Update the display
         pygame.display.flip()
         
-        # Small delay to reduce CPU usage
-        pygame.time.delay(50)
+        # Wait for detector I/O (accepts and messages are handled as they arrive) until the next redraw
+        reactor.run_once(0.05)
+    
+    # Ports still being identified are waited for (the rest of the detection timeout at most)
+    if detection is not None:
+        roles = detection.result()
+    if signal_receiver is None:
+        signal_receiver = create_signal_receiver(port_for_role(roles, ROLE_SENSOR, '/dev/ttyACM1'))
+    dispenser_port = port_for_role(roles, ROLE_DISPENSER, '/dev/ttyACM0') if args.dispenser_port == 'auto' else args.dispenser_port
     
     # Create and run the poker game with selected settings
     poker_game = ArduinoPokerGame(
         signal_receiver=signal_receiver,
-        socket_conn=conn,
+        detectors=detection_sources,
+        reactor=reactor,
         n_players=n_players,
         small_blind=small_blind,
-        initial_pot=initial_pot
+        initial_pot=initial_pot,
+        variant=args.variant
     )
+    poker_game.game.dispenser_port = dispenser_port
+    poker_game.latency_dump_path = args.latency_dump
+    poker_game.fusion = DetectionFusion(args.fusion_window / 1000, args.fusion_budget / 1000,
+                                        views=parse_views(args.fusion_views) if args.fusion_views else None)
+    
+    # Queue depths and connection counts are read when scraped, not tracked
+    metrics_server = None
+    if args.metrics_port is not None:
+        REGISTRY.gauge("poker_event_queue_depth", "Arduino events waiting to be handled",
+                       function=lambda: signal_receiver.event_queue.qsize() + len(poker_game.deferred_events))
+        REGISTRY.gauge("poker_detectors_connected", "Card detectors connected",
+                       function=lambda: sum(len(source.clients) for source in detection_sources))
+        REGISTRY.gauge("poker_serial_connected", "Whether the sensor Arduino is connected",
+                       function=lambda: int(signal_receiver.connected))
+        REGISTRY.gauge("poker_spectators_connected", "Spectator displays subscribed to the table state",
+                       function=lambda: len(poker_game.state_publisher.subscribers) if poker_game.state_publisher else 0)
+        metrics_server = MetricsServer(REGISTRY, 'localhost', args.metrics_port)
+        print(f"Serving metrics on http://localhost:{args.metrics_port}/metrics")
+    if args.state_port is not None:
+        poker_game.state_publisher = StatePublisher(reactor, 'localhost', args.state_port)
+        print(f"Broadcasting table state on localhost:{args.state_port}")
+    
+    # Start the recorded session once the game is up
+    if replay_arduino is not None:
+        replay = ReplaySource(args.replay, args.replay_speed or None)
+        threading.Thread(target=replay_arduino.replay, args=(replay,), daemon=True).start()
     
     try:
         poker_game.run()
     except KeyboardInterrupt:
-        if conn:
-            conn.close()
-        server_socket.close()
+        for source in detection_sources:
+            source.close()
         signal_receiver.disconnect()
         pygame.quit()
         sys.exit()
     finally:
-        if conn:
-            conn.close()
-        server_socket.close()
+        for source in detection_sources:
+            source.close()
+        if poker_game.state_publisher is not None:
+            poker_game.state_publisher.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        if args.trace:
+            TRACER.dump(args.trace)
+        # Closes the traffic recording too
+        if signal_receiver.running:
+            signal_receiver.disconnect()
+        if args.latency_dump:
+            poker_game.latency.dump(args.latency_dump)
         
 
 if __name__ == "__main__":
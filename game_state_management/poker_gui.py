@@ -34,14 +34,14 @@ TABLE_WIDTH = 900  # Increased size
 TABLE_HEIGHT = 600  # Increased size
 
 class PokerGameGUI:
-    def __init__(self, n_players=4, small_blind=5, initial_pot=1000):
+    def __init__(self, n_players=4, small_blind=5, initial_pot=1000, variant='holdem'):
         # Set up the screen
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Poker Table Monitor")
         self.clock = pygame.time.Clock()
         
         # Create the game logic
-        self.game = Game(n_players, small_blind, initial_pot)
+        self.game = Game(n_players, small_blind, initial_pot, variant)
         
         # Load resources
         self.load_assets()
@@ -168,6 +168,8 @@ class PokerGameGUI:
                     sys.exit()
                 elif event.key == K_SPACE and self.current_phase == "setup":
                     self.start_game()
+                else:
+                    self.handle_key(event.key)
             
             if self.waiting_for_action and self.active_player == self.game.current_player:
 
@@ -197,6 +199,10 @@ class PokerGameGUI:
                     relative_pos = mouse_x - self.slider_rect.left
                     self.slider_value = int(self.slider_min + (relative_pos / slider_range) * (self.slider_max - self.slider_min))
     
+    def handle_key(self, key):
+        """Handle a key press not used by the table (for subclasses)."""
+        pass
+    
     def handle_player_action(self, action):
         if action == "fold":
             self.game.active_players.discard(self.active_player)
@@ -384,19 +390,19 @@ class PokerGameGUI:
             
             # Draw player's cards - always face down except during showdown
             if hasattr(self.game, 'hands') and i in self.game.hands:
-                # Calculate positions for the two cards
-                card1_x = x - CARD_WIDTH - 5
-                card2_x = x + 5
+                # Calculate positions for the hole cards (2 or 4 depending on the variant)
+                n_cards = len(self.game.hands[i])
+                card_start_x = x - (n_cards * (CARD_WIDTH + 10) - 10) // 2
                 card_y = y - CARD_HEIGHT - 20
                 
                 # Only show cards face-up during showdown, otherwise face down for all except active player
-                if self.current_phase == "showdown":
-                    for j, card in enumerate(self.game.hands[i]):
-                        self.draw_card(card, card1_x if j == 0 else card2_x, card_y)
-                else:
-                    # Face down for all players
-                    self.screen.blit(self.card_back, (card1_x, card_y))
-                    self.screen.blit(self.card_back, (card2_x, card_y))
+                for j, card in enumerate(self.game.hands[i]):
+                    card_x = card_start_x + j * (CARD_WIDTH + 10)
+                    if self.current_phase == "showdown":
+                        self.draw_card(card, card_x, card_y)
+                    else:
+                        # Face down for all players
+                        self.screen.blit(self.card_back, (card_x, card_y))
         
         # Draw action buttons if waiting for player action
         if self.waiting_for_action and self.active_player == 0:  # Only draw buttons for human player
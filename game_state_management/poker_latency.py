@@ -0,0 +1,81 @@
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+# Stages an Arduino event passes through, in order:
+#   rx       : serial bytes read by the reader thread
+#   queued   : put on the receiver's event queue
+#   dequeued : taken off the queue by the game
+#   handled  : game action done
+#   rendered : first frame showing the result flipped to the screen
+STAGES = ('rx', 'queued', 'dequeued', 'handled', 'rendered')
+
+
+def stamp(event, stage):
+    """Record the monotonic time an event reached a stage."""
+    event.setdefault('stamps', {})[stage] = time.monotonic()
+
+
+class LatencyMonitor:
+    """Rolling latency percentiles between the stages of stamped events.
+
+    Each event adds one sample per stage transition ('rx->queued', ...),
+    a 'total' from its first to its last stage and, for events carrying
+    firmware millis ('fw_ms'), a 'firmware->rx' delay relative to the
+    fastest one seen (the two clocks are not synchronised).
+    """
+    # int window : samples kept per stage transition
+    def __init__(self, window=1000):
+        self.window = window
+        self.samples = {}
+
+        # Smallest host-minus-firmware clock difference seen (ms)
+        self._fw_offset = None
+
+    def add(self, name, value_ms):
+        """Add a latency sample (ms) under a name."""
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.window)
+        self.samples[name].append(value_ms)
+
+    def record(self, event):
+        """Add the stage latencies of an event."""
+        stamps = event.get('stamps')
+        if not stamps:
+            return
+        reached = [stage for stage in STAGES if stage in stamps]
+        for previous, stage in zip(reached, reached[1:]):
+            self.add(f"{previous}->{stage}", (stamps[stage] - stamps[previous]) * 1000)
+        if len(reached) > 1:
+            self.add('total', (stamps[reached[-1]] - stamps[reached[0]]) * 1000)
+
+        if 'fw_ms' in event and 'rx' in stamps:
+            offset = stamps['rx'] * 1000 - event['fw_ms']
+            if self._fw_offset is None or offset < self._fw_offset:
+                self._fw_offset = offset
+            self.add('firmware->rx', offset - self._fw_offset)
+
+    def percentiles(self):
+        """Dict of stage transition -> (p50, p95, p99, samples), in ms."""
+        result = {}
+        for name, samples in self.samples.items():
+            p50, p95, p99 = np.percentile(np.fromiter(samples, dtype=float), [50, 95, 99])
+            result[name] = (p50, p95, p99, len(samples))
+        return result
+
+    def report(self):
+        """Text lines summarising every stage transition."""
+        lines = [f"{'stage':<20}{'p50':>9}{'p95':>9}{'p99':>9}{'n':>7}  (ms)"]
+        for name, (p50, p95, p99, count) in self.percentiles().items():
+            lines.append(f"{name:<20}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}{count:>7}")
+        return lines
+
+    def dump(self, path=None):
+        """Print the report, and write the raw samples as JSON if a path is given."""
+        print("\n".join(self.report()))
+        if path:
+            with open(path, 'w') as f:
+                json.dump({name: list(samples) for name, samples in self.samples.items()}, f)
+            print(f"Latency samples written to {path}")
@@ -1,4 +1,8 @@
-from poker_signal_receiver import PokerSignalReceiver
+import numpy as np
+
+from poker_dispenser import DispenserChannel, PHASE_COMMANDS
+from poker_evaluator import get_variant, best_scores, card_ids, deck_ids, category_name
+from poker_settlement import settle_pots
 
 class Card:
     def __init__(self, suit, rank):
@@ -187,10 +191,7 @@ def check_straight(hand):
             # Return the highest card in the straight
             return Score('straight', higher=i+1 if i < 13 else 1)
     
-    # Check A-5 straight specifically
-    if mapping[0] and mapping[1] and mapping[2] and mapping[3] and mapping[12]:
-        return Score('straight', higher=5)  # 5-high straight
-        
+    # A-5 straight is covered by i == 4 (Ace at index 0)
     return None
 
 # hand is a list of Card objects
@@ -261,7 +262,8 @@ class Game:
     # int n : number of player
     # int blind_pot_size : fixed small blind amount
     # int initial_pot_size : initial amount of money distributed to each player
-    def __init__(self, n, blind_pot_size, initial_pot_size): 
+    # str variant : 'holdem', 'omaha' or 'short_deck'
+    def __init__(self, n, blind_pot_size, initial_pot_size, variant='holdem'): 
         # Small blind size
         self.sb = blind_pot_size 
         
@@ -285,6 +287,16 @@ class Game:
         
         # Game phase (preflop, flop, turn, river, showdown)
         self.phase = "setup"
+        
+        # Poker variant (hole cards, deck and hand rankings)
+        self.variant = get_variant(variant)
+        
+        # Card dispenser Arduino, connected on the first game
+        self.dispenser_port = '/dev/ttyACM0'
+        self.dispenser = None
+        
+        # Future of the last deal sent to the dispenser
+        self.deal_future = None
     
     def start_game(self):
         # Table for each player's current bet in this round
@@ -303,10 +315,12 @@ class Game:
         # Track players who have acted in this round
         self.players_acted = set()
         
-        # Hands of each player (7 cards = 2 hole cards + 5 community)
+        # Hole cards of each player (best 5 are chosen with the community cards)
         self.hands = {i: [] for i in range(self.n)}
         
-        self.dispenser = PokerSignalReceiver(port='/dev/ttyACM0', baud_rate=9600)
+        # Card dispenser (read by the same serial thread as the sensors)
+        if self.dispenser is None:
+            self.dispenser = DispenserChannel(port=self.dispenser_port, baud_rate=9600)
         
         # Community cards
         self.community = []
@@ -326,47 +340,24 @@ class Game:
         # Set the initial phase
         self.phase = "preflop"
         self.serve_phase()
-        self.phase = "flop"
-        self.serve_phase()
-        self.phase = "turn"
-        self.serve_phase()
-        self.phase = "river"
-        self.serve_phase()
         
     def serve_phase(self):
-        """Serve the current phase of the game."""
-        if self.phase == "preflop":
-            # Handle preflop actions
-            self.dispenser.send_command("P0\n")
-            self.dispenser._read_serial_thread()
-            
-            
-            
-        elif self.phase == "flop":
-            # Handle flop actions
-            self.dispenser.send_command("P1\n")
-            self.dispenser._read_serial_thread()
-            
-        elif self.phase == "turn":
-            # Handle turn actions
-            self.dispenser.send_command("P2\n")
-            self.dispenser._read_serial_thread()
-            
-            
-        elif self.phase == "river":
-            # Handle river actions
-            self.dispenser.send_command("P2\n")
-            self.dispenser._read_serial_thread()
-            
-        elif self.phase == "showdown":
-            # Handle showdown actions
-            pass
+        """Ask the dispenser to deal the current phase.
+        
+        Returns at once with a future resolved when the dispenser acks the
+        deal (None if the phase deals no cards), so the game thread never
+        waits for the machine.
+        """
+        if self.dispenser is None or self.phase not in PHASE_COMMANDS:
+            return None
+        self.deal_future = self.dispenser.deal(self.phase)
+        return self.deal_future
     
     def deal_hole_cards(self):
         # This function will be called by the Pygame implementation
         # Create a deck of cards
         suits = ['H', 'D', 'S', 'C']
-        ranks = list(range(1, 14))  # 1=Ace, 2-10, 11=Jack, 12=Queen, 13=King
+        ranks = self.variant.ranks  # 1=Ace, 2-10, 11=Jack, 12=Queen, 13=King
         
         deck = []
         for suit in suits:
@@ -377,9 +368,9 @@ class Game:
         import random
         random.shuffle(deck)
         
-        # Deal 2 cards to each player
+        # Deal the variant's hole cards to each player
         for player in range(self.n):
-            self.hands[player] = [deck.pop(), deck.pop()]
+            self.hands[player] = [deck.pop() for _ in range(self.variant.hole_cards)]
             
         # Set aside 5 cards for the community cards
         self.community_deck = [deck.pop() for _ in range(5)]
@@ -420,57 +411,68 @@ class Game:
             # Reset for the next hand
             self.phase = "setup"
         
+        # Deal the new phase's cards (queued behind any deal still running)
+        self.serve_phase()
+        
         # Reset betting for the new phase
         self.current_bet = 0
         self.players_acted = set()
         self.current_player = self.x  # Start with small blind player
     
-    def decide_winner(self):
+    def draw_runouts(self, runs, rng=None):
+        """Complete the community cards `runs` times from the undealt cards.
+        
+        Runouts are disjoint while the stub has enough cards; beyond that each
+        runout is drawn independently (equity chop). Returns card ids of shape (runs, 5).
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        dealt = [card for hand in self.hands.values() for card in hand] + self.community
+        stub = np.setdiff1d(deck_ids(self.variant), card_ids(dealt))
+        need = 5 - len(self.community)
+        
+        if runs * need <= len(stub):
+            drawn = rng.permutation(stub)[:runs * need].reshape(runs, need)
+        else:
+            drawn = stub[rng.random((runs, len(stub))).argsort(axis=1)[:, :need]]
+        
+        board = np.broadcast_to(card_ids(self.community), (runs, len(self.community)))
+        return np.concatenate([board, drawn], axis=1)
+    
+    # int runs : number of times to deal the remaining community cards
+    def decide_winner(self, runs=1, rng=None):
         # Identify who is still playing
         playing = list(self.active_players)
             
         if not playing:
             return None
         
-        best_score = -1
-        best_player = []
-        player_hands = {}
-        
-        # Get score for each player's hand
-        for player in playing:
-            # Combine player's hole cards with community cards
-            full_hand = self.hands[player] + self.community
-            
-            # Evaluate the hand
-            hand_result = evaluate_hand(full_hand)
-            
-            # Store the result
-            player_hands[player] = hand_result
-            
-            if hand_result:
-                cur_score = hand_result.get_score()
-                
-                if cur_score > best_score:
-                    best_score = cur_score
-                    best_player = [player]
-                elif cur_score == best_score:
-                    best_player.append(player)
-        
-        # Calculate total pot
-        total_pot = sum(self.game_pot.values())
-        
-        # Determine result
-        if len(best_player) == 1:
-            # Single winner
-            winner = best_player[0]
-            self.pots[winner] += total_pot
-            return {"winners": [winner], "amount": total_pot, "hand": player_hands[winner].category}
+        # Run it N times: deal the remaining board once per runout
+        if runs > 1 and len(self.community) < 5:
+            boards = self.draw_runouts(runs, rng)
         else:
-            # Tie: distribute to all winners
-            split_amount = total_pot // len(best_player)
-            remainder = total_pot % len(best_player)
-            
-            for winner in best_player:
-                self.pots[winner] += split_amount
-            
-            return {"winners": best_player, "amount": split_amount, "hand": player_hands[best_player[0]].category, "remainder": remainder}
\ No newline at end of file
+            runs = 1
+            boards = card_ids(self.community)[None]
+        
+        # Evaluate every player on every board in one batch, shape (runs, players)
+        hole_ids = np.array([card_ids(self.hands[player]) for player in playing])
+        playing_scores = best_scores(hole_ids, boards, self.variant)
+        
+        # Settle the main pot and side pots from each player's contribution
+        scores = np.zeros((runs, self.n), dtype=np.int64)
+        scores[:, playing] = playing_scores
+        contributions = [self.game_pot[player] for player in range(self.n)]
+        active = [player in self.active_players for player in range(self.n)]
+        awards, remainder = settle_pots(contributions, scores, active)
+        
+        for player in range(self.n):
+            self.pots[player] += int(awards[player])
+        
+        hands = [category_name(score, self.variant) for score in playing_scores.max(axis=1)]
+        result = {"winners": [player for player in range(self.n) if awards[player] > 0],
+                  "amounts": {player: int(awards[player]) for player in range(self.n) if awards[player] > 0},
+                  "hand": hands[0],
+                  "remainder": int(remainder)}
+        if runs > 1:
+            result["runs"] = runs
+            result["hands"] = hands
+        return result
\ No newline at end of file
@@ -0,0 +1,212 @@
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Metrics in the Prometheus text exposition format, served over HTTP.
+#
+# Counters and histograms are updated from hot paths (every frame, every
+# event) without locks: each thread updates its own cell and only a scrape
+# adds the cells up. Gauges are read by a function at scrape time, so
+# the measured code does nothing at all.
+
+# Default histogram buckets (seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+               for _, value in items)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """A metric with per-thread cells, summed when scraped."""
+    kind = None
+
+    def __init__(self, name, help_text="", labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = dict(labels or {})
+        self._local = threading.local()
+        # Every thread's cell (list.append is atomic)
+        self._cells = []
+
+    def _cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = self._new_cell()
+            self._cells.append(cell)
+            return cell
+
+    def _new_cell(self):
+        return [0]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (events handled, reconnects, ...)."""
+    kind = "counter"
+
+    def inc(self, amount=1):
+        self._cell()[0] += amount
+
+    @property
+    def value(self):
+        return sum(cell[0] for cell in list(self._cells))
+
+    def samples(self):
+        yield self.name, {}, self.value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, read from `function` at scrape time or set()."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text="", labels=None, function=None):
+        super().__init__(name, help_text, labels)
+        self.function = function
+        self._value = 0
+
+    def set(self, value):
+        # A plain assignment; the last writer wins
+        self._value = value
+
+    @property
+    def value(self):
+        if self.function is not None:
+            try:
+                return self.function()
+            except Exception:
+                return math.nan
+        return self._value
+
+    def samples(self):
+        yield self.name, {}, self.value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies in seconds) over fixed buckets."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text="", labels=None, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labels)
+
+    def _new_cell(self):
+        # Per bucket counts (the last one beyond every bound), then the sum
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, value):
+        cell = self._cell()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    @property
+    def count(self):
+        return sum(sum(cell[:-1]) for cell in list(self._cells))
+
+    def samples(self):
+        cells = list(self._cells)
+        counts = [sum(cell[i] for cell in cells) for i in range(len(self.buckets) + 1)]
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            yield f"{self.name}_bucket", {"le": _format_value(float(bound))}, cumulative
+        yield f"{self.name}_sum", {}, sum(cell[-1] for cell in cells)
+        yield f"{self.name}_count", {}, cumulative
+
+
+class MetricsRegistry:
+    """The metrics of one process, by name and labels."""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = cls(name, help_text, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already a {metric.kind}")
+        return metric
+
+    def counter(self, name, help_text="", labels=None):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text="", labels=None, function=None):
+        gauge = self._get(Gauge, name, help_text, labels)
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name, help_text="", labels=None, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        """All metrics in the text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        families = {}
+        for metric in metrics:
+            families.setdefault(metric.name, []).append(metric)
+
+        lines = []
+        for name, family in families.items():
+            lines.append(f"# HELP {name} {family[0].help}")
+            lines.append(f"# TYPE {name} {family[0].kind}")
+            for metric in family:
+                for sample, extra, value in metric.samples():
+                    lines.append(f"{sample}{_format_labels(metric.labels, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Registry of this process
+REGISTRY = MetricsRegistry()
+
+
+class MetricsServer:
+    """Serves a registry at http://host:port/metrics from a background thread."""
+    def __init__(self, registry=REGISTRY, host='localhost', port=9100):
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split('?')[0] not in ('/metrics', '/'):
+                    handler.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                handler.send_response(200)
+                handler.send_header("Content-Type", CONTENT_TYPE)
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                # Scrapes every few seconds would flood the console
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,138 @@
+import heapq
+import itertools
+import selectors
+import socket
+import threading
+import time
+
+
+class Reactor:
+    """Single-threaded I/O loop dispatching readiness callbacks (selectors/epoll).
+
+    Sockets and other file objects are registered with a callback run when
+    they become readable. Other threads (e.g. the serial reader) hand work
+    to the loop with schedule(), which wakes a blocked run_once() at once,
+    and call_at() runs work on the loop at a given time.
+    """
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+
+        # Self-pipe waking select() when work is scheduled from another thread
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self.selector.register(self._wake_reader, selectors.EVENT_READ, (self._drain_wakeup, None))
+
+        # Callbacks waiting to run on the loop (each at most once per wakeup)
+        self._scheduled = {}
+        self._lock = threading.Lock()
+
+        # Timers: heap of (deadline, sequence, callback)
+        self._timers = []
+        self._timer_sequence = itertools.count()
+
+        # Callbacks dispatched so far
+        self.dispatched = 0
+
+    def register(self, fileobj, callback):
+        """Run callback(fileobj) on the loop whenever fileobj is readable."""
+        self.selector.register(fileobj, selectors.EVENT_READ, (callback, None))
+
+    def set_writer(self, fileobj, callback):
+        """Also run callback(fileobj) whenever the registered fileobj is
+        writable, e.g. to flush buffered output; None stops it."""
+        reader, _ = self.selector.get_key(fileobj).data
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if callback is not None else 0)
+        self.selector.modify(fileobj, events, (reader, callback))
+
+    def unregister(self, fileobj):
+        try:
+            self.selector.unregister(fileobj)
+        except (KeyError, ValueError):
+            pass
+
+    def _registered(self, fileobj):
+        try:
+            self.selector.get_key(fileobj)
+        except (KeyError, ValueError):
+            return False
+        return True
+
+    def schedule(self, callback):
+        """Have the loop run callback() soon; thread-safe.
+
+        Scheduling a callback that is already waiting to run does nothing,
+        so a burst of notifications costs one call.
+        """
+        with self._lock:
+            if callback in self._scheduled:
+                return
+            wake = not self._scheduled
+            self._scheduled[callback] = None
+        if wake:
+            try:
+                self._wake_writer.send(b"\0")
+            except (BlockingIOError, OSError):
+                # Already woken (the buffer is full) or closed
+                pass
+
+    def call_at(self, deadline, callback):
+        """Have the loop run callback() once time.monotonic() reaches deadline.
+
+        Only call this from the loop's thread (use schedule() from others).
+        """
+        heapq.heappush(self._timers, (deadline, next(self._timer_sequence), callback))
+
+    def _drain_wakeup(self, reader):
+        try:
+            while reader.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def run_once(self, timeout=None):
+        """Wait up to timeout seconds (forever if None) for I/O or scheduled
+        work and dispatch it. Returns the number of callbacks run."""
+        count = 0
+        if self._scheduled:
+            timeout = 0
+        elif self._timers:
+            # Wake for the next timer
+            wait = max(0.0, self._timers[0][0] - time.monotonic())
+            timeout = wait if timeout is None else min(timeout, wait)
+        for key, events in self.selector.select(timeout):
+            reader, writer = key.data
+            if events & selectors.EVENT_WRITE and writer is not None:
+                writer(key.fileobj)
+                count += 1
+                if not self._registered(key.fileobj):
+                    # The writer closed it
+                    continue
+            if events & selectors.EVENT_READ:
+                reader(key.fileobj)
+                count += 1
+        with self._lock:
+            scheduled, self._scheduled = self._scheduled, {}
+        for callback in scheduled:
+            callback()
+            count += 1
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            _, _, callback = heapq.heappop(self._timers)
+            callback()
+            count += 1
+        self.dispatched += count
+        return count
+
+    def run_until(self, deadline):
+        """Dispatch I/O until the monotonic deadline passes."""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self.run_once(remaining)
+
+    def close(self):
+        self.selector.close()
+        self._wake_reader.close()
+        self._wake_writer.close()
@@ -0,0 +1,133 @@
+import numpy as np
+
+from poker_serial_codec import EVENT_CODES, EVENT_NAMES
+from poker_signal_filter import WeightFilter
+
+# Fill values of sensors without an event yet and of sensors not wired to a seat
+NO_EVENT = 0
+NO_SEAT = -1
+
+
+def parse_seat_map(text):
+    """Parse a "sensor:seat,..." mapping (e.g. "1:1,2:2,5:1") into a dict."""
+    seats = {}
+    for pair in text.split(","):
+        sensor, _, seat = pair.strip().partition(":")
+        seats[int(sensor)] = int(seat)
+    return seats
+
+
+class SensorState:
+    """Preallocated per-sensor state of the table's load cells.
+
+    Arrays are indexed directly by sensor number (1..num_sensors, index 0 is
+    unused): current raw weight, filtered weight (nan before the first
+    reading), last event code (NO_EVENT before the first event) and the
+    monotonic time of the last reading or event. `seat` maps each sensor to
+    its seat (NO_SEAT if unwired), so several sensors may share a seat and
+    sensors of several tables can live in one store.
+    """
+    # int num_sensors : number of sensors wired to the board(s)
+    # dict seats : sensor -> seat, every sensor to the seat of its number when None
+    def __init__(self, num_sensors=4, seats=None):
+        self.num_sensors = num_sensors
+        size = num_sensors + 1
+
+        self.weight = np.zeros(size)
+        self.filtered = np.full(size, np.nan)
+        self.last_event = np.full(size, NO_EVENT, dtype=np.int16)
+        self.last_time = np.full(size, np.nan)
+
+        self.seat = np.full(size, NO_SEAT, dtype=np.int32)
+        if seats is None:
+            self.seat[1:] = np.arange(1, size)
+        else:
+            self.assign_seats(seats)
+
+        # Per-sensor weight filters, a reading is only reported once it settles
+        self.filters = [WeightFilter() for _ in range(size)]
+
+    def assign_seats(self, seats):
+        """Wire sensors to seats from a sensor -> seat dict."""
+        for sensor, seat in seats.items():
+            self._check(sensor)
+            self.seat[sensor] = seat
+
+    def _check(self, sensor):
+        if not 1 <= sensor <= self.num_sensors:
+            raise IndexError(f"Sensor {sensor} out of range 1-{self.num_sensors}")
+
+    def valid(self, sensors):
+        """Boolean mask of the sensor numbers that exist."""
+        return (sensors >= 1) & (sensors <= self.num_sensors)
+
+    def seat_of(self, sensor):
+        """Seat of a sensor, None if it is out of range or not wired to one."""
+        if not 1 <= sensor <= self.num_sensors:
+            return None
+        seat = self.seat[sensor]
+        return None if seat == NO_SEAT else int(seat)
+
+    def update_weight(self, sensor, weight, time=None):
+        """Store a raw reading; return the settled weight if it should be reported."""
+        self._check(sensor)
+        self.weight[sensor] = weight
+        if time is not None:
+            self.last_time[sensor] = time
+        weight_filter = self.filters[sensor]
+        settled = weight_filter.update(weight)
+        self.filtered[sensor] = weight_filter.value
+        return settled
+
+    def update_weights(self, sensors, weights, time=None):
+        """Store a batch of raw readings (arrays of sensor numbers and weights,
+        in arrival order) and return the (sensor, settled weight) pairs to report.
+
+        Readings of unknown sensors are ignored.
+        """
+        sensors = np.asarray(sensors)
+        weights = np.asarray(weights, dtype=float)
+        valid = self.valid(sensors)
+        sensors, weights = sensors[valid], weights[valid]
+
+        # Latest reading per sensor (the last of repeated indices is the one assigned)
+        self.weight[sensors] = weights
+        if time is not None:
+            self.last_time[sensors] = time
+
+        # The settle detector is sequential per sensor, so readings still go through it in order
+        settled = []
+        for sensor, weight in zip(sensors.tolist(), weights.tolist()):
+            value = self.filters[sensor].update(weight)
+            if value is not None:
+                settled.append((sensor, value))
+        self.filtered[sensors] = [self.filters[sensor].value for sensor in sensors.tolist()]
+        return settled
+
+    def update_event(self, sensor, event_type, time=None):
+        """Store the last event of a sensor."""
+        self._check(sensor)
+        self.last_event[sensor] = EVENT_CODES.get(event_type, NO_EVENT)
+        if time is not None:
+            self.last_time[sensor] = time
+
+    def update_events(self, sensors, codes, time=None):
+        """Store a batch of event codes (arrays in arrival order), ignoring unknown sensors.
+
+        Unknown codes are stored as NO_EVENT, like unknown names in update_event().
+        """
+        sensors = np.asarray(sensors)
+        codes = np.asarray(codes)
+        valid = self.valid(sensors)
+        codes = np.where(np.isin(codes, list(EVENT_NAMES)), codes, NO_EVENT)
+        self.last_event[sensors[valid]] = codes[valid]
+        if time is not None:
+            self.last_time[sensors[valid]] = time
+
+    def last_event_name(self, sensor):
+        """Name of a sensor's last event, None if it has had none."""
+        return EVENT_NAMES.get(int(self.last_event[sensor]))
+
+    def last_events(self):
+        """Dict of sensor -> name of its last event (None if none)."""
+        return {sensor: self.last_event_name(sensor) for sensor in range(1, self.num_sensors + 1)}
@@ -0,0 +1,147 @@
+import struct
+
+import numpy as np
+
+# Binary telemetry frame (little-endian, 10 bytes):
+#   sync (0xA5) | type | sensor | value (int32) | sequence (uint16) | CRC-8
+# value is grams * 100 for WEIGHT frames and a code for EVENT/STATUS frames.
+# The CRC (polynomial 0x07) covers type through sequence.
+SYNC = 0xA5
+FRAME = struct.Struct('<BBBiHB')
+FRAME_SIZE = FRAME.size
+FRAME_DTYPE = np.dtype([('sync', 'u1'), ('type', 'u1'), ('sensor', 'u1'),
+                        ('value', '<i4'), ('seq', '<u2'), ('crc', 'u1')])
+
+FRAME_WEIGHT = 1
+FRAME_EVENT = 2
+FRAME_STATUS = 3
+
+# Fixed-point scale of WEIGHT values
+WEIGHT_SCALE = 100
+
+EVENT_CODES = {'TAP_START': 1, 'SINGLE_TAP': 2, 'DOUBLE_TAP': 3, 'HOLD': 4, 'HOLDING': 5}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+STATUS_CODES = {'OK': 1, 'READY': 2, 'TARE_STARTED': 3, 'TARE_ALL_STARTED': 4, 'TARE_COMPLETE': 5,
+                'INTERVAL_SET': 6, 'DEADBAND_SET': 7, 'BAUD_SET': 8}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# Telemetry settings commands of FSR_reader.ino, each confirmed with the STATUS above:
+#   INTERVAL:ms              weight print interval
+#   DEADBAND:grams           only send weights that moved more than this (all sensors)
+#   DEADBAND:sensor:grams    the same for one sensor
+#   BAUD:rate                switch to a faster baud rate once BAUD_SET is sent
+INTERVAL_COMMAND = "INTERVAL"
+DEADBAND_COMMAND = "DEADBAND"
+BAUD_COMMAND = "BAUD"
+BAUD_RATES = (9600, 19200, 38400, 57600, 115200, 230400, 250000, 500000, 1000000)
+
+# Command that switches FSR_reader.ino to binary frames, and its text reply
+BINARY_COMMAND = "MODE:BINARY"
+BINARY_REPLY = "MODE:BINARY"
+
+
+def _crc8_table():
+    table = np.zeros(256, dtype=np.uint8)
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[byte] = crc
+    return table
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    """CRC-8 (polynomial 0x07) of a bytes-like object."""
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return int(crc)
+
+
+def encode_frame(frame_type, sensor, value, seq):
+    """Encode one frame (the same bytes FSR_reader.ino sends)."""
+    body = FRAME.pack(SYNC, frame_type, sensor, value, seq & 0xFFFF, 0)[1:-1]
+    return bytes([SYNC]) + body + bytes([crc8(body)])
+
+
+class FrameDecoder:
+    """Incremental decoder for a stream of binary frames.
+
+    Whole runs of aligned frames are validated at once with NumPy; on a bad
+    sync byte or CRC the decoder skips a byte and resynchronises.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._last_seq = None
+
+        # Frames missing from the sequence and bytes discarded while resyncing
+        self.dropped = 0
+        self.discarded = 0
+
+    def reset(self):
+        self._buffer.clear()
+        self._last_seq = None
+
+    def feed(self, data):
+        """Add received bytes and return the complete, valid frames as a FRAME_DTYPE array."""
+        buffer = self._buffer
+        buffer += data
+        decoded = []
+        pos = 0
+
+        while True:
+            start = buffer.find(SYNC, pos)
+            if start < 0:
+                self.discarded += len(buffer) - pos
+                pos = len(buffer)
+                break
+            self.discarded += start - pos
+
+            count = (len(buffer) - start) // FRAME_SIZE
+            if count == 0:
+                pos = start
+                break
+
+            chunk = bytes(buffer[start:start + count * FRAME_SIZE])
+            frames = np.frombuffer(chunk, dtype=FRAME_DTYPE)
+            raw = np.frombuffer(chunk, dtype=np.uint8).reshape(count, FRAME_SIZE)
+
+            # CRC of every frame at once, one byte column at a time
+            crc = np.zeros(count, dtype=np.uint8)
+            for column in range(1, FRAME_SIZE - 1):
+                crc = CRC8_TABLE[crc ^ raw[:, column]]
+            valid = (frames['sync'] == SYNC) & (crc == frames['crc'])
+
+            if valid.all():
+                decoded.append(frames)
+                pos = start + count * FRAME_SIZE
+                continue
+
+            # Keep the frames before the first bad one, then resync one byte later
+            bad = int(np.argmin(valid))
+            decoded.append(frames[:bad])
+            pos = start + bad * FRAME_SIZE + 1
+            self.discarded += 1
+
+        del buffer[:pos]
+
+        if not decoded:
+            return np.zeros(0, dtype=FRAME_DTYPE)
+        frames = np.concatenate(decoded)
+        self._count_dropped(frames['seq'])
+        return frames
+
+    def _count_dropped(self, seq):
+        if len(seq) == 0:
+            return
+        seq = seq.astype(np.int64)
+        if self._last_seq is not None:
+            seq = np.concatenate([[self._last_seq], seq])
+        # Sequence numbers wrap at 2^16
+        gaps = (np.diff(seq) - 1) % 65536
+        self.dropped += int(gaps.sum())
+        self._last_seq = int(seq[-1])
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+
+from serial.tools import list_ports
+
+from poker_signal_receiver import AsyncPokerSignalReceiver
+
+
+def candidate_ports():
+    """Serial ports of USB devices (where the Arduinos show up)."""
+    return [port.device for port in list_ports.comports() if port.vid is not None]
+
+
+def port_for_role(roles, role, default=None):
+    """The first port in a detect() result with the given role."""
+    return next((port for port, port_role in roles.items() if port_role == role), default)
+
+
+class SerialManager:
+    """Owns any number of serial devices and reads all of them from one thread.
+
+    Every device is an AsyncPokerSignalReceiver on the manager's event loop,
+    whose selector waits on all the ports at once, so adding devices adds
+    neither threads nor polling. Events of devices without their own
+    `on_event` callback are routed to the handlers registered for the
+    device's role.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    # float ready_timeout : longest wait for each board to report ready after its port is opened (s)
+    def __init__(self, ready_timeout=3):
+        self.loop = asyncio.new_event_loop()
+        self.devices = []
+        self.ready_timeout = ready_timeout
+
+        # Role -> callbacks taking (device, event)
+        self.handlers = {}
+        self._tasks = {}
+
+        self.thread = threading.Thread(target=self._run_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    @classmethod
+    def shared(cls):
+        """The process-wide manager used by PokerSignalReceiver by default."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def call(self, coro, timeout=None):
+        """Run a coroutine on the manager's loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def device(self, port=None, role=None):
+        """The managed device on a port or with a role, or None."""
+        for device in self.devices:
+            if (port is None or device.port == port) and (role is None or device.role == role):
+                return device
+        return None
+
+    def add_device(self, port, baud_rate=None, role=None, on_event=None, binary=None, sensors=None,
+                   fast_baud=None):
+        """Add a device, which the reader thread connects and keeps connected.
+
+        Returns at once; connection state changes arrive as CONNECTION events.
+        `baud_rate`, `binary` and `fast_baud` default to 9600 baud, text framing
+        and no faster link.
+
+        A port that is already managed is not opened twice: the existing
+        device is returned, taking over `on_event`, `role` and `sensors` when
+        given, and switched to the given link settings (see
+        AsyncPokerSignalReceiver.reconfigure) on its live connection.
+        """
+        device = self.device(port)
+        if device is not None:
+            if on_event is not None:
+                device.on_event = on_event
+            if role is not None:
+                device.role = role
+            if sensors is not None:
+                device.sensors = sensors
+            if (baud_rate, binary, fast_baud) != (None, None, None):
+                asyncio.run_coroutine_threadsafe(device.reconfigure(baud_rate, binary, fast_baud), self.loop)
+            return device
+
+        device = AsyncPokerSignalReceiver(port, baud_rate or 9600, on_event=on_event, binary=bool(binary), role=role,
+                                        sensors=sensors, fast_baud=fast_baud)
+        device.ready_timeout = self.ready_timeout
+        if on_event is None:
+            device.on_event = lambda event: self._route(device, event)
+        self.devices.append(device)
+        self.loop.call_soon_threadsafe(self._start, device)
+        return device
+
+    def _start(self, device):
+        self._tasks[device.port] = self.loop.create_task(device.run())
+
+    async def _stop(self, device):
+        await device.close()
+        task = self._tasks.pop(device.port, None)
+        if task is not None:
+            await task
+
+    def remove_device(self, device):
+        """Disconnect a device and stop managing it."""
+        self.call(self._stop(device))
+        if device in self.devices:
+            self.devices.remove(device)
+
+    def on(self, role, handler):
+        """Register handler(device, event) for events from devices with a role."""
+        self.handlers.setdefault(role, []).append(handler)
+
+    def _route(self, device, event):
+        for handler in self.handlers.get(device.role, []):
+            handler(device, event)
+
+    def detect(self, ports=None, baud_rate=9600, timeout=5.0):
+        """Connect to the candidate ports and identify each device by handshake.
+
+        Each port is sent the ID command once connected; devices that do not
+        answer are identified from the first messages they send. Ports still
+        unknown after `timeout` seconds (including connecting) are closed again.
+        Returns a dict of port -> role for the identified devices.
+        """
+        return self.detect_async(ports, baud_rate, timeout).result()
+
+    def detect_async(self, ports=None, baud_rate=9600, timeout=5.0, on_role=None):
+        """Start detect() in the background and return at once.
+
+        Returns a concurrent.futures.Future of detect()'s result.
+        on_role(port, role) is called from the reader thread as soon as each
+        device is identified, so its role can be bound before the rest are.
+        """
+        if ports is None:
+            ports = candidate_ports()
+        devices = [self.add_device(port, baud_rate) for port in ports]
+        return asyncio.run_coroutine_threadsafe(self._detect(devices, timeout, on_role), self.loop)
+
+    async def _detect(self, devices, timeout, on_role):
+        await self._identify(devices, timeout, on_role)
+        roles = {}
+        for device in devices:
+            if device.role is None:
+                await self._stop(device)
+                if device in self.devices:
+                    self.devices.remove(device)
+            else:
+                roles[device.port] = device.role
+        return roles
+
+    async def _identify(self, devices, timeout, on_role=None):
+        # The ports connect concurrently; ask each one as soon as it is up
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        asked = set()
+        reported = set()
+        while True:
+            for device in devices:
+                if device.role is not None and device.port not in reported:
+                    reported.add(device.port)
+                    if on_role is not None:
+                        on_role(device.port, device.role)
+            if loop.time() >= deadline or all(device.role is not None for device in devices):
+                break
+            for device in devices:
+                if device.connected and device.role is None and device.port not in asked:
+                    asked.add(device.port)
+                    await device.send_command("ID")
+            await asyncio.sleep(0.05)
+
+    def close(self):
+        """Disconnect every device and stop the reader thread."""
+        for device in list(self.devices):
+            self.remove_device(device)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
@@ -0,0 +1,96 @@
+import struct
+import time
+
+# Recording file layout: MAGIC, then one record per serial read: the time since
+# the previous read (µs) and the byte count, followed by the bytes as received
+MAGIC = b"PSREC1\n"
+RECORD_HEADER = struct.Struct('<IH')
+MAX_CHUNK = 0xFFFF
+
+
+class SerialRecorder:
+    """Appends the raw bytes of every serial read, with their read times, to a file."""
+    # float flush_interval : longest time (s) recorded bytes may sit in the file buffer
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._last_time = None
+        self._last_flush = time.monotonic()
+
+        # Reads and bytes recorded so far
+        self.reads = 0
+        self.bytes = 0
+
+    def write(self, rx_time, data):
+        """Record the bytes of a read made at monotonic time rx_time."""
+        if self._file is None:
+            return
+        delay = 0 if self._last_time is None else max(0, round((rx_time - self._last_time) * 1e6))
+        self._last_time = rx_time
+        for start in range(0, len(data), MAX_CHUNK):
+            chunk = data[start:start + MAX_CHUNK]
+            self._file.write(RECORD_HEADER.pack(min(delay, 0xFFFFFFFF), len(chunk)))
+            self._file.write(chunk)
+            delay = 0
+        self.reads += 1
+        self.bytes += len(data)
+
+        if rx_time - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = rx_time
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_recording(path):
+    """Yield the (seconds since the first read, bytes) of every recorded read."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a serial recording")
+        elapsed = 0
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            delay, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                # Cut off mid-record (e.g. the game was killed)
+                return
+            elapsed += delay
+            yield elapsed / 1e6, data
+
+
+class ReplaySource:
+    """Recorded serial reads played back with their original timing.
+
+    Iterating yields the bytes of each read when it is due: in real time
+    for speed 1, N times faster for speed N, as fast as possible for speed
+    None or 0.
+    """
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+
+    def __iter__(self):
+        start = time.perf_counter()
+        for elapsed, data in read_recording(self.path):
+            if self.speed:
+                delay = start + elapsed / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield data
+
+    def feed(self, protocol):
+        """Replay straight into a SignalProtocol (from the calling thread);
+        returns the number of reads fed."""
+        reads = 0
+        for data in self:
+            protocol._feed(data)
+            reads += 1
+        return reads
@@ -0,0 +1,254 @@
+import os
+import pty
+import tty
+import time
+import random
+import threading
+from itertools import islice
+
+from poker_signal_receiver import ROLE_SENSOR, ROLE_DISPENSER
+from poker_serial_codec import (encode_frame, FRAME_WEIGHT, FRAME_EVENT, FRAME_STATUS, WEIGHT_SCALE,
+                                EVENT_CODES, STATUS_CODES, BINARY_COMMAND, BINARY_REPLY,
+                                INTERVAL_COMMAND, DEADBAND_COMMAND, BAUD_COMMAND, BAUD_RATES)
+
+# Readings FSR_reader.ino still sends after a weight moved past the deadband,
+# so the host's settle filter sees the new weight settle
+DEADBAND_TRAIL = 5
+
+# Events the receiver turns into game events (one per line, used for latency)
+TAP_EVENTS = ('SINGLE_TAP', 'DOUBLE_TAP', 'HOLD')
+
+
+def random_traffic(rng=None, tap_ratio=0.05, sensors=4):
+    """Endless FSR_reader.ino style traffic: noisy weights with chip stacks
+    placed and removed, and taps (each preceded by TAP_START) on random sensors."""
+    rng = rng or random.Random()
+    weights = [0.0] * sensors
+    while True:
+        sensor = rng.randrange(sensors)
+        if rng.random() < tap_ratio:
+            yield f"EVENT:TAP_START:{sensor + 1}"
+            yield f"EVENT:{rng.choice(TAP_EVENTS)}:{sensor + 1}"
+            continue
+        if rng.random() < 0.02:
+            weights[sensor] = rng.choice([0.0, 10.0, 25.0, 50.0, 100.0])
+        yield f"WEIGHT:{sensor + 1}:{weights[sensor] + rng.gauss(0, 0.2):.2f}"
+
+
+class VirtualArduino:
+    """Pseudo-terminal that behaves like one of the Arduinos.
+
+    ROLE_SENSOR speaks the FSR_reader.ino protocol (WEIGHT/EVENT/STATUS lines,
+    or binary frames after MODE:BINARY), ROLE_DISPENSER runs commands one at
+    a time and acks each like machine_control.ino. Open `port` like a serial
+    port; traffic is sent with send() or play().
+    """
+    # str role : ROLE_SENSOR or ROLE_DISPENSER
+    # float ack_delay : time the dispenser takes to run a command (s)
+    def __init__(self, role=ROLE_SENSOR, ack_delay=0.0):
+        self.role = role
+        self.ack_delay = ack_delay
+
+        # Dispenser: commands to ignore (as if lost on the wire) and last sequence number run
+        self.lose_commands = 0
+        self._last_seq = None
+
+        self.master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+        self.binary = False
+        self.timestamps = False
+        self._seq = 0
+
+        # Telemetry settings set by the host: weight print interval (ms), baud rate and
+        # per-sensor deadbands (g) with the last weight that moved past them and readings left to trail
+        self.print_interval = 100
+        self.baud = 9600
+        self.deadbands = {}
+        self._anchors = {}
+        self._trailing = {}
+        self.suppressed = 0
+        self._start = time.monotonic()
+        self._write_lock = threading.Lock()
+
+        # Commands received from the host and run by the dispenser, lines sent and send times of tap events
+        self.commands = []
+        self.executed = []
+        self.sent = 0
+        self.tap_times = []
+
+        self._thread = threading.Thread(target=self._serve_commands)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        os.close(self.master)
+        os.close(self._slave)
+
+    def _serve_commands(self):
+        buffer = b""
+        while True:
+            try:
+                data = os.read(self.master, 256)
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                self._handle_command(line.decode(errors='replace').strip())
+
+    def _handle_command(self, command):
+        command, _, seq = command.partition("#")
+        self.commands.append(command)
+        if command == "ID":
+            # A new host session: its sequence numbers are not retries
+            self._last_seq = None
+            self._write_text(f"ID:{self.role.upper()}")
+        elif self.role == ROLE_DISPENSER:
+            if self.lose_commands:
+                self.lose_commands -= 1
+                return
+            # A repeated sequence number is a retry: ack again without running
+            if not seq or seq != self._last_seq:
+                time.sleep(self.ack_delay)
+                self.executed.append(command)
+            if seq:
+                self._last_seq = seq
+                self._write_text(f"ack:{seq}")
+            else:
+                self._write_text("ack")
+        elif command.startswith("TARE:"):
+            self.send([f"STATUS:TARE_STARTED:{command[5:]}", f"STATUS:TARE_COMPLETE:{command[5:]}"])
+        elif command == "TARE_ALL":
+            self.send(["STATUS:TARE_ALL_STARTED"] + [f"STATUS:TARE_COMPLETE:{sensor}" for sensor in range(1, 5)])
+        elif command == "STATUS":
+            self.send(["STATUS:OK"])
+        elif command in ("TIMESTAMPS:ON", "TIMESTAMPS:OFF"):
+            self.timestamps = command == "TIMESTAMPS:ON"
+        elif command.startswith(f"{INTERVAL_COMMAND}:"):
+            self.print_interval = max(10, int(command.split(":")[1]))
+            self.send(["STATUS:INTERVAL_SET"])
+        elif command.startswith(f"{DEADBAND_COMMAND}:"):
+            parts = command.split(":")
+            if len(parts) == 2:
+                self.deadbands = {sensor: float(parts[1]) for sensor in range(1, 5)}
+                self.send(["STATUS:DEADBAND_SET"])
+            else:
+                self.deadbands[int(parts[1])] = float(parts[2])
+                self.send([f"STATUS:DEADBAND_SET:{parts[1]}"])
+        elif command.startswith(f"{BAUD_COMMAND}:"):
+            baud = int(command.split(":")[1])
+            if baud in BAUD_RATES:
+                self.send(["STATUS:BAUD_SET"])
+                self.baud = baud
+        elif command == BINARY_COMMAND:
+            # The reply is still text, everything after it is binary
+            with self._write_lock:
+                self._write(f"STATUS:{BINARY_REPLY}\r\n".encode())
+                self.binary = True
+
+    def _write(self, data):
+        view = memoryview(data)
+        while view:
+            written = os.write(self.master, view)
+            view = view[written:]
+
+    def _write_text(self, line):
+        with self._write_lock:
+            self._write(f"{line}\r\n".encode())
+
+    def _encode(self, message):
+        # Binary frame of a text message, None if it has no binary form
+        kind, _, rest = message.partition(":")
+        name, _, sensor = rest.rpartition(":")
+        self._seq += 1
+        if kind == "WEIGHT":
+            return encode_frame(FRAME_WEIGHT, int(name), round(float(sensor) * WEIGHT_SCALE), self._seq)
+        if kind == "EVENT":
+            return encode_frame(FRAME_EVENT, int(sensor), EVENT_CODES[name], self._seq)
+        if kind == "STATUS":
+            if rest in STATUS_CODES:
+                return encode_frame(FRAME_STATUS, 0, STATUS_CODES[rest], self._seq)
+            if name in STATUS_CODES:
+                return encode_frame(FRAME_STATUS, int(sensor), STATUS_CODES[name], self._seq)
+        self._seq -= 1
+        return None
+
+    def _passes_deadband(self, message):
+        # Report-on-change like FSR_reader.ino: a weight is sent when it moved past
+        # the sensor's deadband since the last such move, and for a few readings after
+        kind, sensor, weight = message.split(":")
+        sensor, weight = int(sensor), float(weight)
+        deadband = self.deadbands.get(sensor, 0)
+        if deadband <= 0:
+            return True
+        anchor = self._anchors.get(sensor)
+        if anchor is None or abs(weight - anchor) > deadband:
+            self._anchors[sensor] = weight
+            self._trailing[sensor] = DEADBAND_TRAIL
+            return True
+        if self._trailing.get(sensor):
+            self._trailing[sensor] -= 1
+            return True
+        self.suppressed += 1
+        return False
+
+    def send(self, messages):
+        """Send a batch of messages (text lines, or frames in binary mode).
+        WEIGHT messages within a deadband set by the host are dropped."""
+        with self._write_lock:
+            if self.deadbands:
+                messages = [message for message in messages
+                            if not message.startswith("WEIGHT:") or self._passes_deadband(message)]
+            if self.binary:
+                data = b"".join(frame for frame in map(self._encode, messages) if frame is not None)
+            elif self.timestamps:
+                # EVENT lines get the millis() since the simulator started
+                millis = int((time.monotonic() - self._start) * 1000)
+                data = "".join(f"{message}:{millis}\r\n" if message.startswith("EVENT:") else f"{message}\r\n"
+                               for message in messages).encode()
+            else:
+                data = "".join(f"{message}\r\n" for message in messages).encode()
+            now = time.perf_counter()
+            self.tap_times.extend(now for message in messages
+                                  if message.startswith("EVENT:") and message.split(":")[1] in TAP_EVENTS)
+            self._write(data)
+            self.sent += len(messages)
+
+    def replay(self, reads):
+        """Write recorded reads (e.g. a poker_serial_recorder.ReplaySource,
+        which paces them) as they come. Returns the number of reads written."""
+        count = 0
+        for data in reads:
+            with self._write_lock:
+                now = time.perf_counter()
+                taps = sum(data.count(f"EVENT:{name}:".encode()) for name in TAP_EVENTS)
+                self.tap_times.extend([now] * taps)
+                self._write(data)
+            count += 1
+        return count
+
+    def play(self, messages, rate=None, duration=None, batch=64):
+        """Send messages at `rate` per second (as fast as possible when None)
+        until they run out or `duration` seconds have passed.
+        Returns the number of messages sent."""
+        messages = iter(messages)
+        start = time.perf_counter()
+        sent = 0
+        while True:
+            elapsed = time.perf_counter() - start
+            if duration is not None and elapsed >= duration:
+                break
+            due = min(int(elapsed * rate) + 1 - sent, batch) if rate else batch
+            if due <= 0:
+                time.sleep(1 / rate)
+                continue
+            chunk = list(islice(messages, due))
+            if not chunk:
+                break
+            self.send(chunk)
+            sent += len(chunk)
+        return sent
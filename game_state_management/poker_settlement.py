@@ -0,0 +1,64 @@
+import numpy as np
+
+
+def build_layers(contributions):
+    """Side-pot layers from each player's total contribution.
+
+    contributions has shape (..., players). Returns (levels, amounts), both of
+    shape (..., players): layer i covers chips between levels[i - 1] and
+    levels[i] and holds amounts[i] chips from everyone who reached levels[i].
+    """
+    contributions = np.asarray(contributions, dtype=np.int64)
+    n_players = contributions.shape[-1]
+    levels = np.sort(contributions, axis=-1)
+    deltas = np.diff(levels, axis=-1, prepend=0)
+    # After sorting, layer i is funded by the players from position i onwards
+    amounts = deltas * (n_players - np.arange(n_players))
+    return levels, amounts
+
+
+def settle_pots(contributions, scores, active):
+    """Award the main pot and side pots of one or many tables.
+
+    contributions : (..., players) chips each player put in this hand
+    scores : (..., players) packed hand scores, or (..., runs, players) to
+             split every pot evenly over several runouts
+    active : (..., players) True for players who have not folded
+
+    Each layer goes to the best eligible score (players who are active and
+    reached the layer), tied winners split it and the odd chips are reported
+    as remainder, like decide_winner. A layer no active player reached is
+    returned to the players who funded it.
+    Returns (awards, remainder) with shapes (..., players) and (...).
+    """
+    contributions = np.asarray(contributions, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.int64)
+    active = np.asarray(active, dtype=bool)
+    if scores.ndim == contributions.ndim:
+        scores = scores[..., None, :]
+    runs = scores.shape[-2]
+
+    levels, amounts = build_layers(contributions)
+    deltas = np.diff(levels, axis=-1, prepend=0)
+
+    # Players who reached each layer, shape (..., layers, players)
+    funded = contributions[..., None, :] >= levels[..., :, None]
+    eligible = funded & active[..., None, :]
+    contested = eligible.any(axis=-1)
+
+    # Split each layer evenly over the runouts, shape (..., layers, runs)
+    run_amounts = amounts[..., None] // runs + (np.arange(runs) < amounts[..., None] % runs)
+
+    # Best eligible score of each layer on each runout, shape (..., layers, runs, players)
+    masked = np.where(eligible[..., :, None, :], scores[..., None, :, :], -1)
+    best = masked.max(axis=-1, keepdims=True)
+    winners = eligible[..., :, None, :] & (masked == best)
+    n_winners = np.maximum(winners.sum(axis=-1), 1)
+
+    awards = (winners * (run_amounts // n_winners)[..., None]).sum(axis=(-3, -2))
+    remainder = np.where(contested[..., None], run_amounts % n_winners, 0).sum(axis=(-2, -1))
+
+    # Uncontested layers go back to whoever funded them
+    refunds = (funded & ~contested[..., None]) * deltas[..., None]
+    awards = awards + refunds.sum(axis=-2)
+    return awards, remainder
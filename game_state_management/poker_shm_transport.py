@@ -0,0 +1,383 @@
+import errno
+import fcntl
+import os
+import stat
+import struct
+import sys
+import tempfile
+import time
+from multiprocessing import shared_memory
+
+from poker_detection_protocol import CARD_DETECTION
+from poker_detector_server import DetectorClient
+from poker_tracing import TRACER
+
+# Card detector -> game over shared memory, for a detector on the same machine.
+# The game creates a ring of fixed-size detection records; one detector process
+# writes it without locks (it claims the ring with an flock on a file next to
+# the wakeup FIFO, so a second detector is refused; several detectors on one
+# machine each get their own ring). Layout:
+#   0    header: magic, capacity (records), record size
+#   64   write index (records ever written; only the detector stores it)
+#   128  read index (records consumed; only the game stores it)
+#   192  records, record i at slot i % capacity
+# Each record ends with its index (the slot's sequence number), set to EMPTY while
+# the slot is being written, so the game can tell a finished record from a torn
+# or overwritten one. A full ring overwrites its oldest records: the detector
+# never waits for the game.
+MAGIC = b"PKR2"
+HEADER = struct.Struct('<4sII')
+INDEX = struct.Struct('<Q')
+WRITE_OFFSET = 64
+READ_OFFSET = 128
+DATA_OFFSET = 192
+
+# card, detector (UTF-8, up to LABEL_SIZE bytes), confidence (0-1), trace id
+# (0 = none), detection time (time.time), send time (time.monotonic)
+LABEL_SIZE = 32
+RECORD_BODY = struct.Struct(f'<{LABEL_SIZE}s{LABEL_SIZE}sfIdd')
+RECORD_SIZE = RECORD_BODY.size + INDEX.size
+SEQ_OFFSET = RECORD_BODY.size
+EMPTY = 2 ** 64 - 1
+
+DEFAULT_NAME = "poker_detections"
+DEFAULT_CAPACITY = 256
+
+
+def wakeup_path(name):
+    """Path of the FIFO the detector writes a byte to after each record."""
+    return os.path.join(tempfile.gettempdir(), f"{name}.wake")
+
+
+def writer_lock_path(name):
+    """Path of the file the ring's detector holds an exclusive flock on."""
+    return os.path.join(tempfile.gettempdir(), f"{name}.writer")
+
+
+def _label(text, what):
+    """Encode a card or detector name for a record; raises ValueError if it does not fit."""
+    data = text.encode('utf-8')
+    if len(data) > LABEL_SIZE:
+        raise ValueError(f"{what} {text!r} is longer than {LABEL_SIZE} bytes")
+    return data
+
+
+def _attach(name):
+    """Open an existing segment without handing it to this process's resource tracker.
+
+    Before Python 3.13 every attach is tracked, and the tracker unlinks the
+    segment when the attaching process exits, pulling it from under the game.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    from multiprocessing import resource_tracker
+    shm = shared_memory.SharedMemory(name)
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _unlink(shm):
+    """Unlink a segment this process created.
+
+    A detector sharing our resource tracker (a child process) unregisters
+    the name when it attaches; registering it again first keeps the
+    tracker from failing on the unlink.
+    """
+    if sys.version_info < (3, 13):
+        from multiprocessing import resource_tracker
+        resource_tracker.register(shm._name, 'shared_memory')
+    shm.unlink()
+
+
+def _text(field):
+    return field.rstrip(b"\0").decode('utf-8', 'replace')
+
+
+class ShmDetectionReader:
+    """Game side of the shared-memory transport, read on a Reactor.
+
+    Creates the ring and its wakeup FIFO; the FIFO is registered on the
+    reactor, so records are read as soon as a detector signals them.
+    Records are delivered like DetectorServer messages: on_messages(client,
+    messages) with the same card_detection dicts (plus "confidence" and the
+    monotonic "sent" time), one DetectorClient per detector name.
+    """
+    def __init__(self, reactor, name=DEFAULT_NAME, on_messages=None, capacity=DEFAULT_CAPACITY):
+        self.reactor = reactor
+        self.name = name
+        self.on_messages = on_messages
+        self.capacity = capacity
+
+        size = DATA_OFFSET + capacity * RECORD_SIZE
+        try:
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a game that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+        self._buf = self.shm.buf
+        HEADER.pack_into(self._buf, 0, MAGIC, capacity, RECORD_SIZE)
+        self._read = 0
+
+        # Wakeup FIFO; our own write end keeps it from reporting EOF (and
+        # waking the loop forever) while no detector has it open
+        self.wakeup_path = wakeup_path(name)
+        try:
+            os.unlink(self.wakeup_path)
+        except FileNotFoundError:
+            pass
+        os.mkfifo(self.wakeup_path, 0o600)
+        self._wake_fd = os.open(self.wakeup_path, os.O_RDONLY | os.O_NONBLOCK)
+        self._keepalive_fd = os.open(self.wakeup_path, os.O_WRONLY | os.O_NONBLOCK)
+        reactor.register(self._wake_fd, self._on_wakeup)
+
+        # Detectors seen (name -> DetectorClient), and records lost to overruns
+        self.detectors = {}
+        self.lost = 0
+
+    @property
+    def connected(self):
+        return bool(self.detectors)
+
+    @property
+    def clients(self):
+        return list(self.detectors.values())
+
+    def stats(self):
+        now = time.monotonic()
+        return [client.stats(now) for client in self.detectors.values()]
+
+    def poll(self):
+        """Return the records written since the last poll as message dicts."""
+        buf = self._buf
+        capacity = self.capacity
+        write = INDEX.unpack_from(buf, WRITE_OFFSET)[0]
+        read = self._read
+        if write - read > capacity:
+            # The detector lapped us; the oldest records are gone
+            self.lost += write - capacity - read
+            read = write - capacity
+
+        messages = []
+        while read < write:
+            offset = DATA_OFFSET + (read % capacity) * RECORD_SIZE
+            seq = INDEX.unpack_from(buf, offset + SEQ_OFFSET)[0]
+            card, detector, confidence, trace_id, timestamp, sent = RECORD_BODY.unpack_from(buf, offset)
+            if seq != read or INDEX.unpack_from(buf, offset + SEQ_OFFSET)[0] != seq:
+                if seq != EMPTY and seq > read:
+                    # Overwritten by a newer record
+                    self.lost += 1
+                    read += 1
+                    continue
+                # Being written; the detector's wakeup will bring us back
+                break
+            message = {
+                "type": CARD_DETECTION,
+                "card": _text(card),
+                "timestamp": timestamp,
+                "detector": _text(detector),
+                "confidence": confidence,
+                "sent": sent
+            }
+            if trace_id:
+                message["trace"] = trace_id
+            messages.append(message)
+            read += 1
+
+        self._read = read
+        INDEX.pack_into(buf, READ_OFFSET, read)
+        return messages
+
+    def _on_wakeup(self, fd):
+        start = time.monotonic_ns()
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        messages = self.poll()
+        if not messages:
+            return
+        if TRACER.enabled:
+            end = time.monotonic_ns()
+            for message in messages:
+                TRACER.record("receive", start, end, message.get('trace'), {"detector": message['detector']})
+
+        # Deliver per detector, like one read from each detector's socket
+        now = time.monotonic()
+        by_detector = {}
+        for message in messages:
+            by_detector.setdefault(message['detector'], []).append(message)
+        for name, batch in by_detector.items():
+            client = self.detectors.get(name)
+            if client is None:
+                client = self.detectors[name] = DetectorClient(None, f"shm:{self.name}")
+                client.name = name
+                print(f"Card detector {name} attached to shared memory {self.name}")
+            client.record(len(batch), len(batch) * RECORD_SIZE, now)
+            if self.on_messages is not None:
+                self.on_messages(client, batch)
+
+    def close(self):
+        if self.shm is None:
+            return
+        self.reactor.unregister(self._wake_fd)
+        os.close(self._wake_fd)
+        os.close(self._keepalive_fd)
+        try:
+            os.unlink(self.wakeup_path)
+        except FileNotFoundError:
+            pass
+        self._buf = None
+        self.shm.close()
+        try:
+            _unlink(self.shm)
+        except FileNotFoundError:
+            pass
+        self.shm = None
+
+
+class ShmDetectionWriter:
+    """Detector side of the shared-memory transport (the ring's single producer).
+
+    Attaches to the ring the game created, retrying at most every
+    retry_interval seconds while the game is not running, and reattaches
+    when the game restarts. write() never blocks.
+
+    Only one writer can hold a ring: while another detector has it,
+    attach() fails (and is retried like a missing game), as two producers
+    would overwrite each other's records.
+    """
+    def __init__(self, detector, name=DEFAULT_NAME, retry_interval=1.0):
+        self.detector = detector
+        self._detector = _label(detector, "Detector name")
+        self.name = name
+        self.retry_interval = retry_interval
+        self.shm = None
+        self._wake_fd = None
+        self._lock_fd = None
+        self._next_attempt = 0.0
+        self._refused = False
+
+        # Records written, and records that overwrote ones the game had not read
+        self.written = 0
+        self.overwritten = 0
+
+    @property
+    def attached(self):
+        return self.shm is not None
+
+    def attach(self):
+        """Attach to the game's ring; returns whether it is available."""
+        if self.shm is not None:
+            return True
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return False
+        self._next_attempt = now + self.retry_interval
+        if not self._claim():
+            return False
+        try:
+            shm = _attach(self.name)
+        except FileNotFoundError:
+            return False
+        magic, capacity, record_size = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or record_size != RECORD_SIZE:
+            print(f"Shared memory {self.name} is not a detection ring")
+            shm.close()
+            return False
+        self.shm = shm
+        self.capacity = capacity
+        # Continue after the records of a previous detector run
+        self._write = INDEX.unpack_from(shm.buf, WRITE_OFFSET)[0]
+        self._open_wakeup()
+        print(f"Attached to game state manager via shared memory {self.name}")
+        return True
+
+    def _claim(self):
+        """Take the ring's writer lock (kept until close(), across game restarts)."""
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(writer_lock_path(self.name), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            if not self._refused:
+                print(f"Shared memory ring {self.name} already has a detector writing to it; "
+                      f"give each detector its own ring")
+                self._refused = True
+            return False
+        self._lock_fd = fd
+        self._refused = False
+        return True
+
+    def _open_wakeup(self):
+        try:
+            self._wake_fd = os.open(wakeup_path(self.name), os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            # ENXIO: no reader yet
+            self._wake_fd = None
+            if e.errno not in (errno.ENXIO, errno.ENOENT):
+                print(f"Failed to open detection wakeup FIFO: {e}")
+            return
+        if not stat.S_ISFIFO(os.fstat(self._wake_fd).st_mode):
+            os.close(self._wake_fd)
+            self._wake_fd = None
+
+    def write(self, card, confidence=0.0, timestamp=None, trace_id=None):
+        """Publish a detection; returns False if the game's ring is not available.
+
+        Raises ValueError for a card name longer than LABEL_SIZE bytes.
+        """
+        card = _label(card, "Card")
+        if not self.attach():
+            return False
+        buf = self.shm.buf
+        index = self._write
+        offset = DATA_OFFSET + (index % self.capacity) * RECORD_SIZE
+        if index - INDEX.unpack_from(buf, READ_OFFSET)[0] >= self.capacity:
+            self.overwritten += 1
+
+        # Mark the slot in progress, fill it, then publish it
+        INDEX.pack_into(buf, offset + SEQ_OFFSET, EMPTY)
+        RECORD_BODY.pack_into(buf, offset, card, self._detector,
+                              confidence, trace_id or 0, time.time() if timestamp is None else timestamp,
+                              time.monotonic())
+        INDEX.pack_into(buf, offset + SEQ_OFFSET, index)
+        self._write = index + 1
+        INDEX.pack_into(buf, WRITE_OFFSET, self._write)
+        self.written += 1
+        self._wake()
+        return True
+
+    def _wake(self):
+        if self._wake_fd is None:
+            self._open_wakeup()
+            if self._wake_fd is None:
+                return
+        try:
+            os.write(self._wake_fd, b"\0")
+        except BlockingIOError:
+            # The game has wakeups pending already
+            pass
+        except BrokenPipeError:
+            # The game exited; its restart creates a new ring
+            print("Game state manager closed the shared memory ring")
+            self.detach()
+
+    def detach(self):
+        if self._wake_fd is not None:
+            os.close(self._wake_fd)
+            self._wake_fd = None
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+
+    def close(self):
+        self.detach()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
@@ -0,0 +1,133 @@
+import threading
+import queue
+from collections import deque
+
+
+class WeightFilter:
+    """Median + EMA filter with a settle detector for one load cell.
+
+    update() returns the settled weight once the last `settle_samples`
+    median readings stay within `settle_band` grams of each other and it
+    differs from the last reported weight by more than `min_change` grams,
+    otherwise None.
+    """
+    # int window : number of raw readings in the median
+    # float alpha : EMA smoothing factor (0-1, higher follows faster)
+    # float settle_band : largest spread (g) still counted as settled
+    # int settle_samples : median readings that must agree before reporting
+    # float min_change : smallest change (g) worth reporting
+    def __init__(self, window=5, alpha=0.3, settle_band=1.0, settle_samples=3, min_change=1.0):
+        self.readings = deque(maxlen=window)
+        self.medians = deque(maxlen=settle_samples)
+        self.alpha = alpha
+        self.settle_band = settle_band
+        self.min_change = min_change
+
+        self.value = None           # filtered (EMA) weight
+        self.reported = 0.0         # last settled weight that was reported
+
+    def update(self, weight):
+        """Add a raw reading; return the settled weight if it should be reported."""
+        self.readings.append(weight)
+        median = sorted(self.readings)[len(self.readings) // 2]
+        self.medians.append(median)
+
+        if self.value is None:
+            self.value = median
+        else:
+            self.value += self.alpha * (median - self.value)
+
+        if len(self.medians) < self.medians.maxlen or max(self.medians) - min(self.medians) > self.settle_band:
+            return None
+
+        # Settled: lock the filter onto the settled weight
+        settled = sum(self.medians) / len(self.medians)
+        self.value = settled
+        if abs(settled - self.reported) > self.min_change:
+            self.reported = settled
+            return settled
+        return None
+
+
+class CoalescingEventQueue:
+    """Thread-safe FIFO with the queue.Queue get/put API where pending WEIGHT
+    events are coalesced per sensor (latest value wins)."""
+    def __init__(self):
+        self._events = deque()
+        self._pending_weights = {}
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+
+    def put(self, event, block=True, timeout=None):
+        with self._lock:
+            if event['type'] == 'WEIGHT':
+                pending = self._pending_weights.get(event['sensor'])
+                if pending is not None:
+                    # Update the queued event in place, keeping its position
+                    pending.update(event)
+                    return
+                self._pending_weights[event['sensor']] = event
+            self._events.append(event)
+            self._not_empty.notify()
+
+    def get(self, block=True, timeout=None):
+        with self._not_empty:
+            if block and not self._events:
+                self._not_empty.wait_for(lambda: self._events, timeout)
+            if not self._events:
+                raise queue.Empty
+            event = self._events.popleft()
+            if event['type'] == 'WEIGHT':
+                del self._pending_weights[event['sensor']]
+            return event
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def get_batch(self, max_count=None):
+        """Take up to max_count pending events (all when None) without blocking."""
+        with self._lock:
+            count = len(self._events) if max_count is None else min(max_count, len(self._events))
+            batch = [self._events.popleft() for _ in range(count)]
+            for event in batch:
+                if event['type'] == 'WEIGHT':
+                    del self._pending_weights[event['sensor']]
+            return batch
+
+    def put_nowait(self, event):
+        self.put(event, block=False)
+
+    def empty(self):
+        return not self._events
+
+    def qsize(self):
+        return len(self._events)
+
+
+def coalesce_events(events):
+    """Drop the events of a batch made redundant by others, keeping order.
+
+    Only the latest WEIGHT event of each sensor and the latest CONNECTION
+    event of each port are kept, in their own place. Gestures are player
+    actions and are all kept, except exact repeats of one (the same gesture,
+    sensor and firmware millis), which are retransmits.
+    """
+    latest = {}
+    for i, event in enumerate(events):
+        kind = event['type']
+        if kind in ('WEIGHT', 'CONNECTION'):
+            latest[(kind, event['sensor'] if kind == 'WEIGHT' else event['port'])] = i
+    kept = []
+    gestures = set()
+    for i, event in enumerate(events):
+        kind = event['type']
+        if kind in ('WEIGHT', 'CONNECTION'):
+            if latest[(kind, event['sensor'] if kind == 'WEIGHT' else event['port'])] != i:
+                continue
+        elif 'fw_ms' in event:
+            key = (kind, event.get('sensor'), event['fw_ms'])
+            if key in gestures:
+                continue
+            gestures.add(key)
+        kept.append(event)
+    return kept
@@ -1,79 +1,124 @@
 #!/usr/bin/env python3
 import serial
 import time
-import threading
-import queue
+import asyncio
+import random
+from abc import ABC, abstractmethod
 
-class PokerSignalReceiver:
-    def __init__(self, port='/dev/ttyACM0', baud_rate=9600):
-        """Initialize the signal receiver."""
+from poker_serial_codec import (FrameDecoder, FRAME_WEIGHT, FRAME_EVENT, FRAME_STATUS, WEIGHT_SCALE,
+                                EVENT_NAMES, STATUS_NAMES, BINARY_COMMAND, BINARY_REPLY,
+                                INTERVAL_COMMAND, DEADBAND_COMMAND, BAUD_COMMAND, BAUD_RATES)
+from poker_signal_filter import CoalescingEventQueue
+from poker_sensor_state import SensorState
+from poker_serial_recorder import SerialRecorder
+from poker_latency import stamp
+
+# Device roles, as reported by the Arduinos in reply to the ID command
+ROLE_SENSOR = 'sensor'
+ROLE_DISPENSER = 'dispenser'
+
+# Request sequence numbers wrap below 2**31 (the firmware parses them as a signed 32-bit long)
+SEQ_MODULUS = 2 ** 31
+
+# Connection states, published as CONNECTION events
+DISCONNECTED = 'disconnected'
+CONNECTING = 'connecting'
+CONNECTED = 'connected'
+
+class SignalProtocol(ABC):
+    """Line framing and message parsing shared by the serial receivers.
+    
+    Receivers implement _emit() and may override the other hooks.
+    """
+    def __init__(self, port, role=None, sensors=None):
         self.port = port
-        self.baud_rate = baud_rate
-        self.ser = None
-        self.connected = False
         
-        # Data storage for multiple sensors
-        self.weights = {1: 0.0, 2: 0.0, 3: 0.0, 4: 0.0}
-        self.last_events = {1: None, 2: None, 3: None, 4: None}
+        # Device role (ROLE_SENSOR or ROLE_DISPENSER), None until identified
+        self.role = role
         
-        # Queue for events that can be processed by the game
-        self.event_queue = queue.Queue()
+        # Per-sensor weights, events and weight filters (a WEIGHT event is only sent once a reading settles)
+        self.sensors = sensors if sensors is not None else SensorState()
         
-        # Create and start event processing thread
-        self.running = True
-        self.processing_thread = threading.Thread(target=self._read_serial_thread)
-        self.processing_thread.daemon = True
+        # Received bytes not yet terminated by a newline (reused between reads)
+        self._rx_buffer = bytearray()
+        
+        # Binary framing, switched on when the Arduino confirms MODE:BINARY
+        self.binary = False
+        self._decoder = FrameDecoder()
+        
+        # Messages (lines or frames) received so far
+        self.messages_received = 0
+        
+        # Monotonic time of the read being processed
+        self._rx_time = None
         
-        # Connect on initialization
-        self.connect()
-        self.processing_thread.start()
+        # SerialRecorder the raw bytes of every read are written to (None = not recording)
+        self.recorder = None
     
-    def connect(self):
-        """Connect to the Arduino."""
-        try:
-            self.ser = serial.Serial(self.port, self.baud_rate, timeout=1)
-            # Allow time for Arduino to reset after connection
-            time.sleep(2)
-            self.connected = True
-            print(f"Connected to Arduino on port {self.port}")
-            return True
-        except Exception as e:
-            print(f"Error connecting to Arduino: {e}")
-            self.connected = False
-            return False
+    @property
+    def weights(self):
+        """Current raw weight per sensor, indexed by sensor number."""
+        return self.sensors.weight
     
-    def disconnect(self):
-        """Disconnect from the Arduino."""
-        self.running = False
-        if self.ser is not None and self.ser.is_open:
-            self.ser.close()
-            self.connected = False
-            print("Disconnected from Arduino")
+    @property
+    def last_events(self):
+        """Dict of sensor -> name of its last event."""
+        return self.sensors.last_events()
     
-    def send_command(self, command):
-        """Send a command to the Arduino."""
-        if not self.connected:
-            print("Not connected to Arduino")
-            return False
-        
-        try:
-            self.ser.write((command + "\n").encode())
-            print(f"Sent command: {command}")
-            return True
-        except Exception as e:
-            print(f"Error sending command: {e}")
-            return False
+    @property
+    def dropped_frames(self):
+        """Binary frames lost in transit (from gaps in sequence numbers)."""
+        return self._decoder.dropped
     
-    def tare_scale(self, sensor_num=None):
-        """Send tare command to the Arduino."""
-        if sensor_num is not None:
-            if 1 <= sensor_num <= 4:
-                return self.send_command(f"TARE:{sensor_num}")
-            else:
-                print(f"Invalid sensor number: {sensor_num}")
-                return False
-        else:
-            return self.send_command("TARE_ALL")
+    @abstractmethod
+    def _emit(self, event):
+        """Deliver a parsed event."""
+    
+    def _ack(self, seq):
+        """Handle a command acknowledgement (seq is None for a plain "ack")."""
+        pass
+    
+    def _on_board_ready(self):
+        """Handle the first sign of life from a (re)started board."""
+        pass
+    
+    def _on_status(self, status):
+        """Handle a status report ("NAME" or "NAME:sensor", text or binary)."""
+        pass
+    
+    def _feed(self, data, rx_time=None):
+        """Buffer received bytes and process every complete line or frame.
+        
+        rx_time is the monotonic time the bytes were read (now if None),
+        stamped on the events they produce.
+        """
+        self._rx_time = time.monotonic() if rx_time is None else rx_time
+        if self.recorder is not None:
+            self.recorder.write(self._rx_time, data)
+        if self.binary:
+            self._process_frames(self._decoder.feed(data))
+            return
+        
+        buffer = self._rx_buffer
+        buffer += data
+        start = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                break
+            self._process_message(buffer[start:end].decode('utf-8', errors='replace'))
+            start = end + 1
+            
+            # Everything after the MODE:BINARY reply is binary frames
+            if self.binary:
+                rest = bytes(buffer[start:])
+                buffer.clear()
+                self._process_frames(self._decoder.feed(rest))
+                return
+        
+        # Keep only the trailing partial line
+        if start:
+            del buffer[:start]
     
     def _process_message(self, message):
         """Process a message from the Arduino."""
@@ -82,80 +127,627 @@ class PokerSignalReceiver:
         # Skip empty messages
         if not message:
             return
+        self.messages_received += 1
         
+        # The board is up once it prints a STATUS line or answers the ID probe
+        if message.startswith(("STATUS:", "ID:")):
+            self._on_board_ready()
+        
+        # Handshake reply to the ID command
+        if message.startswith("ID:"):
+            self.role = message[3:].lower()
+            return
+        
+        # Command acknowledgements from the dispenser ("ack" or "ack:seq")
+        if message.startswith("ack"):
+            if self.role is None:
+                self.role = ROLE_DISPENSER
+            seq = message[4:]
+            self._ack(int(seq) if seq.isdigit() else None)
+            return
+        
+        # Only the sensor board streams readings; both boards print STATUS lines
+        if self.role is None and message.startswith(("WEIGHT:", "EVENT:")):
+            self.role = ROLE_SENSOR
         
-        if self.port == '/dev/ttyACM0':
-            # Skip messages from the second Arduino
-            if message.startswith("ack"):
-                return
         # Process different message types
         if message.startswith("WEIGHT:"):
             try:
                 parts = message.split(":", 2)
                 if len(parts) == 3:
-                    sensor_num = int(parts[1])
-                    weight_value = float(parts[2])
-                    old_weight = self.weights[sensor_num]
-                    self.weights[sensor_num] = weight_value
-                    
-                    # Add to event queue if weight has meaningfully changed
-                    if abs(weight_value - old_weight) > 1.0:  # 1g threshold to avoid noise
-                        self.event_queue.put({
-                            'type': 'WEIGHT',
-                            'sensor': sensor_num,
-                            'value': weight_value
-                        })
-            except (ValueError, IndexError):
+                    self._update_weight(int(parts[1]), float(parts[2]))
+            except (ValueError, IndexError, KeyError):
                 print(f"Invalid weight value format: {message}")
         
         elif message.startswith("EVENT:"):
             try:
                 print(message)
-                parts = message.split(":", 2)
+                # EVENT:name:sensor, optionally followed by the firmware millis
+                parts = message.split(":")
                 if len(parts) == 3:
-                    event_type = parts[1]
-                    sensor_num = int(parts[2])
-                    
-                    self.last_events[sensor_num] = event_type
-                    
-                    # Add to event queue
-                    if event_type in ['SINGLE_TAP', 'DOUBLE_TAP', 'HOLD']:
-                        self.event_queue.put({
-                            'type': event_type,
-                            'sensor': sensor_num
-                        })
+                    self._update_event(parts[1], int(parts[2]))
+                elif len(parts) == 4:
+                    self._update_event(parts[1], int(parts[2]), int(parts[3]))
             except (ValueError, IndexError):
                 print(f"Invalid event format: {message}")
         
         elif message.startswith("STATUS:"):
             status = message.split(":", 1)[1]
             print(f"Status update: {status}")
+            if status == BINARY_REPLY:
+                self._decoder.reset()
+                self.binary = True
+            self._on_status(status)
+    
+    def _process_frames(self, frames):
+        """Process decoded binary frames with the same semantics as text messages."""
+        self.messages_received += len(frames)
+        
+        # All weight readings of the read are stored in one go
+        weights = frames[frames['type'] == FRAME_WEIGHT]
+        if len(weights):
+            invalid = weights['sensor'][~self.sensors.valid(weights['sensor'])]
+            if len(invalid):
+                print(f"Invalid weight sensors: {invalid.tolist()}")
+            settled = self.sensors.update_weights(weights['sensor'], weights['value'] / WEIGHT_SCALE, self._rx_time)
+            for sensor, value in settled:
+                self._emit_weight(sensor, value)
+        
+        # And so are the events, which are then queued in order with the status reports
+        events = frames[frames['type'] == FRAME_EVENT]
+        if len(events):
+            valid = self.sensors.valid(events['sensor'])
+            if not valid.all():
+                print(f"Invalid event sensors: {events['sensor'][~valid].tolist()}")
+            self.sensors.update_events(events['sensor'], events['value'], self._rx_time)
+        
+        for frame_type, sensor, value in zip(frames['type'].tolist(), frames['sensor'].tolist(),
+                                             frames['value'].tolist()):
+            if frame_type == FRAME_EVENT:
+                print(f"EVENT:{EVENT_NAMES.get(value, value)}:{sensor}")
+                if self.sensors.valid(sensor):
+                    self._emit_event(EVENT_NAMES.get(value), sensor)
+            elif frame_type == FRAME_STATUS:
+                status = STATUS_NAMES.get(value, value)
+                status = f"{status}:{sensor}" if sensor else f"{status}"
+                print(f"Status update: {status}")
+                self._on_status(status)
+    
+    def _update_weight(self, sensor_num, weight_value):
+        # Add to event queue once the reading settles on a new weight
+        settled = self.sensors.update_weight(sensor_num, weight_value, self._rx_time)
+        if settled is not None:
+            self._emit_weight(sensor_num, settled)
+    
+    def _emit_weight(self, sensor_num, value):
+        self._emit({
+            'type': 'WEIGHT',
+            'sensor': sensor_num,
+            'value': value,
+            'stamps': {'rx': self._rx_time}
+        })
+    
+    def _update_event(self, event_type, sensor_num, fw_ms=None):
+        self.sensors.update_event(sensor_num, event_type, self._rx_time)
+        self._emit_event(event_type, sensor_num, fw_ms)
+    
+    def _emit_event(self, event_type, sensor_num, fw_ms=None):
+        # Add to event queue
+        if event_type in ['SINGLE_TAP', 'DOUBLE_TAP', 'HOLD']:
+            event = {
+                'type': event_type,
+                'sensor': sensor_num,
+                'stamps': {'rx': self._rx_time}
+            }
+            if fw_ms is not None:
+                event['fw_ms'] = fw_ms
+            self._emit(event)
+
+
+class AsyncPokerSignalReceiver(SignalProtocol):
+    """asyncio-native receiver: the event loop watches the serial fd.
+    
+    Events are consumed with `async for event in receiver.events()`, or handed
+    to `on_event` instead when a callback is given.
+    """
+    def __init__(self, port='/dev/ttyACM0', baud_rate=9600, on_event=None, binary=False, role=None, sensors=None,
+                 fast_baud=None):
+        super().__init__(port, role, sensors)
+        self.baud_rate = baud_rate
+        
+        # Ask the Arduino for binary frames after connecting
+        self.request_binary = binary
+        
+        # Baud rate to switch to after connecting (None = stay at baud_rate), and the rate in use
+        self.fast_baud = fast_baud
+        self.active_baud = baud_rate
+        self._pending_baud = None
+        self._baud_set = asyncio.Event()
+        
+        # Link settings already negotiated on this connection: the fast baud rate tried, and
+        # whether binary framing was asked for
+        self._baud_tried = None
+        self._binary_requested = False
+        
+        # Telemetry settings commands, sent again after every reconnect (the board forgets them on reset)
+        self.settings = {}
+        
+        self.ser = None
+        self.on_event = on_event
+        
+        # Connection state (DISCONNECTED, CONNECTING or CONNECTED), published as CONNECTION events
+        self.state = DISCONNECTED
+        
+        # Longest wait for the board's first STATUS line after opening the port,
+        # and again for its reply to an ID probe (s, 0 = do not wait)
+        self.ready_timeout = 3
+        
+        # Reconnect backoff: doubles from backoff_base up to backoff_max (s), with jitter
+        self.backoff_base = 0.5
+        self.backoff_max = 30
+        
+        self._events = asyncio.Queue()
+        self._write_lock = asyncio.Lock()
+        self._lost = asyncio.Event()
+        self._ready = asyncio.Event()
+        self._up = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._running = False
+        
+        # Requests waiting for an ack (seq -> future of the ack time), oldest first. Sequence
+        # numbers start from the clock (ms), so a new session never reuses the last seq of the
+        # previous one, which a board that was not reset would take for a retry
+        self._pending = {}
+        self._next_seq = int(time.time() * 1000) % SEQ_MODULUS
+        self._last_request = None
+    
+    @property
+    def connected(self):
+        return self.state == CONNECTED
+    
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        if state == CONNECTED:
+            self._up.set()
+        else:
+            self._up.clear()
+        self._emit({
+            'type': 'CONNECTION',
+            'port': self.port,
+            'state': state
+        })
+    
+    def _on_board_ready(self):
+        self._ready.set()
+    
+    async def connect(self):
+        """Open the port and wait until the Arduino is ready.
+        
+        Opening the port resets most boards, which then print STATUS lines;
+        a board that did not reset is probed with the ID command instead.
+        Returns True once connected.
+        """
+        loop = asyncio.get_running_loop()
+        self._set_state(CONNECTING)
+        try:
+            # Non-blocking port: reads return whatever is pending
+            self.ser = await loop.run_in_executor(None, lambda: serial.Serial(self.port, self.baud_rate, timeout=0))
+        except Exception as e:
+            print(f"Error connecting to Arduino: {e}")
+            self._set_state(DISCONNECTED)
+            return False
+        
+        # A fresh connection resets the Arduino to text mode
+        self.binary = False
+        self._baud_tried = None
+        self._binary_requested = False
+        self._rx_buffer.clear()
+        self._ready.clear()
+        self._lost.clear()
+        loop.add_reader(self.ser.fileno(), self._on_readable)
+        
+        if self.ready_timeout and not await self._wait_ready():
+            await self._write(b"ID\n")
+            if not await self._wait_ready():
+                print(f"No reply from {self.port}, assuming it is ready")
+        if self._lost.is_set():
+            return False
+        
+        # Negotiate the faster link before any traffic depends on it
+        self.active_baud = self.baud_rate
+        await self._negotiate_fast_baud()
+        if self._lost.is_set():
+            return False
+        
+        self._set_state(CONNECTED)
+        print(f"Connected to Arduino on port {self.port}")
+        for command in self.settings.values():
+            await self.send_command(command)
+        # (again, in case reconfigure() changed the settings while connecting)
+        await self._apply_link_settings()
+        return True
+    
+    async def _negotiate_fast_baud(self):
+        if self.fast_baud and self.fast_baud != self.active_baud and self._baud_tried != self.fast_baud:
+            self._baud_tried = self.fast_baud
+            await self._negotiate_baud(self.fast_baud)
+    
+    async def _apply_link_settings(self):
+        """Negotiate the fast baud rate and binary framing where this connection does not have them yet."""
+        await self._negotiate_fast_baud()
+        if self.request_binary and not self.binary and not self._binary_requested:
+            self._binary_requested = True
+            await self.send_command(BINARY_COMMAND)
+    
+    async def reconfigure(self, baud_rate=None, binary=None, fast_baud=None):
+        """Change the link settings (None keeps a setting), on the live connection if there is one.
+        
+        Binary framing and the fast baud rate are negotiated right away. A new
+        base baud rate, or going back to text (the firmware only leaves binary
+        framing on reset), reconnects instead.
+        """
+        reconnect = False
+        if baud_rate is not None and baud_rate != self.baud_rate:
+            self.baud_rate = baud_rate
+            reconnect = True
+        if binary is not None:
+            reconnect = reconnect or (self.binary and not binary)
+            self.request_binary = binary
+        if fast_baud is not None:
+            self.fast_baud = fast_baud
+        
+        if reconnect and self.state != DISCONNECTED:
+            # run() connects again with the new settings
+            self._drop_connection()
+        elif self.connected:
+            await self._apply_link_settings()
+    
+    async def _negotiate_baud(self, baud_rate, timeout=1.0):
+        """Ask the board to switch baud rate and follow it once it confirms.
+        
+        Firmware without the BAUD command does not answer; the link then
+        stays at the current rate.
+        """
+        if baud_rate not in BAUD_RATES:
+            print(f"Unsupported baud rate: {baud_rate}")
+            return False
+        self._pending_baud = baud_rate
+        self._baud_set.clear()
+        await self._write(f"{BAUD_COMMAND}:{baud_rate}\n".encode())
+        try:
+            await asyncio.wait_for(self._baud_set.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            print(f"No reply to {BAUD_COMMAND}:{baud_rate} from {self.port}, staying at {self.active_baud} baud")
+            return False
+        finally:
+            self._pending_baud = None
+    
+    def _on_status(self, status):
+        # Switch as soon as the confirmation is parsed: the board follows right after sending it
+        if status == 'BAUD_SET' and self._pending_baud is not None:
+            try:
+                self.ser.baudrate = self._pending_baud
+            except Exception as e:
+                print(f"Error changing baud rate: {e}")
+                return
+            self.active_baud = self._pending_baud
+            print(f"Switched {self.port} to {self.active_baud} baud")
+            self._baud_set.set()
+    
+    async def _configure(self, key, command):
+        # Remember a settings command and send it now if connected
+        self.settings[key] = command
+        if self.connected:
+            return await self.send_command(command)
+        return False
     
-    def _read_serial_thread(self):
-        """Background thread to continuously read from Arduino."""
-        while self.running:
+    async def set_print_interval(self, interval_ms):
+        """Set how often the sensor Arduino prints weights (ms)."""
+        return await self._configure(INTERVAL_COMMAND, f"{INTERVAL_COMMAND}:{int(interval_ms)}")
+    
+    async def set_deadband(self, grams, sensor_num=None):
+        """Only have weights sent that moved more than `grams` since the last
+        one sent (0 sends every reading), for one sensor or all of them."""
+        if sensor_num is None:
+            # Replaces every per-sensor deadband
+            for key in [key for key in self.settings if key.startswith(f"{DEADBAND_COMMAND}:")]:
+                del self.settings[key]
+            return await self._configure(DEADBAND_COMMAND, f"{DEADBAND_COMMAND}:{grams}")
+        if not 1 <= sensor_num <= self.sensors.num_sensors:
+            print(f"Invalid sensor number: {sensor_num}")
+            return False
+        return await self._configure(f"{DEADBAND_COMMAND}:{sensor_num}", f"{DEADBAND_COMMAND}:{sensor_num}:{grams}")
+    
+    async def _wait_ready(self):
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.ready_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def wait_connected(self, timeout=None):
+        """Wait until the port is connected; returns False on timeout."""
+        try:
+            await asyncio.wait_for(self._up.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def run(self):
+        """Keep the port connected until close() is called, retrying with
+        jittered exponential backoff."""
+        self._running = True
+        self._closed.clear()
+        failures = 0
+        while self._running:
             if not self.connected:
-                # Try to reconnect if disconnected
-                if self.connect():
-                    print("Reconnected to Arduino")
-                else:
-                    # Wait before trying again
-                    time.sleep(3)
+                if not await self.connect():
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** failures) * random.uniform(0.5, 1)
+                    failures += 1
+                    print(f"Retrying {self.port} in {delay:.1f}s")
+                    try:
+                        await asyncio.wait_for(self._closed.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
                     continue
-            
+                failures = 0
+            await self._lost.wait()
+    
+    async def close(self):
+        """Stop reconnecting and close the port."""
+        self._running = False
+        self._closed.set()
+        self._drop_connection()
+    
+    def _drop_connection(self):
+        if self.ser is not None:
             try:
-                if self.ser.in_waiting > 0:
-                    line = self.ser.readline().decode('utf-8').rstrip()
-                    self._process_message(line)
-            except Exception as e:
-                print(f"Error reading from serial: {e}")
-                self.connected = False
-            
-            # Small sleep to avoid hammering the CPU
-            time.sleep(0.01)
+                asyncio.get_running_loop().remove_reader(self.ser.fileno())
+            except Exception:
+                pass
+            if self.ser.is_open:
+                self.ser.close()
+        self._set_state(DISCONNECTED)
+        self._lost.set()
+    
+    def _on_readable(self):
+        """Read everything pending on the port (called by the event loop)."""
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+        except Exception as e:
+            print(f"Error reading from serial: {e}")
+            self._drop_connection()
+            return
+        self._feed(data, time.monotonic())
+    
+    def _emit(self, event):
+        if self.on_event is not None:
+            self.on_event(event)
+        else:
+            self._events.put_nowait(event)
+    
+    async def events(self):
+        """Asynchronous stream of events from the Arduino."""
+        while True:
+            yield await self._events.get()
+    
+    async def _write(self, data):
+        async with self._write_lock:
+            await asyncio.get_running_loop().run_in_executor(None, self.ser.write, data)
+    
+    async def send_command(self, command):
+        """Send a command to the Arduino."""
+        if not self.connected:
+            print("Not connected to Arduino")
+            return False
+        
+        try:
+            await self._write((command + "\n").encode())
+            print(f"Sent command: {command}")
+            return True
+        except Exception as e:
+            print(f"Error sending command: {e}")
+            return False
+    
+    def _ack(self, seq):
+        if seq is None:
+            # Firmware without sequence numbers acks in order
+            seq = next(iter(self._pending), None)
+        future = self._pending.pop(seq, None)
+        if future is not None and not future.done():
+            future.set_result(time.monotonic())
+    
+    async def request(self, command, timeout=30.0, retries=1):
+        """Send a command and wait for the Arduino to acknowledge it.
+        
+        The command is tagged "#seq" so a retry after a timeout acks again
+        without running twice. Several requests can be in flight; as the
+        Arduino runs them one at a time, the timeout starts once the previous
+        request is acknowledged.
+        Returns the monotonic ack time. Raises ConnectionError if the command
+        cannot be sent and asyncio.TimeoutError when no ack arrives.
+        """
+        if not self.connected and not await self.wait_connected(timeout):
+            raise ConnectionError(f"{self.port} is not connected")
+        
+        seq = self._next_seq
+        self._next_seq = (seq + 1) % SEQ_MODULUS
+        future = asyncio.get_running_loop().create_future()
+        self._pending[seq] = future
+        previous, self._last_request = self._last_request, future
+        
+        try:
+            for attempt in range(retries + 1):
+                if not await self.send_command(f"{command}#{seq}"):
+                    raise ConnectionError(f"Could not send {command} to {self.port}")
+                if previous is not None:
+                    await asyncio.wait([previous])
+                    previous = None
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError:
+                    print(f"No ack for {command} after {timeout}s" + (", retrying" if attempt < retries else ""))
+            raise asyncio.TimeoutError(f"No ack for {command} from {self.port}")
+        finally:
+            self._pending.pop(seq, None)
+            # Let later requests start their timeout
+            if not future.done():
+                future.cancel()
+    
+    async def tare_scale(self, sensor_num=None):
+        """Send tare command to the Arduino."""
+        if sensor_num is not None:
+            if 1 <= sensor_num <= self.sensors.num_sensors:
+                return await self.send_command(f"TARE:{sensor_num}")
+            else:
+                print(f"Invalid sensor number: {sensor_num}")
+                return False
+        else:
+            return await self.send_command("TARE_ALL")
+
+
+class PokerSignalReceiver:
+    """Threaded API over AsyncPokerSignalReceiver.
+    
+    The asyncio receiver is hosted by a SerialManager (the shared one unless
+    `manager` is given), so every device is read by the same background
+    thread, and its events are forwarded to `event_queue`. `sensors` is the
+    SensorState to keep the readings in (4 sensors wired to seats 1-4 if None).
+    Every raw read is recorded to the file `record` when given, for replay
+    with poker_serial_recorder.ReplaySource. `fast_baud` is a baud rate the
+    link is switched to after every connect, if the firmware agrees.
+    """
+    def __init__(self, port='/dev/ttyACM0', baud_rate=9600, binary=False, role=None, manager=None, sensors=None,
+                 record=None, fast_baud=None):
+        """Initialize the signal receiver."""
+        # Imported here as poker_serial_manager imports this module
+        from poker_serial_manager import SerialManager
+        
+        self.port = port
+        self.baud_rate = baud_rate
+        self.manager = manager if manager is not None else SerialManager.shared()
+        
+        # Queue for events that can be processed by the game (pending weights coalesce per sensor)
+        self.event_queue = CoalescingEventQueue()
+        
+        # Called (from the reader thread) after each event is queued, e.g. to wake an I/O loop
+        self.notify = None
+        
+        # Connects in the background (reuses the device if the manager already has the port)
+        self.running = True
+        self.receiver = self.manager.add_device(port, baud_rate, role=role, on_event=self._enqueue,
+                                                binary=binary, sensors=sensors, fast_baud=fast_baud)
+        if record is not None:
+            self.receiver.recorder = SerialRecorder(record)
+        self.loop = self.manager.loop
+        self.processing_thread = self.manager.thread
+    
+    @property
+    def connected(self):
+        return self.receiver.connected
+    
+    @property
+    def state(self):
+        return self.receiver.state
+    
+    @property
+    def role(self):
+        return self.receiver.role
+    
+    @property
+    def sensors(self):
+        return self.receiver.sensors
+    
+    @property
+    def weights(self):
+        return self.receiver.weights
+    
+    @property
+    def last_events(self):
+        return self.receiver.last_events
+    
+    @property
+    def dropped_frames(self):
+        return self.receiver.dropped_frames
+    
+    @property
+    def messages_received(self):
+        return self.receiver.messages_received
+    
+    def _call(self, coro):
+        # Run a receiver coroutine on the manager's loop and wait for its result
+        return self.manager.call(coro)
+    
+    def connect(self):
+        """Connect to the Arduino."""
+        return self._call(self.receiver.connect())
+    
+    def wait_connected(self, timeout=None):
+        """Block until the Arduino is connected; returns False on timeout."""
+        return self._call(self.receiver.wait_connected(timeout))
+    
+    def disconnect(self):
+        """Disconnect from the Arduino."""
+        self.running = False
+        was_connected = self.connected
+        self.manager.remove_device(self.receiver)
+        if self.receiver.recorder is not None:
+            self.receiver.recorder.close()
+            self.receiver.recorder = None
+        if was_connected:
+            print("Disconnected from Arduino")
+    
+    def send_command(self, command):
+        """Send a command to the Arduino."""
+        return self._call(self.receiver.send_command(command))
+    
+    def tare_scale(self, sensor_num=None):
+        """Send tare command to the Arduino."""
+        return self._call(self.receiver.tare_scale(sensor_num))
+    
+    def _enqueue(self, event):
+        stamp(event, 'queued')
+        self.event_queue.put(event)
+        if self.notify is not None:
+            self.notify()
+    
+    def set_print_interval(self, interval_ms):
+        """Set how often the sensor Arduino prints weights (ms), kept across reconnects."""
+        return self._call(self.receiver.set_print_interval(interval_ms))
+    
+    def set_deadband(self, grams, sensor_num=None):
+        """Only have weights sent that moved more than `grams` (all sensors, or one), kept across reconnects."""
+        return self._call(self.receiver.set_deadband(grams, sensor_num))
+    
+    def enable_timestamps(self, enabled=True):
+        """Ask the sensor Arduino to append its millis() to EVENT lines."""
+        return self.send_command("TIMESTAMPS:ON" if enabled else "TIMESTAMPS:OFF")
+    
+    def get_events(self, max_events=None, budget=None):
+        """Take every pending event (at most max_events), in order, without blocking.
+        
+        With a budget (s), events arriving while draining are taken too
+        until the budget is spent.
+        """
+        events = self.event_queue.get_batch(max_events)
+        if budget is not None:
+            deadline = time.monotonic() + budget
+            while events and time.monotonic() < deadline and (max_events is None or len(events) < max_events):
+                more = self.event_queue.get_batch(None if max_events is None else max_events - len(events))
+                if not more:
+                    break
+                events += more
+        for event in events:
+            stamp(event, 'dequeued')
+        return events
     
     def get_next_event(self):
         """Get the next event from the queue if available."""
         if not self.event_queue.empty():
-            return self.event_queue.get(block=False)
+            event = self.event_queue.get(block=False)
+            stamp(event, 'dequeued')
+            return event
         return None
\ No newline at end of file
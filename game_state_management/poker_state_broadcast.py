@@ -0,0 +1,253 @@
+import json
+import socket
+import time
+from collections import deque
+
+# Game -> spectator displays: one JSON object per line, e.g.
+#   {"type": "snapshot", "seq": 7, "state": {"phase": "flop", "pot": 30, ..., "seats": [{...}, ...]}}
+#   {"type": "delta", "seq": 8, "changes": {"pot": 50, "seats": {"2": {"stack": 980, ...}}}}
+# A delta holds the top-level fields that changed and the seats that changed
+# (by index) and turns the state at seq - 1 into the state at seq. A snapshot
+# is the whole state at seq; one is sent to each new subscriber, every
+# snapshot_interval seconds, and to a subscriber that fell behind.
+# Hole cards are never published.
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+
+def _encode(message):
+    return (json.dumps(message, separators=(',', ':')) + "\n").encode('utf-8')
+
+
+def game_state(game):
+    """The publicly visible state of a poker_logic.Game as a JSON-able dict."""
+    acted = getattr(game, 'players_acted', set())
+    return {
+        "phase": game.phase,
+        "pot": sum(game.game_pot.values()),
+        "current_bet": getattr(game, 'current_bet', 0),
+        "current_player": game.current_player,
+        "dealer": game.x,
+        "community": [str(card) for card in getattr(game, 'community', [])],
+        "seats": [{"stack": game.pots[seat], "bet": game.game_pot[seat],
+                   "active": seat in game.active_players, "acted": seat in acted}
+                  for seat in range(game.n)]
+    }
+
+
+def diff_state(old, new):
+    """Changes turning state old into state new (empty if they are equal)."""
+    changes = {key: value for key, value in new.items() if key != "seats" and old.get(key) != value}
+    old_seats = old.get("seats", [])
+    seats = {str(seat): value for seat, value in enumerate(new["seats"])
+             if seat >= len(old_seats) or old_seats[seat] != value}
+    if seats:
+        changes["seats"] = seats
+    return changes
+
+
+def apply_delta(state, changes):
+    """Apply a delta's changes to state (in place) and return it."""
+    for key, value in changes.items():
+        if key == "seats":
+            for seat, seat_state in value.items():
+                state["seats"][int(seat)] = seat_state
+        else:
+            state[key] = value
+    return state
+
+
+class _Subscriber:
+    """A spectator connection and the messages still to be sent to it."""
+    def __init__(self, conn, address):
+        self.conn = conn
+        self.address = address
+        self.pending = deque()
+        # Bytes of pending[0] already sent, and bytes pending in all
+        self.offset = 0
+        self.buffered = 0
+        self.resyncs = 0
+        # Whether the reactor is watching for the socket to drain
+        self.writing = False
+
+
+class StatePublisher:
+    """Broadcasts game state changes to spectator displays over TCP, on a Reactor.
+
+    publish() is called after each change; it sends nothing if the public
+    state did not change. Sends never block the loop: what a subscriber
+    cannot take at once is buffered and flushed when its socket becomes
+    writable. A subscriber with more than max_buffer bytes pending has its
+    queued deltas replaced by one snapshot, so a slow display skips ahead
+    rather than holding memory or the game.
+    """
+    def __init__(self, reactor, host='localhost', port=12346, snapshot_interval=5.0, max_buffer=256 * 1024,
+                 backlog=16):
+        self.reactor = reactor
+        self.snapshot_interval = snapshot_interval
+        self.max_buffer = max_buffer
+
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket.bind((host, port))
+        self.server_socket.listen(backlog)
+        self.server_socket.setblocking(False)
+        self.address = self.server_socket.getsockname()
+        reactor.register(self.server_socket, self._accept)
+
+        # Subscribers (socket -> _Subscriber)
+        self.subscribers = {}
+
+        # Last published state and its sequence number
+        self.state = None
+        self.seq = 0
+        self.closed = False
+        self._schedule_snapshot()
+
+    def publish(self, game):
+        """Publish the game's state if it changed since the last call."""
+        state = game_state(game)
+        if self.state is None:
+            self.state = state
+            self.seq += 1
+            self._broadcast(self._snapshot())
+            return
+        changes = diff_state(self.state, state)
+        if not changes:
+            return
+        self.state = state
+        self.seq += 1
+        self._broadcast(_encode({"type": DELTA, "seq": self.seq, "changes": changes}))
+
+    def _snapshot(self):
+        return _encode({"type": SNAPSHOT, "seq": self.seq, "state": self.state})
+
+    def _schedule_snapshot(self):
+        self.reactor.call_at(time.monotonic() + self.snapshot_interval, self._periodic_snapshot)
+
+    def _periodic_snapshot(self):
+        if self.closed:
+            return
+        if self.state is not None and self.subscribers:
+            self._broadcast(self._snapshot())
+        self._schedule_snapshot()
+
+    def _broadcast(self, message):
+        for subscriber in list(self.subscribers.values()):
+            self._send(subscriber, message)
+
+    def _send(self, subscriber, message):
+        if subscriber.buffered + len(message) > self.max_buffer:
+            # Too far behind: drop the queued messages (but not the rest of one
+            # half sent) and catch up from a snapshot instead
+            kept = [subscriber.pending[0]] if subscriber.offset else []
+            subscriber.pending = deque(kept)
+            subscriber.buffered = sum(len(data) for data in kept) - subscriber.offset
+            subscriber.resyncs += 1
+            message = self._snapshot()
+        subscriber.pending.append(message)
+        subscriber.buffered += len(message)
+        self._flush(subscriber.conn)
+
+    def _flush(self, conn):
+        subscriber = self.subscribers.get(conn)
+        if subscriber is None:
+            return
+        try:
+            while subscriber.pending:
+                data = subscriber.pending[0]
+                sent = conn.send(memoryview(data)[subscriber.offset:])
+                subscriber.offset += sent
+                subscriber.buffered -= sent
+                if subscriber.offset < len(data):
+                    break
+                subscriber.pending.popleft()
+                subscriber.offset = 0
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError as e:
+            print(f"Spectator {subscriber.address} dropped: {e}")
+            self._drop(conn)
+            return
+        # Wait for the socket to drain only while something is pending
+        writing = bool(subscriber.pending)
+        if writing != subscriber.writing:
+            self.reactor.set_writer(conn, self._flush if writing else None)
+            subscriber.writing = writing
+
+    def _accept(self, server_socket):
+        while True:
+            try:
+                conn, addr = server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"Error accepting spectator: {e}")
+                return
+            conn.setblocking(False)
+            subscriber = self.subscribers[conn] = _Subscriber(conn, addr)
+            self.reactor.register(conn, self._read)
+            print(f"Spectator connected from {addr}")
+            if self.state is not None:
+                self._send(subscriber, self._snapshot())
+
+    def _read(self, conn):
+        # Spectators only listen; anything read is discarded until they hang up
+        try:
+            while True:
+                data = conn.recv(4096)
+                if not data:
+                    print(f"Spectator {self.subscribers[conn].address} disconnected")
+                    self._drop(conn)
+                    return
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self._drop(conn)
+
+    def _drop(self, conn):
+        self.reactor.unregister(conn)
+        self.subscribers.pop(conn, None)
+        conn.close()
+
+    def close(self):
+        self.closed = True
+        for conn in list(self.subscribers):
+            self._drop(conn)
+        self.reactor.unregister(self.server_socket)
+        self.server_socket.close()
+
+
+class StateMirror:
+    """Spectator side: rebuilds the game state from the publisher's stream.
+
+    feed() takes received bytes and returns whether the state changed. A
+    delta that does not follow the current sequence number is ignored
+    until the next snapshot.
+    """
+    def __init__(self):
+        self.state = None
+        self.seq = None
+        self.gaps = 0
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        self._buffer += data
+        changed = False
+        while True:
+            end = self._buffer.find(b'\n')
+            if end < 0:
+                return changed
+            line = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+            message = json.loads(line)
+            if message.get("type") == SNAPSHOT:
+                self.state, self.seq = message["state"], message["seq"]
+                changed = True
+            elif message.get("type") == DELTA:
+                if self.state is None or message["seq"] != self.seq + 1:
+                    self.gaps += 1
+                    continue
+                apply_delta(self.state, message["changes"])
+                self.seq = message["seq"]
+                changed = True
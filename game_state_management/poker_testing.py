@@ -0,0 +1,70 @@
+"""Helpers shared by the test modules."""
+import os
+import pty
+import select
+import threading
+import tty
+
+from poker_signal_receiver import SignalProtocol
+
+
+def next_event(events, timeout=1):
+    """Next event from a queue that is not a CONNECTION state change."""
+    while True:
+        event = events.get(timeout=timeout)
+        if event['type'] != 'CONNECTION':
+            return event
+
+
+class FakeArduino:
+    """Pseudo-terminal that answers the ID command like one of the sketches.
+
+    A greeting is printed like a booting board's STATUS lines: again every
+    50 ms (for up to 2 s) until the ID command arrives, as opening the port
+    discards what was printed before.
+    """
+    def __init__(self, reply, greeting=None):
+        self.master, slave = pty.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self.reply = reply
+        self.greeting = greeting
+        self.closed = False
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        received = b""
+        greetings = 40 if self.greeting else 0
+        while b"ID\n" not in received and not self.closed:
+            try:
+                if greetings:
+                    greetings -= 1
+                    os.write(self.master, self.greeting)
+                if select.select([self.master], [], [], 0.05)[0]:
+                    received += os.read(self.master, 64)
+            except (OSError, ValueError):
+                return
+        if self.reply and not self.closed:
+            os.write(self.master, self.reply)
+
+    def write(self, data):
+        os.write(self.master, data)
+
+    def close(self):
+        # Stop serving before the fd number can be reused
+        self.closed = True
+        self.thread.join()
+        os.close(self.master)
+
+
+class RecordingProtocol(SignalProtocol):
+    """Parser that keeps the events it emits (and their stamps, separately)."""
+    def __init__(self, port='/dev/ttyUSB0'):
+        super().__init__(port)
+        self.events = []
+        self.stamps = []
+
+    def _emit(self, event):
+        self.stamps.append(event.pop('stamps'))
+        self.events.append(event)
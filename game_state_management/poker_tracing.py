@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Lightweight tracing of the card pipeline across the detector and the game.
+
+Spans (name, start, end, trace id) are recorded with time.monotonic_ns(),
+which is one clock for every process on the machine, into a fixed-size ring
+buffer per thread; nothing is locked or allocated beyond the span tuple.
+Each process dumps its spans to a JSON file, and merging the dumps gives a
+Chrome/Perfetto trace (chrome://tracing, ui.perfetto.dev) with the spans of
+one card linked by its trace id.
+
+Example:
+    python poker_tracing.py detector.trace.json game.trace.json -o pipeline.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# Spans kept per thread; older ones are overwritten
+DEFAULT_CAPACITY = 8192
+
+
+def new_trace_id():
+    """A random non-zero 32-bit trace id (it fits a shared-memory record)."""
+    return random.getrandbits(32) or 1
+
+
+class _Ring:
+    """One thread's spans."""
+    __slots__ = ('spans', 'count', 'thread_id', 'thread_name')
+
+    def __init__(self, capacity):
+        self.spans = [None] * capacity
+        self.count = 0
+        thread = threading.current_thread()
+        self.thread_id = threading.get_native_id()
+        self.thread_name = thread.name
+
+
+class _Span:
+    """Context manager recording a span when the block ends."""
+    __slots__ = ('tracer', 'name', 'trace_id', 'args', 'start')
+
+    def __init__(self, tracer, name, trace_id, args):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.monotonic_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.monotonic_ns(), self.trace_id, self.args)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """Records spans into per-thread ring buffers while enabled."""
+    def __init__(self, process_name=None, capacity=DEFAULT_CAPACITY):
+        self.process_name = process_name or os.path.basename(sys.argv[0] or "python")
+        self.capacity = capacity
+        self.enabled = False
+        self._local = threading.local()
+        # Every thread's ring (list.append is atomic)
+        self._rings = []
+
+    def enable(self, process_name=None):
+        if process_name is not None:
+            self.process_name = process_name
+        self.enabled = True
+
+    def _ring(self):
+        try:
+            return self._local.ring
+        except AttributeError:
+            ring = self._local.ring = _Ring(self.capacity)
+            self._rings.append(ring)
+            return ring
+
+    def record(self, name, start_ns, end_ns, trace_id=None, args=None):
+        """Record a span from monotonic_ns() start to end."""
+        if not self.enabled:
+            return
+        ring = self._ring()
+        ring.spans[ring.count % self.capacity] = (name, start_ns, end_ns, trace_id, args)
+        ring.count += 1
+
+    def span(self, name, trace_id=None, **args):
+        """Context manager recording the block as a span."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, trace_id, args or None)
+
+    def spans(self):
+        """All recorded spans as (thread id, thread name, span) in no particular order."""
+        result = []
+        for ring in list(self._rings):
+            count = ring.count
+            kept = min(count, self.capacity)
+            for i in range(count - kept, count):
+                span = ring.spans[i % self.capacity]
+                if span is not None:
+                    result.append((ring.thread_id, ring.thread_name, span))
+        return result
+
+    def dump(self, path):
+        """Write this process's spans to a JSON file for export_chrome_trace()."""
+        threads = {}
+        spans = []
+        for thread_id, thread_name, (name, start, end, trace_id, args) in self.spans():
+            threads[thread_id] = thread_name
+            spans.append([name, start, end, trace_id, thread_id, args])
+        with open(path, 'w') as f:
+            json.dump({"process": self.process_name, "pid": os.getpid(),
+                       "threads": threads, "spans": spans}, f)
+        print(f"{len(spans)} trace spans written to {path}")
+
+
+# Tracer of this process (disabled until enable() is called)
+TRACER = Tracer()
+
+
+class CardTrace:
+    """The trace of the card a detector is deciding on, from its first frame to the send.
+
+    start() begins a trace for a new candidate card and end() finishes it
+    once the card is sent; frames in between are recorded under its id,
+    and frames after it (the card still in view) under none, so a trace
+    only holds the frames that decided its card.
+    """
+    def __init__(self, tracer=TRACER):
+        self.tracer = tracer
+        self.trace_id = None
+        self.since_ns = 0
+        self._frame_trace_id = None
+
+    def start(self):
+        self.trace_id = new_trace_id()
+        self.since_ns = time.monotonic_ns()
+        return self.trace_id
+
+    def end(self):
+        self.trace_id = None
+
+    def begin_frame(self):
+        """Note the trace a frame starts in (before the frame is tracked)."""
+        self._frame_trace_id = self.trace_id
+
+    def record_frame(self, spans):
+        """Record a frame's (name, start_ns, end_ns) spans under the trace it
+        started, continued or ended."""
+        trace_id = self.trace_id or self._frame_trace_id
+        for name, start, end in spans:
+            self.tracer.record(name, start, end, trace_id)
+
+
+def chrome_trace(dumps):
+    """Merge span dumps (dicts from Tracer.dump) into Chrome trace events.
+
+    Spans become complete ("X") events in µs of the shared monotonic clock,
+    and the spans of each trace id are chained by flow events across
+    threads and processes.
+    """
+    events = []
+    traced = {}
+    for dump in dumps:
+        pid = dump["pid"]
+        events.append({"ph": "M", "name": "process_name", "pid": pid, "args": {"name": dump["process"]}})
+        for thread_id, thread_name in dump["threads"].items():
+            events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": int(thread_id),
+                           "args": {"name": thread_name}})
+        for name, start, end, trace_id, thread_id, args in dump["spans"]:
+            event = {"ph": "X", "name": name, "pid": pid, "tid": thread_id,
+                     "ts": start / 1000, "dur": (end - start) / 1000, "args": dict(args or {})}
+            if trace_id:
+                event["args"]["trace_id"] = trace_id
+                traced.setdefault(trace_id, []).append(event)
+            events.append(event)
+
+    # Flow arrows from each span of a card's trace to the next
+    for trace_id, spans in traced.items():
+        if len(spans) < 2:
+            continue
+        spans.sort(key=lambda event: event["ts"])
+        for i, span in enumerate(spans):
+            phase = "s" if i == 0 else "f" if i == len(spans) - 1 else "t"
+            flow = {"ph": phase, "name": "card", "cat": "trace", "id": trace_id,
+                    "pid": span["pid"], "tid": span["tid"], "ts": span["ts"]}
+            if phase != "s":
+                flow["bp"] = "e"
+            events.append(flow)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(paths, out_path):
+    """Merge the span dumps at paths into one Chrome trace JSON file."""
+    dumps = []
+    for path in paths:
+        with open(path) as f:
+            dumps.append(json.load(f))
+    with open(out_path, 'w') as f:
+        json.dump(chrome_trace(dumps), f)
+    print(f"Chrome trace of {len(dumps)} processes written to {out_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge span dumps into a Chrome/Perfetto trace')
+    parser.add_argument('dumps', nargs='+', help='Span dumps written with --trace by the detector and the game')
+    parser.add_argument('-o', '--output', default='pipeline.trace.json', help='Chrome trace file to write')
+    args = parser.parse_args()
+    export_chrome_trace(args.dumps, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import unittest
+
+from poker_detection_fusion import DetectionFusion, parse_views
+
+
+def detection(card, detector, timestamp, confidence=1.0):
+    return {"type": "card_detection", "card": card, "detector": detector, "timestamp": timestamp,
+            "confidence": confidence}
+
+
+class TestDetectionFusion(unittest.TestCase):
+    def test_single_camera(self):
+        """With one camera there is nothing to wait for"""
+        fusion = DetectionFusion()
+        fused, = fusion.add(detection("AS", "cam-left", 10.0), now=0.0)
+        self.assertEqual((fused['card'], fused['detectors'], fused['votes']), ("AS", ["cam-left"], 1))
+        self.assertIsNone(fusion.next_deadline)
+
+    def test_weighted_vote(self):
+        """A group waits for every active camera, then the most confident card total wins"""
+        fusion = DetectionFusion(window=0.1, views=parse_views("a,b,c"))
+        fusion.last_seen.update(a=0.0, b=0.0, c=0.0)
+
+        self.assertEqual(fusion.add(detection("AS", "a", 10.0, 0.6), now=1.0), [])
+        self.assertEqual(fusion.add(detection("AH", "b", 10.01, 0.9), now=1.01), [])
+        fused, = fusion.add(detection("AS", "c", 10.02, 0.5), now=1.02)
+        self.assertEqual(fused['card'], "AS")
+        self.assertEqual(fused['detectors'], ["a", "c"])
+        self.assertEqual(fused['timestamp'], 10.0)
+        self.assertAlmostEqual(fused['confidence'], 1.1 / 2.0)
+        self.assertFalse(fusion.groups)
+
+    def test_latency_budget(self):
+        """A missing camera is waited for only as long as it usually lags, plus the budget"""
+        fusion = DetectionFusion(window=0.2, latency_budget=0.005, lag_smoothing=1.0,
+                                 views=parse_views("fast,slow,new"))
+        fusion.add(detection("2C", "fast", 0.0), now=0.0)
+        fusion.add(detection("2C", "slow", 0.0), now=0.02)
+        self.assertAlmostEqual(fusion.lags["slow"], 0.02)
+
+        self.assertEqual(fusion.add(detection("KD", "fast", 5.0), now=5.0), [])
+        self.assertAlmostEqual(fusion.next_deadline, 5.025)
+        self.assertEqual(fusion.poll(now=5.02), [])
+        fused, = fusion.poll(now=5.025)
+        self.assertEqual((fused['card'], fused['votes']), ("KD", 1))
+
+        # A camera whose lag is not known yet is waited for at most the window
+        fusion.last_seen["new"] = 9.0
+        self.assertEqual(fusion.add(detection("QH", "fast", 9.0), now=9.0), [])
+        self.assertAlmostEqual(fusion.next_deadline, 9.2)
+
+    def test_distinct_cards(self):
+        """Different cards seen at the same time are emitted separately"""
+        fusion = DetectionFusion(window=0.1)
+        fusion.last_seen.update(a=0.0, b=0.0)
+        fused = fusion.add(detection("AS", "a", 100.0), now=1.0)
+        fused += fusion.add(detection("KD", "b", 100.02), now=1.02)
+        self.assertEqual(sorted(event['card'] for event in fused), ["AS", "KD"])
+        self.assertFalse(fusion.groups)
+
+        # One camera showing two cards in a row, with another camera of its view active
+        fusion = DetectionFusion(window=0.1, views=parse_views("a,b"))
+        fusion.last_seen.update(a=0.0, b=0.0)
+        self.assertEqual(fusion.add(detection("2H", "a", 200.0), now=2.0), [])
+        self.assertEqual(fusion.add(detection("3H", "a", 200.05), now=2.05), [])
+        self.assertEqual(len(fusion.groups), 2)
+        fused = fusion.poll(now=2.2)
+        self.assertEqual([event['card'] for event in fused], ["2H", "3H"])
+
+    def test_parse_views(self):
+        self.assertEqual(parse_views("a, b;c"), {"a": "view0", "b": "view0", "c": "view1"})
+
+    def test_duplicates(self):
+        """Late confirmations and repeats of an emitted card are suppressed"""
+        fusion = DetectionFusion(duplicate_window=2.0)
+        self.assertEqual(len(fusion.add(detection("JH", "a", 1.0), now=1.0)), 1)
+        fusion.last_seen["b"] = 1.0
+        self.assertEqual(fusion.add(detection("JH", "b", 1.03), now=1.03), [])
+        self.assertEqual(fusion.add(detection("JH", "a", 2.0), now=2.0), [])
+        self.assertEqual(fusion.suppressed, 2)
+        self.assertEqual(fusion.fused, 1)
+        # Shown again later it counts again
+        fusion.last_seen.pop("b")
+        self.assertEqual(len(fusion.add(detection("JH", "a", 5.0), now=5.0)), 1)
+
+    def test_bounded(self):
+        """Open groups and forgotten cameras stay bounded"""
+        fusion = DetectionFusion(window=0.01, max_groups=4, active_timeout=5.0)
+        fusion.last_seen["silent"] = 0.0
+        fusion.lags["silent"] = 1.0
+        fused = []
+        for i in range(20):
+            fused += fusion.add(detection(f"C{i}", "a", float(i) * 0.1), now=0.001 * i)
+        self.assertLessEqual(len(fusion.groups), 4)
+        self.assertEqual(len(fused) + len(fusion.groups), 20)
+
+        fusion.add(detection("X", "a", 100.0), now=10.0)
+        self.assertNotIn("silent", fusion.last_seen)
+        self.assertNotIn("silent", fusion.lags)
+
+
+if __name__ == '__main__':
+    unittest.main()
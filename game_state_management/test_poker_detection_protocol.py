@@ -0,0 +1,72 @@
+import random
+import socket
+import threading
+import time
+import unittest
+
+from poker_detection_protocol import DetectionDecoder, encode_detection, CARD_DETECTION
+
+
+class TestDetectionDecoder(unittest.TestCase):
+    def test_partial_and_batched_reads(self):
+        """Messages split across reads and several messages in one read all decode once"""
+        stream = b"".join(encode_detection(card, 1.0) for card in ("10H", "AS", "QD"))
+        decoder = DetectionDecoder()
+        cut = stream.index(b"AS") + 1
+        first = decoder.feed(stream[:cut])
+        second = decoder.feed(stream[cut:])
+        self.assertEqual([message['card'] for message in first + second], ["10H", "AS", "QD"])
+        self.assertEqual(first[0], {"type": CARD_DETECTION, "card": "10H", "timestamp": 1.0})
+        self.assertEqual(decoder.feed(b""), [])
+
+    def test_malformed_lines(self):
+        """Garbage lines and oversized partial messages are dropped without losing later messages"""
+        decoder = DetectionDecoder(max_line=100)
+        messages = decoder.feed(b"AS\n[1, 2]\n\n" + encode_detection("KC"))
+        self.assertEqual([message['card'] for message in messages], ["KC"])
+        self.assertEqual(decoder.errors, 2)
+        self.assertEqual(decoder.feed(b"x" * 200), [])
+        self.assertEqual(decoder.errors, 3)
+        self.assertEqual(decoder.feed(b"\n" + encode_detection("2D"))[0]['card'], "2D")
+
+    def test_throughput(self):
+        """Thousands of messages per second over a socket arrive complete and in order"""
+        count = 20000
+        cards = [f"{rank}{suit}" for rank in "23456789TJQKA" for suit in "CDHS"]
+        messages = [encode_detection(cards[i % len(cards)], float(i)) for i in range(count)]
+        sender, receiver = socket.socketpair()
+        self.addCleanup(sender.close)
+        self.addCleanup(receiver.close)
+
+        def send():
+            # Write in random sizes so messages get split and batched
+            rng = random.Random(0)
+            stream = b"".join(messages)
+            position = 0
+            while position < len(stream):
+                size = rng.randint(1, 4096)
+                sender.sendall(stream[position:position + size])
+                position += size
+            sender.shutdown(socket.SHUT_WR)
+
+        decoder = DetectionDecoder()
+        received = []
+        start = time.perf_counter()
+        thread = threading.Thread(target=send)
+        thread.start()
+        while True:
+            data = receiver.recv(65536)
+            if not data:
+                break
+            received += decoder.feed(data)
+        elapsed = time.perf_counter() - start
+        thread.join()
+
+        self.assertEqual(len(received), count)
+        self.assertEqual([message['timestamp'] for message in received], [float(i) for i in range(count)])
+        self.assertEqual(decoder.errors, 0)
+        self.assertGreater(count / elapsed, 5000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import time
+import asyncio
+
+from poker_dispenser import DispenserChannel
+from poker_logic import Game
+from poker_serial_manager import SerialManager
+from poker_serial_simulator import VirtualArduino
+from poker_signal_receiver import ROLE_DISPENSER
+
+
+class TestDispenserChannel(unittest.TestCase):
+    def setUp(self):
+        self.manager = SerialManager(ready_timeout=0)
+        self.arduino = VirtualArduino(ROLE_DISPENSER, ack_delay=0.05)
+        self.addCleanup(self.arduino.close)
+        self.dispenser = DispenserChannel(self.arduino.port, timeout=0.5, manager=self.manager)
+
+    def tearDown(self):
+        self.manager.close()
+
+    def test_pipelined_commands(self):
+        """Several commands are in flight at once and acked in order"""
+        start = time.monotonic()
+        futures = [self.dispenser.send_command(command) for command in ["P0", "P1", "P2", "P3"]]
+        self.assertLess(time.monotonic() - start, 0.05)
+        latencies = [future.result(timeout=2) for future in futures]
+        self.assertEqual(self.arduino.executed, ["P0", "P1", "P2", "P3"])
+        self.assertEqual(latencies, sorted(latencies))
+        self.assertEqual(list(self.dispenser.latency.percentiles()), ["P0", "P1", "P2", "P3"])
+
+    def test_timeout_per_command(self):
+        """The timeout starts when the previous command is done, not when it was sent"""
+        self.arduino.ack_delay = 0.3
+        futures = [self.dispenser.send_command("D1") for _ in range(3)]
+        for future in futures:
+            future.result(timeout=3)
+        self.assertEqual(self.dispenser.failures, 0)
+
+    def test_retry_after_lost_command(self):
+        """A lost command is resent, and a command that never acks fails"""
+        self.arduino.lose_commands = 1
+        self.dispenser.send_command("P1", timeout=0.2).result(timeout=2)
+        self.assertEqual(self.arduino.executed, ["P1"])
+
+        self.arduino.lose_commands = 2
+        with self.assertRaises(asyncio.TimeoutError):
+            self.dispenser.send_command("P2", timeout=0.1, retries=1).result(timeout=2)
+        self.assertEqual(self.dispenser.failures, 1)
+
+    def test_new_session_commands_run(self):
+        """The first command after a host restart runs on a board that was not reset"""
+        self.dispenser.send_command("P1").result(timeout=2)
+        self.manager.close()
+        time.sleep(0.01)
+        self.manager = SerialManager(ready_timeout=0)
+        dispenser = DispenserChannel(self.arduino.port, timeout=0.5, manager=self.manager)
+        dispenser.send_command("P1").result(timeout=2)
+        self.assertEqual(self.arduino.executed, ["P1", "P1"])
+
+    def test_game_deals_without_blocking(self):
+        """Game phases queue their deal on the dispenser and return at once"""
+        game = Game(4, 5, 1000)
+        game.dispenser = self.dispenser
+        game.start_game()
+        self.assertEqual(game.phase, "preflop")
+        game.advance_phase()
+        game.advance_phase()
+        game.advance_phase()
+        game.deal_future.result(timeout=2)
+        self.assertEqual(self.arduino.executed, ["P0", "P1", "P2", "P3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import itertools
+import random
+
+import numpy as np
+
+from poker_logic import Card, evaluate_hand, Game
+from poker_evaluator import best_scores, card_ids, category_name, evaluate_players
+
+
+def full_deck(ranks=range(1, 14)):
+    return [Card(suit, rank) for suit in ['H', 'D', 'S', 'C'] for rank in ranks]
+
+
+class TestHoldemEvaluator(unittest.TestCase):
+    def test_matches_seven_card_evaluation(self):
+        """Best-of-21 lookup agrees with evaluate_hand on random 7-card hands"""
+        rng = random.Random(0)
+        deck = full_deck()
+        for _ in range(500):
+            cards = rng.sample(deck, 7)
+            expected = evaluate_hand(cards).get_score()
+            score = evaluate_players([cards[:2]], cards[2:])[0]
+            self.assertEqual(score, expected)
+
+    def test_batch_of_boards(self):
+        """Several boards are evaluated for the same players in one call"""
+        rng = random.Random(1)
+        deck = full_deck()
+        cards = rng.sample(deck, 4 + 5 * 3)
+        hands = [cards[0:2], cards[2:4]]
+        boards = [cards[4 + 5 * i: 9 + 5 * i] for i in range(3)]
+        scores = best_scores([card_ids(hand) for hand in hands], [card_ids(board) for board in boards])
+        self.assertEqual(scores.shape, (3, 2))
+        for b, board in enumerate(boards):
+            for p, hand in enumerate(hands):
+                self.assertEqual(scores[b, p], evaluate_hand(hand + board).get_score())
+
+
+class TestOmahaEvaluator(unittest.TestCase):
+    def test_exactly_two_hole_cards(self):
+        """Four suited hole cards do not make a flush without 3 suited board cards"""
+        hand = [Card("H", 1), Card("H", 13), Card("H", 12), Card("H", 11)]
+        board = [Card("H", 2), Card("S", 7), Card("D", 9), Card("C", 4), Card("S", 3)]
+        score = evaluate_players([hand], board, 'omaha')[0]
+        self.assertEqual(category_name(score, 'omaha'), "no pair")
+
+    def test_matches_brute_force(self):
+        """Omaha scores match brute force over all 60 legal combinations"""
+        rng = random.Random(2)
+        deck = full_deck()
+        for _ in range(100):
+            cards = rng.sample(deck, 9)
+            hand, board = cards[:4], cards[4:]
+            expected = max(evaluate_hand(list(h) + list(b)).get_score()
+                           for h in itertools.combinations(hand, 2)
+                           for b in itertools.combinations(board, 3))
+            self.assertEqual(evaluate_players([hand], board, 'omaha')[0], expected)
+
+
+class TestShortDeckEvaluator(unittest.TestCase):
+    def test_ace_six_straight(self):
+        """A-6-7-8-9 is a straight in short deck"""
+        hand = [Card("H", 1), Card("S", 6)]
+        board = [Card("D", 7), Card("C", 8), Card("H", 9), Card("S", 13), Card("S", 12)]
+        score = evaluate_players([hand], board, 'short_deck')[0]
+        self.assertEqual(category_name(score, 'short_deck'), "straight")
+
+    def test_flush_beats_full_house(self):
+        """A flush beats a full house in short deck"""
+        board = [Card("H", 7), Card("H", 8), Card("H", 11), Card("S", 7), Card("D", 7)]
+        flush = [Card("H", 1), Card("H", 6)]
+        full_house = [Card("C", 11), Card("D", 11)]
+        scores = evaluate_players([flush, full_house], board, 'short_deck')
+        self.assertEqual(category_name(scores[0], 'short_deck'), "flush")
+        self.assertEqual(category_name(scores[1], 'short_deck'), "full house")
+        self.assertGreater(scores[0], scores[1])
+
+
+class TestRunItMultipleTimes(unittest.TestCase):
+    def make_game(self):
+        game = Game(3, 5, 1000)
+        game.hands = {
+            0: [Card("H", 1), Card("S", 1)],
+            1: [Card("H", 13), Card("S", 13)],
+            2: [Card("D", 2), Card("C", 7)],
+        }
+        game.community = [Card("C", 10), Card("D", 4), Card("S", 9)]
+        game.game_pot = {0: 300, 1: 300, 2: 101}
+        return game
+
+    def test_runouts_are_disjoint(self):
+        """Runouts share no cards with each other or the dealt cards"""
+        game = self.make_game()
+        boards = game.draw_runouts(4, np.random.default_rng(0))
+        self.assertEqual(boards.shape, (4, 5))
+        drawn = boards[:, 3:].ravel()
+        self.assertEqual(len(set(drawn.tolist())), drawn.size)
+        dealt = card_ids([card for hand in game.hands.values() for card in hand] + game.community)
+        self.assertFalse(np.isin(drawn, dealt).any())
+        self.assertTrue((boards[:, :3] == boards[0, :3]).all())
+
+    def test_pot_is_conserved(self):
+        """Every chip is awarded or reported as remainder over 1000 runouts"""
+        game = self.make_game()
+        result = game.decide_winner(runs=1000, rng=np.random.default_rng(1))
+        self.assertEqual(result["runs"], 1000)
+        self.assertEqual(len(result["hands"]), 1000)
+        won = sum(game.pots.values()) - 3000
+        self.assertEqual(won + result["remainder"], 701)
+        # Aces are the favourite against kings and a weak hand
+        self.assertGreater(result["amounts"][0], result["amounts"][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from poker_latency import LatencyMonitor, stamp
+from poker_testing import RecordingProtocol
+
+
+class TestLatencyMonitor(unittest.TestCase):
+    def test_stage_percentiles(self):
+        """Each stage transition and the total get their own percentiles"""
+        monitor = LatencyMonitor()
+        for i in range(100):
+            monitor.record({'type': 'HOLD', 'sensor': 1,
+                            'stamps': {'rx': 10.0, 'queued': 10.001, 'dequeued': 10.001 + i / 1000}})
+        stats = monitor.percentiles()
+        self.assertEqual(list(stats), ['rx->queued', 'queued->dequeued', 'total'])
+        self.assertAlmostEqual(stats['rx->queued'][0], 1.0)
+        self.assertAlmostEqual(stats['queued->dequeued'][0], 49.5)
+        self.assertAlmostEqual(stats['total'][2], 99.01, places=5)
+        self.assertEqual(stats['total'][3], 100)
+
+    def test_firmware_millis(self):
+        """Firmware millis on EVENT lines give a delay relative to the fastest event"""
+        protocol = RecordingProtocol()
+        protocol._feed(b"EVENT:SINGLE_TAP:2:5000\n", rx_time=100.0)
+        protocol._feed(b"EVENT:HOLD:2:6000\n", rx_time=101.004)
+        self.assertEqual(protocol.events[0], {'type': 'SINGLE_TAP', 'sensor': 2, 'fw_ms': 5000})
+
+        monitor = LatencyMonitor()
+        for event, stamps in zip(protocol.events, protocol.stamps):
+            event['stamps'] = stamps
+            stamp(event, 'dequeued')
+            monitor.record(event)
+        self.assertEqual(list(monitor.samples['firmware->rx']), [0.0, 4.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from poker_metrics import MetricsRegistry, MetricsServer
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_threads(self):
+        """Increments from many threads are all counted without a lock"""
+        counter = self.registry.counter("events_total", "Events")
+
+        def work():
+            for _ in range(10000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.value, 80000)
+        self.assertIs(self.registry.counter("events_total"), counter)
+
+    def test_exposition(self):
+        """Counters, gauges and histograms render in the text exposition format"""
+        self.registry.counter("frames_total", "Frames", labels={"camera": "left"}).inc(3)
+        self.registry.counter("frames_total", "Frames", labels={"camera": "right"}).inc()
+        depth = [4]
+        self.registry.gauge("queue_depth", "Queue depth", function=lambda: depth[0])
+        histogram = self.registry.histogram("latency_seconds", "Latency", buckets=(0.01, 0.1))
+        for value in (0.005, 0.05, 0.05, 2.0):
+            histogram.observe(value)
+
+        lines = self.registry.render().splitlines()
+        self.assertIn("# TYPE frames_total counter", lines)
+        self.assertIn('frames_total{camera="left"} 3', lines)
+        self.assertIn('frames_total{camera="right"} 1', lines)
+        self.assertEqual(lines.count("# TYPE frames_total counter"), 1)
+        self.assertIn("queue_depth 4", lines)
+        self.assertIn('latency_seconds_bucket{le="0.01"} 1', lines)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 3', lines)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn("latency_seconds_count 4", lines)
+        self.assertIn("latency_seconds_sum 2.105", lines)
+
+        with self.assertRaises(ValueError):
+            self.registry.gauge("frames_total", labels={"camera": "left"})
+
+    def test_hot_path_cost(self):
+        """Updating a counter and a histogram costs microseconds"""
+        counter = self.registry.counter("cost_total")
+        histogram = self.registry.histogram("cost_seconds")
+        count = 100000
+        start = time.perf_counter()
+        for i in range(count):
+            counter.inc()
+            histogram.observe(0.001)
+        self.assertLess((time.perf_counter() - start) / count, 20e-6)
+
+    def test_server(self):
+        """The endpoint serves the registry from its own thread"""
+        self.registry.counter("scrapes_total", "Scrapes").inc(2)
+        server = MetricsServer(self.registry, 'localhost', 0)
+        self.addCleanup(server.close)
+        host, port = server.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            self.assertTrue(response.headers['Content-Type'].startswith("text/plain; version=0.0.4"))
+            self.assertIn("scrapes_total 2", response.read().decode().splitlines())
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://{host}:{port}/other", timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
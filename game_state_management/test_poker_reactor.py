@@ -0,0 +1,161 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from poker_detection_protocol import encode_detection, encode_hello
+from poker_detector_server import DetectorServer
+from poker_reactor import Reactor
+from poker_serial_manager import SerialManager
+from poker_serial_simulator import VirtualArduino
+from poker_signal_receiver import PokerSignalReceiver
+
+
+class TestReactor(unittest.TestCase):
+    def setUp(self):
+        self.reactor = Reactor()
+        self.addCleanup(self.reactor.close)
+
+    def test_idle_wait(self):
+        """An idle loop blocks in select instead of spinning"""
+        start, cpu = time.monotonic(), time.process_time()
+        self.assertEqual(self.reactor.run_once(0.2), 0)
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertLess(time.process_time() - cpu, 0.05)
+
+    def test_schedule_wakes_loop(self):
+        """Work scheduled from another thread wakes a blocked loop, and a burst runs it at most twice"""
+        calls = []
+
+        def burst():
+            time.sleep(0.05)
+            for _ in range(100):
+                self.reactor.schedule(handler)
+
+        def handler():
+            calls.append(time.monotonic())
+
+        thread = threading.Thread(target=burst)
+        start = time.monotonic()
+        thread.start()
+        while not calls:
+            self.reactor.run_once(5)
+        self.assertLess(calls[0] - start, 1)
+        thread.join()
+        self.reactor.run_once(0)
+        self.assertLessEqual(len(calls), 2)
+
+    def test_call_at(self):
+        """A timer wakes the loop at its deadline, well before the select timeout"""
+        fired = []
+        deadline = time.monotonic() + 0.02
+        self.reactor.call_at(deadline, lambda: fired.append(time.monotonic()))
+        self.reactor.run_once(5)
+        self.assertEqual(len(fired), 1)
+        self.assertGreaterEqual(fired[0], deadline)
+        self.assertLess(fired[0] - deadline, 0.5)
+
+
+class TestDetectorServer(unittest.TestCase):
+    def setUp(self):
+        self.reactor = Reactor()
+        self.addCleanup(self.reactor.close)
+        self.received = []
+        self.server = DetectorServer(self.reactor, 'localhost', 0,
+                                     on_messages=lambda client, messages: self.received.extend(messages))
+        self.addCleanup(self.server.close)
+
+    def connect(self):
+        client = socket.create_connection(self.server.address)
+        self.addCleanup(client.close)
+        return client
+
+    def pump(self, condition, timeout=2):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            self.reactor.run_once(0.05)
+
+    def test_many_detectors(self):
+        """Every detector connection is read with its own decoder"""
+        first, second = self.connect(), self.connect()
+        message = encode_detection("AS", 1.0)
+        first.sendall(message[:10])
+        second.sendall(encode_detection("KD", 2.0))
+        self.pump(lambda: len(self.server.connections) == 2 and self.received)
+        first.sendall(message[10:])
+        self.pump(lambda: len(self.received) == 2)
+        self.assertEqual([message['card'] for message in self.received], ["KD", "AS"])
+
+        first.close()
+        self.pump(lambda: len(self.server.connections) == 1)
+        self.assertTrue(self.server.connected)
+
+    def test_identity_and_stats(self):
+        """Detectors are named by their hello, a reconnect replaces the stale connection, rates are tracked"""
+        stale = self.connect()
+        stale.sendall(encode_hello("cam-left"))
+        right = self.connect()
+        right.sendall(encode_hello("cam-right") + b"".join(encode_detection("AS", detector="cam-right")
+                                                            for _ in range(5)))
+        self.pump(lambda: len(self.received) == 5 and {client.name for client in self.server.clients}
+                  == {"cam-left", "cam-right"})
+
+        restarted = self.connect()
+        restarted.sendall(encode_hello("cam-left") + encode_detection("KD", detector="cam-left"))
+        self.pump(lambda: len(self.received) == 6 and len(self.server.connections) == 2)
+        self.assertEqual(stale.recv(1), b"")
+
+        stats = {entry['name']: entry for entry in self.server.stats()}
+        self.assertEqual(set(stats), {"cam-left", "cam-right"})
+        self.assertEqual(stats["cam-right"]['messages'], 5)
+        self.assertEqual(stats["cam-left"]['messages'], 1)
+        self.assertGreater(stats["cam-right"]['rate'], 0)
+        self.assertLess(stats["cam-left"]['last_seen'], 1)
+        self.assertEqual([message['detector'] for message in self.received], ["cam-right"] * 5 + ["cam-left"])
+
+    def test_unix_socket(self):
+        """A unix:/path host listens on a Unix domain socket, which is removed on close"""
+        path = os.path.join(tempfile.gettempdir(), f"poker_test_{os.getpid()}.sock")
+        server = DetectorServer(self.reactor, f"unix:{path}", None,
+                                on_messages=lambda client, messages: self.received.extend(messages))
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(client.close)
+        client.connect(path)
+        client.sendall(encode_hello("cam-unix") + encode_detection("JH", 1.0))
+        self.pump(lambda: self.received)
+        self.assertEqual([message['card'] for message in self.received], ["JH"])
+        self.assertEqual([client.name for client in server.clients], ["cam-unix"])
+        server.close()
+        self.assertFalse(os.path.exists(path))
+
+
+class TestArduinoWakeup(unittest.TestCase):
+    def test_events_wake_loop(self):
+        """Queued Arduino events wake a blocked loop without waiting for a frame"""
+        manager = SerialManager(ready_timeout=0)
+        self.addCleanup(manager.close)
+        arduino = VirtualArduino()
+        self.addCleanup(arduino.close)
+        reactor = Reactor()
+        self.addCleanup(reactor.close)
+        receiver = PokerSignalReceiver(arduino.port, manager=manager)
+        receiver.wait_connected(1)
+        receiver.get_events()
+
+        handled = []
+
+        def handle():
+            handled.extend(receiver.get_events())
+
+        receiver.notify = lambda: reactor.schedule(handle)
+        arduino.send(["EVENT:HOLD:2"])
+        sent = time.perf_counter()
+        reactor.run_once(5)
+        self.assertLess(time.perf_counter() - sent, 1)
+        self.assertEqual([event['type'] for event in handled], ['HOLD'])
+
+
+if __name__ == '__main__':
+    unittest.main()
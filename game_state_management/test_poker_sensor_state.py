@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from poker_sensor_state import SensorState, parse_seat_map, NO_SEAT
+from poker_serial_codec import encode_frame, FRAME_WEIGHT, FRAME_EVENT, EVENT_CODES
+from poker_testing import RecordingProtocol
+
+
+class TestSensorState(unittest.TestCase):
+    def test_seat_map(self):
+        """Sensors map to seats in O(1), unwired and unknown sensors to None"""
+        sensors = SensorState(12, parse_seat_map("1:1, 2:1, 3:2, 12:10"))
+        self.assertEqual([sensors.seat_of(sensor) for sensor in (1, 2, 3, 4, 12, 13, 0)],
+                         [1, 1, 2, None, 10, None, None])
+        self.assertEqual(sensors.seat[4], NO_SEAT)
+        self.assertEqual(SensorState(10).seat_of(10), 10)
+        with self.assertRaises(IndexError):
+            sensors.assign_seats({13: 1})
+
+    def test_batch_update(self):
+        """A batch stores the latest reading per sensor and reports settled weights in order"""
+        sensors = SensorState(10)
+        readings = np.array([[3, 25.0], [10, 5.0], [3, 25.0], [11, 99.0], [3, 25.0], [10, 6.0]])
+        settled = sensors.update_weights(readings[:, 0].astype(int), readings[:, 1], time=7.0)
+        self.assertEqual(settled, [(3, 25.0)])
+        self.assertEqual(sensors.weight[3], 25.0)
+        self.assertEqual(sensors.weight[10], 6.0)
+        self.assertEqual(sensors.filtered[3], 25.0)
+        self.assertEqual(sensors.last_time[10], 7.0)
+        self.assertTrue(np.isnan(sensors.filtered[5]))
+
+    def test_batch_events(self):
+        """A batch stores the latest event per sensor, unknown sensors and codes store nothing"""
+        sensors = SensorState(10)
+        codes = [EVENT_CODES['SINGLE_TAP'], EVENT_CODES['HOLD'], EVENT_CODES['DOUBLE_TAP'], 99, 1]
+        sensors.update_events([2, 2, 5, 7, 11], codes, time=3.0)
+        self.assertEqual([sensors.last_event_name(sensor) for sensor in (2, 5, 7)], ['HOLD', 'DOUBLE_TAP', None])
+        self.assertEqual(sensors.last_time[5], 3.0)
+        self.assertTrue(np.isnan(sensors.last_time[1]))
+
+    def test_binary_frames_beyond_four_sensors(self):
+        """Frames of a 10 sensor table land in the store, frames of unknown sensors are ignored"""
+        protocol = RecordingProtocol()
+        protocol.sensors = SensorState(10)
+        protocol._feed(b"STATUS:MODE:BINARY\r\n"
+                       + b"".join(encode_frame(FRAME_WEIGHT, sensor, 1500, sensor) for sensor in (9, 9, 9, 11))
+                       + encode_frame(FRAME_EVENT, 10, EVENT_CODES['HOLD'], 12)
+                       + encode_frame(FRAME_EVENT, 12, EVENT_CODES['HOLD'], 13))
+        self.assertEqual(protocol.events, [{'type': 'WEIGHT', 'sensor': 9, 'value': 15.0},
+                                           {'type': 'HOLD', 'sensor': 10}])
+        self.assertEqual(protocol.last_events[10], 'HOLD')
+        self.assertIsNone(protocol.last_events[9])
+
+
+if __name__ == '__main__':
+    unittest.main()
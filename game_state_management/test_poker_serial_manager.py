@@ -0,0 +1,95 @@
+import unittest
+import time
+import queue
+
+from poker_serial_manager import SerialManager, port_for_role
+from poker_signal_receiver import PokerSignalReceiver, ROLE_SENSOR, ROLE_DISPENSER
+from poker_testing import FakeArduino, next_event
+
+
+class TestSerialManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = SerialManager(ready_timeout=0)
+
+    def tearDown(self):
+        self.manager.close()
+
+    def fake_arduino(self, reply=None, greeting=None):
+        # Closed after the manager (cleanups run after tearDown)
+        device = FakeArduino(reply, greeting)
+        self.addCleanup(device.close)
+        return device
+
+    def test_detect_roles_by_handshake(self):
+        """Ports are identified from their ID reply, silent ports are dropped"""
+        sensor = self.fake_arduino(b"ID:SENSOR\r\n")
+        dispenser = self.fake_arduino(b"ID:DISPENSER\r\n")
+        silent = self.fake_arduino()
+        roles = self.manager.detect([sensor.port, dispenser.port, silent.port], timeout=1)
+        self.assertEqual(roles, {sensor.port: ROLE_SENSOR, dispenser.port: ROLE_DISPENSER})
+        self.assertEqual(port_for_role(roles, ROLE_DISPENSER), dispenser.port)
+        self.assertIsNone(self.manager.device(silent.port))
+
+    def test_detect_dispenser_printing_status(self):
+        """A dispenser announcing STATUS:READY at boot is still asked for its role"""
+        dispenser = self.fake_arduino(b"ID:DISPENSER\r\n", greeting=b"STATUS:READY\r\n")
+        sensor = self.fake_arduino(b"ID:SENSOR\r\n", greeting=b"STATUS:STARTING\r\n")
+        roles = self.manager.detect([dispenser.port, sensor.port], timeout=1)
+        self.assertEqual(roles, {dispenser.port: ROLE_DISPENSER, sensor.port: ROLE_SENSOR})
+
+    def test_detect_async(self):
+        """Background detection returns at once and reports each role as it is found"""
+        sensor = self.fake_arduino(b"ID:SENSOR\r\n")
+        silent = self.fake_arduino()
+        found = queue.Queue()
+        start = time.monotonic()
+        detection = self.manager.detect_async([sensor.port, silent.port], timeout=1,
+                                              on_role=lambda port, role: found.put((port, role)))
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(found.get(timeout=1), (sensor.port, ROLE_SENSOR))
+        self.assertFalse(detection.done())
+        self.assertEqual(detection.result(2), {sensor.port: ROLE_SENSOR})
+        self.assertIsNone(self.manager.device(silent.port))
+
+    def test_devices_share_one_reader(self):
+        """Several receivers are read by the manager's thread and routed by role"""
+        tables = [self.fake_arduino() for _ in range(3)]
+        receivers = [PokerSignalReceiver(table.port, role=ROLE_SENSOR, manager=self.manager) for table in tables]
+        self.assertTrue(all(receiver.processing_thread is self.manager.thread for receiver in receivers))
+        self.assertTrue(all(receiver.wait_connected(1) for receiver in receivers))
+
+        routed = queue.Queue()
+        self.manager.on(ROLE_DISPENSER, lambda device, event: routed.put((device.port, event)))
+        dispenser = self.fake_arduino()
+        device = self.manager.add_device(dispenser.port, role=ROLE_DISPENSER)
+        self.manager.call(device.wait_connected(1))
+
+        for sensor, table in enumerate(tables, start=1):
+            table.write(f"EVENT:SINGLE_TAP:{sensor}\r\n".encode())
+        dispenser.write(b"ack\r\nEVENT:HOLD:2\r\n")
+
+        for sensor, receiver in enumerate(receivers, start=1):
+            event = next_event(receiver.event_queue)
+            event.pop('stamps')
+            self.assertEqual(event, {'type': 'SINGLE_TAP', 'sensor': sensor})
+        port, event = routed.get(timeout=1)
+        while event['type'] == 'CONNECTION':
+            port, event = routed.get(timeout=1)
+        event.pop('stamps')
+        self.assertEqual((port, event), (dispenser.port, {'type': 'HOLD', 'sensor': 2}))
+
+
+    def test_startup_does_not_block(self):
+        """Creating a receiver for a missing port returns at once and keeps retrying"""
+        start = time.monotonic()
+        receiver = PokerSignalReceiver('/dev/does-not-exist', manager=self.manager)
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertFalse(receiver.wait_connected(0.2))
+        states = []
+        while not receiver.event_queue.empty():
+            states.append(receiver.event_queue.get_nowait()['state'])
+        self.assertEqual(states[:2], ['connecting', 'disconnected'])
+
+
+if __name__ == "__main__":
+    unittest.main()
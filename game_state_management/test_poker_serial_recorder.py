@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+import unittest
+
+from poker_serial_manager import SerialManager
+from poker_serial_recorder import SerialRecorder, ReplaySource, read_recording
+from poker_serial_simulator import VirtualArduino
+from poker_signal_receiver import PokerSignalReceiver
+from poker_testing import RecordingProtocol, next_event
+
+
+class TestSerialRecorder(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'session.psrec')
+
+    def test_round_trip(self):
+        """Reads come back with their relative times, a cut off last record is dropped"""
+        recorder = SerialRecorder(self.path)
+        recorder.write(100.0, b"WEIGHT:1:0.3\r\n")
+        recorder.write(100.25, b"EVENT:HOLD:2\r\n")
+        recorder.write(100.5, b"x" * 70000)
+        recorder.close()
+        reads = list(read_recording(self.path))
+        self.assertEqual(reads[:2], [(0.0, b"WEIGHT:1:0.3\r\n"), (0.25, b"EVENT:HOLD:2\r\n")])
+        self.assertEqual(b"".join(data for _, data in reads[2:]), b"x" * 70000)
+
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        self.assertEqual(len(list(read_recording(self.path))), 3)
+
+    def test_replay_speed(self):
+        """Replay keeps the recorded gaps, scaled by the speed"""
+        recorder = SerialRecorder(self.path)
+        recorder.write(0.0, b"EVENT:SINGLE_TAP:1\r\n")
+        recorder.write(0.4, b"EVENT:DOUBLE_TAP:1\r\n")
+        recorder.close()
+        for speed, low, high in ((4, 0.09, 0.3), (None, 0, 0.05)):
+            start = time.perf_counter()
+            protocol = RecordingProtocol()
+            self.assertEqual(ReplaySource(self.path, speed).feed(protocol), 2)
+            self.assertTrue(low <= time.perf_counter() - start < high)
+            self.assertEqual([event['type'] for event in protocol.events], ['SINGLE_TAP', 'DOUBLE_TAP'])
+
+    def test_record_and_replay_session(self):
+        """A recorded session replays into the same events, directly or through a virtual Arduino"""
+        manager = SerialManager(ready_timeout=0)
+        self.addCleanup(manager.close)
+        arduino = VirtualArduino()
+        self.addCleanup(arduino.close)
+        receiver = PokerSignalReceiver(arduino.port, manager=manager, record=self.path)
+        receiver.wait_connected(5)
+        arduino.send(["WEIGHT:2:30.0"] * 5 + ["EVENT:TAP_START:3", "EVENT:HOLD:3"])
+        live = [next_event(receiver.event_queue) for _ in range(2)]
+        receiver.disconnect()
+        for event in live:
+            del event['stamps']
+
+        protocol = RecordingProtocol()
+        ReplaySource(self.path, speed=None).feed(protocol)
+        self.assertEqual(protocol.events, live)
+
+        replay_arduino = VirtualArduino()
+        self.addCleanup(replay_arduino.close)
+        replayed = PokerSignalReceiver(replay_arduino.port, manager=manager)
+        replayed.wait_connected(5)
+        replay_arduino.replay(ReplaySource(self.path, speed=10))
+        events = [next_event(replayed.event_queue) for _ in range(2)]
+        for event in events:
+            del event['stamps']
+        self.assertEqual(events, live)
+        self.assertEqual(len(replay_arduino.tap_times), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
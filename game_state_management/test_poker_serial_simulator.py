@@ -0,0 +1,145 @@
+import unittest
+import time
+
+from poker_serial_manager import SerialManager
+from poker_serial_simulator import VirtualArduino
+from poker_signal_receiver import PokerSignalReceiver, ROLE_SENSOR, ROLE_DISPENSER
+from benchmark_signal_receiver import run_benchmark
+from poker_testing import FakeArduino, next_event
+
+
+class TestVirtualArduino(unittest.TestCase):
+    def setUp(self):
+        self.manager = SerialManager(ready_timeout=0)
+
+    def tearDown(self):
+        self.manager.close()
+
+    def virtual_arduino(self, role=ROLE_SENSOR):
+        arduino = VirtualArduino(role)
+        self.addCleanup(arduino.close)
+        return arduino
+
+    def test_handshake_and_commands(self):
+        """The simulator identifies itself and answers like the sketches"""
+        sensor = self.virtual_arduino(ROLE_SENSOR)
+        dispenser = self.virtual_arduino(ROLE_DISPENSER)
+        roles = self.manager.detect([sensor.port, dispenser.port], timeout=1)
+        self.assertEqual(roles, {sensor.port: ROLE_SENSOR, dispenser.port: ROLE_DISPENSER})
+
+        receiver = PokerSignalReceiver(sensor.port, manager=self.manager)
+        receiver.send_command("P0")
+        receiver.tare_scale(2)
+        sensor.send(["EVENT:TAP_START:3", "EVENT:DOUBLE_TAP:3"])
+        event = next_event(receiver.event_queue)
+        self.assertEqual(list(event.pop('stamps')), ['rx', 'queued'])
+        self.assertEqual(event, {'type': 'DOUBLE_TAP', 'sensor': 3})
+        self.assertEqual(sensor.commands, ["ID", "P0", "TARE:2"])
+
+        receiver.enable_timestamps()
+        while "TIMESTAMPS:ON" not in sensor.commands:
+            time.sleep(0.01)
+        sensor.send(["EVENT:HOLD:1"])
+        self.assertIn('fw_ms', next_event(receiver.event_queue))
+
+    def test_binary_traffic(self):
+        """Messages are sent as frames once the receiver asks for binary mode"""
+        arduino = self.virtual_arduino()
+        receiver = PokerSignalReceiver(arduino.port, binary=True, manager=self.manager)
+        receiver.wait_connected(1)
+        deadline = time.monotonic() + 1
+        while not receiver.receiver.binary and time.monotonic() < deadline:
+            time.sleep(0.01)
+        arduino.send(["EVENT:HOLD:4"])
+        event = next_event(receiver.event_queue)
+        event.pop('stamps')
+        self.assertEqual(event, {'type': 'HOLD', 'sensor': 4})
+        self.assertTrue(arduino.binary)
+        self.assertEqual(receiver.dropped_frames, 0)
+
+    def test_detected_port_takes_link_settings(self):
+        """A receiver on a port detect() opened in text mode still gets binary frames and the fast baud rate"""
+        arduino = self.virtual_arduino()
+        self.assertEqual(self.manager.detect([arduino.port], timeout=1), {arduino.port: ROLE_SENSOR})
+        receiver = PokerSignalReceiver(arduino.port, binary=True, fast_baud=115200, manager=self.manager)
+        self.assertTrue(receiver.wait_connected(1))
+        deadline = time.monotonic() + 2
+        while not receiver.receiver.binary and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual((arduino.baud, receiver.receiver.active_baud), (115200, 115200))
+        self.assertTrue(arduino.binary)
+        arduino.send(["EVENT:HOLD:4"])
+        event = next_event(receiver.event_queue)
+        event.pop('stamps')
+        self.assertEqual(event, {'type': 'HOLD', 'sensor': 4})
+        self.assertEqual(arduino.commands.count("MODE:BINARY"), 1)
+
+    def test_telemetry_settings(self):
+        """Interval and deadband settings reach the board and a stack still settles through the deadband"""
+        arduino = self.virtual_arduino()
+        receiver = PokerSignalReceiver(arduino.port, manager=self.manager)
+        receiver.wait_connected(1)
+        self.assertTrue(receiver.set_print_interval(50))
+        self.assertTrue(receiver.set_deadband(2.0))
+        receiver.set_deadband(0.5, sensor_num=3)
+        while "DEADBAND:3:0.5" not in arduino.commands:
+            time.sleep(0.01)
+        self.assertEqual(arduino.print_interval, 50)
+        self.assertEqual(arduino.deadbands, {1: 2.0, 2: 2.0, 3: 0.5, 4: 2.0})
+        self.assertEqual(list(receiver.receiver.settings.values()), ["INTERVAL:50", "DEADBAND:2.0", "DEADBAND:3:0.5"])
+
+        noise = [0.0, 0.3, -0.2, 0.1, -0.3, 0.2] * 5
+        arduino.send([f"WEIGHT:1:{value:.2f}" for value in noise])
+        arduino.send([f"WEIGHT:1:{50 + value:.2f}" for value in noise])
+        event = next_event(receiver.event_queue)
+        self.assertEqual((event['type'], event['sensor']), ('WEIGHT', 1))
+        self.assertAlmostEqual(event['value'], 50.0, delta=0.5)
+        self.assertGreater(arduino.suppressed, 40)
+
+    def test_baud_negotiation(self):
+        """The link switches to the faster rate, or stays put when the firmware does not answer"""
+        arduino = self.virtual_arduino()
+        receiver = PokerSignalReceiver(arduino.port, manager=self.manager, fast_baud=115200)
+        self.assertTrue(receiver.wait_connected(2))
+        self.assertEqual(arduino.baud, 115200)
+        self.assertEqual(receiver.receiver.active_baud, 115200)
+        self.assertEqual(receiver.receiver.ser.baudrate, 115200)
+        arduino.send(["EVENT:SINGLE_TAP:2"])
+        self.assertEqual(next_event(receiver.event_queue)['type'], 'SINGLE_TAP')
+
+        old_firmware = FakeArduino(b"ID:SENSOR\r\n")
+        self.addCleanup(old_firmware.close)
+        receiver = PokerSignalReceiver(old_firmware.port, manager=self.manager, fast_baud=115200)
+        self.assertTrue(receiver.wait_connected(3))
+        self.assertEqual(receiver.receiver.active_baud, 9600)
+
+    def test_get_events(self):
+        """A burst is drained in one call, up to the max count, stamped as dequeued"""
+        arduino = self.virtual_arduino()
+        receiver = PokerSignalReceiver(arduino.port, manager=self.manager)
+        receiver.wait_connected(1)
+        arduino.send([f"EVENT:SINGLE_TAP:{1 + i % 4}" for i in range(20)])
+        deadline = time.monotonic() + 1
+        while receiver.event_queue.qsize() < 22 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        first = receiver.get_events(max_events=5)
+        rest = receiver.get_events(budget=0.01)
+        self.assertEqual(len(first), 5)
+        self.assertEqual(len(first + rest), 22)
+        taps = [event for event in first + rest if event['type'] == 'SINGLE_TAP']
+        self.assertEqual([event['sensor'] for event in taps], [1 + i % 4 for i in range(20)])
+        self.assertTrue(all('dequeued' in event['stamps'] for event in taps))
+        self.assertEqual(receiver.get_events(), [])
+
+
+class TestReceiverLoad(unittest.TestCase):
+    def test_no_messages_dropped(self):
+        """Every message of a short high-rate run is received"""
+        result = run_benchmark(rate=5000, duration=0.5, tap_ratio=0.1)
+        self.assertGreater(result['sent'], 1000)
+        self.assertEqual(result['dropped'], 0)
+        self.assertEqual(result['taps_received'], result['taps_sent'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from poker_settlement import build_layers, settle_pots
+
+
+class TestSidePots(unittest.TestCase):
+    def test_layers(self):
+        """Layers are built from sorted contributions"""
+        levels, amounts = build_layers([100, 30, 100, 60])
+        self.assertEqual(levels.tolist(), [30, 60, 100, 100])
+        self.assertEqual(amounts.tolist(), [120, 90, 80, 0])
+
+    def test_short_all_in_wins_main_pot_only(self):
+        """A short all-in can only win what each opponent matched"""
+        awards, remainder = settle_pots([50, 200, 200], [900, 500, 100], [True, True, True])
+        self.assertEqual(awards.tolist(), [150, 300, 0])
+        self.assertEqual(remainder, 0)
+
+    def test_folded_player_money_stays_in_pot(self):
+        """Folded contributions are won but folded players cannot win"""
+        awards, remainder = settle_pots([100, 40, 100], [999, 10, 20], [False, True, True])
+        self.assertEqual(awards.tolist(), [0, 0, 240])
+
+    def test_uncontested_layer_is_refunded(self):
+        """Chips above every active player's stack go back to their owner"""
+        awards, remainder = settle_pots([300, 100, 100], [5, 10, 1], [False, True, True])
+        self.assertEqual(awards.tolist(), [200, 300, 0])
+
+    def test_tie_split_and_remainder(self):
+        """Tied winners split a layer and odd chips are reported"""
+        awards, remainder = settle_pots([35, 35, 35], [7, 7, 1], [True, True, True])
+        self.assertEqual(awards.tolist(), [52, 52, 0])
+        self.assertEqual(remainder, 1)
+
+    def test_runouts(self):
+        """A pot split over runouts goes half to each runout winner"""
+        scores = [[10, 20], [20, 10]]
+        awards, remainder = settle_pots([100, 100], scores, [True, True])
+        self.assertEqual(awards.tolist(), [100, 100])
+
+    def test_batch_matches_single_tables(self):
+        """Settling many tables at once matches settling them one by one"""
+        rng = np.random.default_rng(0)
+        contributions = rng.integers(0, 500, size=(200, 6))
+        scores = rng.integers(0, 5, size=(200, 6))
+        active = rng.random((200, 6)) < 0.7
+        awards, remainder = settle_pots(contributions, scores, active)
+        for t in range(200):
+            single, single_remainder = settle_pots(contributions[t], scores[t], active[t])
+            self.assertEqual(awards[t].tolist(), single.tolist())
+            self.assertEqual(remainder[t], single_remainder)
+        # No chips are created or lost
+        np.testing.assert_array_equal(awards.sum(axis=1) + remainder, contributions.sum(axis=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+import time
+import unittest
+
+from poker_detection_protocol import CARD_DETECTION
+from poker_reactor import Reactor
+from poker_shm_transport import LABEL_SIZE, ShmDetectionReader, ShmDetectionWriter, writer_lock_path
+
+
+def write_detections(name, count):
+    writer = ShmDetectionWriter("cam-proc", name)
+    for i in range(count):
+        writer.write("AS", 0.95, float(i))
+    writer.close()
+
+
+class TestShmTransport(unittest.TestCase):
+    def setUp(self):
+        self.name = f"poker_test_{os.getpid()}_{id(self)}"
+        self.addCleanup(lambda: os.path.exists(writer_lock_path(self.name)) and os.unlink(writer_lock_path(self.name)))
+        self.reactor = Reactor()
+        self.addCleanup(self.reactor.close)
+        self.received = []
+
+    def open_reader(self, capacity=64):
+        reader = ShmDetectionReader(self.reactor, self.name, capacity=capacity,
+                                    on_messages=lambda client, messages: self.received.extend(messages))
+        self.addCleanup(reader.close)
+        return reader
+
+    def pump(self, condition, timeout=2):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            self.reactor.run_once(0.05)
+
+    def test_detections_wake_loop(self):
+        """A written record wakes a blocked loop and arrives as a card_detection message"""
+        reader = self.open_reader()
+        writer = ShmDetectionWriter("cam-left", self.name)
+        self.addCleanup(writer.close)
+        self.assertTrue(writer.write("10H", 0.9, 123.0, trace_id=42))
+        sent = time.perf_counter()
+        self.reactor.run_once(5)
+        self.assertLess(time.perf_counter() - sent, 1)
+
+        message, = self.received
+        self.assertEqual({key: message[key] for key in ("type", "card", "timestamp", "detector")},
+                         {"type": CARD_DETECTION, "card": "10H", "timestamp": 123.0, "detector": "cam-left"})
+        self.assertAlmostEqual(message['confidence'], 0.9, places=5)
+        self.assertEqual(message['trace'], 42)
+        self.assertEqual([stats['name'] for stats in reader.stats()], ["cam-left"])
+
+    def test_long_labels(self):
+        """Card and detector names up to LABEL_SIZE bytes arrive whole; longer ones are refused"""
+        reader = self.open_reader()
+        writer = ShmDetectionWriter("raspberrypi-overhead-camera-0", self.name)
+        self.addCleanup(writer.close)
+        self.assertTrue(writer.write("queen_of_diamonds", 0.9))
+        self.assertTrue(writer.write("ü" * (LABEL_SIZE // 2), 0.9))
+        with self.assertRaises(ValueError):
+            writer.write("x" * (LABEL_SIZE + 1))
+        with self.assertRaises(ValueError):
+            ShmDetectionWriter("d" * (LABEL_SIZE + 1), self.name)
+        messages = reader.poll()
+        self.assertEqual([message['card'] for message in messages], ["queen_of_diamonds", "ü" * (LABEL_SIZE // 2)])
+        self.assertEqual({message['detector'] for message in messages}, {"raspberrypi-overhead-camera-0"})
+
+    def test_single_writer(self):
+        """A second detector cannot write to a ring another one holds"""
+        reader = self.open_reader()
+        first = ShmDetectionWriter("cam-left", self.name)
+        self.addCleanup(first.close)
+        second = ShmDetectionWriter("cam-right", self.name, retry_interval=0)
+        self.addCleanup(second.close)
+        self.assertTrue(first.write("AS"))
+        self.assertFalse(second.write("KD"))
+        self.assertEqual([message['card'] for message in reader.poll()], ["AS"])
+        # Once the first one is gone the ring is free
+        first.close()
+        self.assertTrue(second.write("KD"))
+        self.assertEqual([message['detector'] for message in reader.poll()], ["cam-right"])
+
+    def test_overrun(self):
+        """A detector that laps the game overwrites the oldest records and they are counted lost"""
+        reader = self.open_reader(capacity=8)
+        writer = ShmDetectionWriter("cam-left", self.name)
+        self.addCleanup(writer.close)
+        for i in range(20):
+            writer.write(f"C{i}", 1.0)
+        self.assertEqual([message['card'] for message in reader.poll()], [f"C{i}" for i in range(12, 20)])
+        self.assertEqual(reader.lost, 12)
+        self.assertEqual(writer.overwritten, 12)
+        self.assertEqual(reader.poll(), [])
+
+    def test_writer_before_game(self):
+        """A detector started before the game attaches once the ring exists"""
+        writer = ShmDetectionWriter("cam-left", self.name, retry_interval=0)
+        self.addCleanup(writer.close)
+        self.assertFalse(writer.write("AS"))
+        self.open_reader()
+        self.assertTrue(writer.write("KD"))
+        self.pump(lambda: self.received)
+        self.assertEqual([message['card'] for message in self.received], ["KD"])
+
+    def test_other_process(self):
+        """Records from a detector process arrive complete and in order"""
+        count = 2000
+        reader = self.open_reader(capacity=count)
+        process = multiprocessing.get_context('spawn').Process(target=write_detections, args=(self.name, count))
+        process.start()
+        self.pump(lambda: len(self.received) == count, timeout=20)
+        process.join(5)
+        self.assertEqual([message['timestamp'] for message in self.received], [float(i) for i in range(count)])
+        self.assertEqual(reader.lost, 0)
+        # The detector's exit leaves the game's ring in place
+        self.assertEqual(reader.poll(), [])
+        self.assertEqual(reader.stats()[0]['messages'], count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+import unittest
+import time
+import asyncio
+import os
+import pty
+import tty
+
+from poker_signal_receiver import AsyncPokerSignalReceiver, CONNECTING
+from poker_signal_filter import CoalescingEventQueue, coalesce_events
+from poker_serial_codec import (FrameDecoder, encode_frame, FRAME_WEIGHT, FRAME_EVENT, EVENT_CODES,
+                                FRAME_SIZE)
+from poker_testing import RecordingProtocol
+
+
+class TestSignalProtocol(unittest.TestCase):
+    def test_partial_and_batched_lines(self):
+        """Lines split across reads or batched in one read are all processed"""
+        protocol = RecordingProtocol()
+        protocol._feed(b"EVENT:SINGLE_TAP:1\r\nEVENT:DOUBLE_")
+        protocol._feed(b"TAP:2\r\nEVENT:HOLD:3\r\nWEIGHT:4:")
+        self.assertEqual(protocol.events, [
+            {'type': 'SINGLE_TAP', 'sensor': 1},
+            {'type': 'DOUBLE_TAP', 'sensor': 2},
+            {'type': 'HOLD', 'sensor': 3},
+        ])
+        self.assertEqual(bytes(protocol._rx_buffer), b"WEIGHT:4:")
+
+    def test_settled_weight_is_reported_once(self):
+        """A chip stack being placed produces one WEIGHT event once it settles"""
+        protocol = RecordingProtocol()
+        readings = [0.1, -0.2, 8.0, 21.5, 37.0, 49.6, 50.2, 49.9, 50.1, 50.0, 49.8, 50.1, 50.0, 0.3]
+        protocol._feed(b"".join(f"WEIGHT:1:{value}\n".encode() for value in readings))
+        self.assertEqual(len(protocol.events), 1)
+        self.assertEqual(protocol.events[0]['type'], 'WEIGHT')
+        self.assertAlmostEqual(protocol.events[0]['value'], 50.0, delta=0.3)
+        self.assertEqual(protocol.weights[1], 0.3)
+
+
+class TestCoalescingEventQueue(unittest.TestCase):
+    def test_latest_weight_wins(self):
+        """Pending WEIGHT events per sensor collapse into the newest value"""
+        events = CoalescingEventQueue()
+        events.put({'type': 'WEIGHT', 'sensor': 1, 'value': 10.0})
+        events.put({'type': 'DOUBLE_TAP', 'sensor': 2})
+        for value in range(100):
+            events.put({'type': 'WEIGHT', 'sensor': 1, 'value': float(value)})
+            events.put({'type': 'WEIGHT', 'sensor': 3, 'value': float(value)})
+        self.assertEqual(events.qsize(), 3)
+        self.assertEqual(events.get_nowait(), {'type': 'WEIGHT', 'sensor': 1, 'value': 99.0})
+        self.assertEqual(events.get_nowait(), {'type': 'DOUBLE_TAP', 'sensor': 2})
+        self.assertEqual(events.get_nowait(), {'type': 'WEIGHT', 'sensor': 3, 'value': 99.0})
+        self.assertTrue(events.empty())
+        events.put({'type': 'WEIGHT', 'sensor': 1, 'value': 5.0})
+        self.assertEqual(events.qsize(), 1)
+
+    def test_batch_drain(self):
+        """A batch takes pending events in order and frees their sensors for coalescing"""
+        events = CoalescingEventQueue()
+        for sensor in (1, 2, 3):
+            events.put({'type': 'WEIGHT', 'sensor': sensor, 'value': 1.0})
+        events.put({'type': 'HOLD', 'sensor': 4})
+        self.assertEqual([event['sensor'] for event in events.get_batch(2)], [1, 2])
+        self.assertEqual([event['sensor'] for event in events.get_batch()], [3, 4])
+        self.assertEqual(events.get_batch(), [])
+        events.put({'type': 'WEIGHT', 'sensor': 1, 'value': 2.0})
+        self.assertEqual(events.get_batch(), [{'type': 'WEIGHT', 'sensor': 1, 'value': 2.0}])
+
+    def test_coalesce_batch(self):
+        """Superseded weights and connection states are dropped where they were, gestures are all kept"""
+        batch = [
+            {'type': 'CONNECTION', 'port': 'a', 'state': 'connecting'},
+            {'type': 'WEIGHT', 'sensor': 1, 'value': 10.0},
+            {'type': 'DOUBLE_TAP', 'sensor': 2},
+            {'type': 'DOUBLE_TAP', 'sensor': 2},
+            {'type': 'DOUBLE_TAP', 'sensor': 3},
+            {'type': 'WEIGHT', 'sensor': 1, 'value': 20.0},
+            {'type': 'HOLD', 'sensor': 2},
+            {'type': 'CONNECTION', 'port': 'a', 'state': 'connected'},
+            {'type': 'DOUBLE_TAP', 'sensor': 2},
+        ]
+        self.assertEqual(coalesce_events(batch), [
+            {'type': 'DOUBLE_TAP', 'sensor': 2},
+            {'type': 'DOUBLE_TAP', 'sensor': 2},
+            {'type': 'DOUBLE_TAP', 'sensor': 3},
+            {'type': 'WEIGHT', 'sensor': 1, 'value': 20.0},
+            {'type': 'HOLD', 'sensor': 2},
+            {'type': 'CONNECTION', 'port': 'a', 'state': 'connected'},
+            {'type': 'DOUBLE_TAP', 'sensor': 2},
+        ])
+
+    def test_coalesce_keeps_interleaved_gestures(self):
+        """Checks from alternating sensors all count; only retransmitted gestures are dropped"""
+        batch = [
+            {'type': 'DOUBLE_TAP', 'sensor': 1},
+            {'type': 'DOUBLE_TAP', 'sensor': 2},
+            {'type': 'DOUBLE_TAP', 'sensor': 1},
+            {'type': 'SINGLE_TAP', 'sensor': 4, 'fw_ms': 1200},
+            {'type': 'SINGLE_TAP', 'sensor': 4, 'fw_ms': 1200},
+            {'type': 'SINGLE_TAP', 'sensor': 4, 'fw_ms': 1850},
+        ]
+        self.assertEqual(coalesce_events(batch), batch[:4] + batch[5:])
+
+
+class TestBinaryFrames(unittest.TestCase):
+    def test_round_trip_and_drops(self):
+        """Frames decode in bulk, corrupt frames are skipped and gaps are counted"""
+        stream = bytearray(b"".join(encode_frame(FRAME_WEIGHT, 1 + i % 4, i * 250, i) for i in range(50)))
+        stream[5 * FRAME_SIZE + 4] ^= 0xFF              # corrupt frame 5
+        del stream[20 * FRAME_SIZE:21 * FRAME_SIZE]     # lose frame 20
+        decoder = FrameDecoder()
+        frames = [decoder.feed(bytes(stream[:123])), decoder.feed(bytes(stream[123:]))]
+        seqs = [int(seq) for part in frames for seq in part['seq']]
+        self.assertEqual(seqs, [i for i in range(50) if i not in (5, 20)])
+        self.assertEqual(decoder.dropped, 2)
+
+    def test_switch_to_binary(self):
+        """Bytes after the MODE:BINARY reply are parsed as frames"""
+        protocol = RecordingProtocol()
+        protocol._feed(b"STATUS:READY\r\nSTATUS:MODE:BINARY\r\n"
+                       + encode_frame(FRAME_WEIGHT, 2, 1234, 0)
+                       + encode_frame(FRAME_EVENT, 3, EVENT_CODES['DOUBLE_TAP'], 1)[:4])
+        protocol._feed(encode_frame(FRAME_EVENT, 3, EVENT_CODES['DOUBLE_TAP'], 1)[4:])
+        self.assertTrue(protocol.binary)
+        self.assertEqual(protocol.weights[2], 12.34)
+        self.assertEqual(protocol.events, [{'type': 'DOUBLE_TAP', 'sensor': 3}])
+
+
+class TestAsyncReceiver(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.master, slave = pty.openpty()
+        tty.setraw(slave)
+        self.receiver = AsyncPokerSignalReceiver(os.ttyname(slave))
+        self.receiver.ready_timeout = 0
+        self.task = asyncio.create_task(self.receiver.run())
+        await self.receiver.wait_connected(1)
+
+    async def asyncTearDown(self):
+        await self.receiver.close()
+        await self.task
+        os.close(self.master)
+
+    async def test_event_stream(self):
+        """Events written to the port arrive on the async stream"""
+        os.write(self.master, b"EVENT:SINGLE_TAP:1\r\n" + b"WEIGHT:2:30.0\r\n" * 5)
+        stream = self.receiver.events()
+        states = [(await stream.__anext__())['state'] for _ in range(2)]
+        self.assertEqual(states, ['connecting', 'connected'])
+        first = await asyncio.wait_for(stream.__anext__(), 1)
+        second = await asyncio.wait_for(stream.__anext__(), 1)
+        self.assertLessEqual(first.pop('stamps')['rx'], second.pop('stamps')['rx'])
+        self.assertEqual(first, {'type': 'SINGLE_TAP', 'sensor': 1})
+        self.assertEqual(second, {'type': 'WEIGHT', 'sensor': 2, 'value': 30.0})
+
+    async def test_send_command(self):
+        """Commands are newline terminated on the wire"""
+        self.assertTrue(await self.receiver.send_command("TARE:2"))
+        self.assertEqual(os.read(self.master, 64), b"TARE:2\n")
+
+
+class TestConnection(unittest.IsolatedAsyncioTestCase):
+    async def test_ready_on_first_status_line(self):
+        """The port counts as connected once the board prints a STATUS line"""
+        master, slave = pty.openpty()
+        tty.setraw(slave)
+        receiver = AsyncPokerSignalReceiver(os.ttyname(slave))
+        receiver.ready_timeout = 5
+        task = asyncio.create_task(receiver.run())
+        while receiver.ser is None:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        self.assertEqual(receiver.state, CONNECTING)
+
+        start = asyncio.get_running_loop().time()
+        os.write(master, b"STATUS:STARTING\r\n")
+        self.assertTrue(await receiver.wait_connected(1))
+        self.assertLess(asyncio.get_running_loop().time() - start, 0.5)
+
+        await receiver.close()
+        await task
+        os.close(master)
+        os.close(slave)
+
+    async def test_reconnect_backoff(self):
+        """Failed connects are retried with growing delays until closed"""
+        receiver = AsyncPokerSignalReceiver('/dev/does-not-exist')
+        receiver.backoff_base = 0.05
+        attempts = []
+        receiver.on_event = lambda event: event['state'] == CONNECTING and attempts.append(time.monotonic())
+        task = asyncio.create_task(receiver.run())
+        await asyncio.sleep(0.6)
+        await receiver.close()
+        await asyncio.wait_for(task, 0.1)
+
+        gaps = [later - earlier for earlier, later in zip(attempts, attempts[1:])]
+        self.assertGreaterEqual(len(attempts), 3)
+        self.assertLessEqual(len(attempts), 6)
+        self.assertLess(gaps[0], gaps[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import socket
+import time
+import unittest
+
+from poker_logic import Game, Card
+from poker_reactor import Reactor
+from poker_state_broadcast import StateMirror, StatePublisher, apply_delta, diff_state, game_state
+
+
+class TestStateDelta(unittest.TestCase):
+    def test_delta_roundtrip(self):
+        """Deltas hold only what changed and rebuild the new state"""
+        game = Game(4, 5, 1000)
+        old = game_state(game)
+        game.pots[2] -= 20
+        game.game_pot[2] += 20
+        game.phase = "flop"
+        game.community = [Card('H', 1), Card('S', 10), Card('D', 12)]
+        new = game_state(game)
+
+        changes = diff_state(old, new)
+        self.assertEqual(set(changes), {"phase", "pot", "community", "seats"})
+        self.assertEqual(set(changes["seats"]), {"2"})
+        self.assertEqual(changes["community"], ["AH", "10S", "QD"])
+        self.assertEqual(apply_delta(old, changes), new)
+        self.assertEqual(diff_state(new, game_state(game)), {})
+
+
+class TestStatePublisher(unittest.TestCase):
+    def setUp(self):
+        self.reactor = Reactor()
+        self.addCleanup(self.reactor.close)
+        self.game = Game(4, 5, 1000)
+
+    def open_publisher(self, **kwargs):
+        publisher = StatePublisher(self.reactor, 'localhost', 0, **kwargs)
+        self.addCleanup(publisher.close)
+        return publisher
+
+    def subscribe(self, publisher):
+        conn = socket.create_connection(publisher.address)
+        self.addCleanup(conn.close)
+        deadline = time.monotonic() + 2
+        count = len(publisher.subscribers)
+        while len(publisher.subscribers) == count and time.monotonic() < deadline:
+            self.reactor.run_once(0.05)
+        return conn
+
+    def mirror(self, conn, publisher, mirror=None):
+        """Read from conn until the mirror is at the publisher's sequence number."""
+        mirror = mirror or StateMirror()
+        conn.settimeout(0.05)
+        deadline = time.monotonic() + 5
+        while mirror.seq != publisher.seq and time.monotonic() < deadline:
+            self.reactor.run_once(0)
+            try:
+                mirror.feed(conn.recv(65536))
+            except socket.timeout:
+                pass
+        return mirror
+
+    def bet(self, seat, amount):
+        self.game.pots[seat] -= amount
+        self.game.game_pot[seat] += amount
+
+    def test_subscribers(self):
+        """Subscribers get a snapshot on connecting, then deltas, and mirror the table"""
+        publisher = self.open_publisher()
+        publisher.publish(self.game)
+        first = self.subscribe(publisher)
+        mirror = self.mirror(first, publisher)
+        self.assertEqual(mirror.state, game_state(self.game))
+
+        self.bet(1, 10)
+        publisher.publish(self.game)
+        publisher.publish(self.game)
+        self.assertEqual(publisher.seq, 2)
+        second = self.subscribe(publisher)
+        self.bet(3, 50)
+        self.game.active_players.discard(0)
+        publisher.publish(self.game)
+
+        for conn, state_mirror in ((first, mirror), (second, None)):
+            state_mirror = self.mirror(conn, publisher, state_mirror)
+            self.assertEqual(state_mirror.state, game_state(self.game))
+            self.assertEqual(state_mirror.gaps, 0)
+
+    def test_slow_subscriber(self):
+        """A subscriber that stops reading never blocks publish and catches up from a snapshot"""
+        publisher = self.open_publisher(max_buffer=16 * 1024)
+        publisher.publish(self.game)
+        slow = self.subscribe(publisher)
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        # Keep the kernel from absorbing the backlog
+        for conn in publisher.subscribers:
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+
+        start = time.perf_counter()
+        for i in range(20000):
+            self.bet(i % 4, 1)
+            publisher.publish(self.game)
+        self.assertLess(time.perf_counter() - start, 10)
+
+        subscriber, = publisher.subscribers.values()
+        self.assertGreater(subscriber.resyncs, 0)
+        self.assertLessEqual(subscriber.buffered, 16 * 1024)
+        mirror = self.mirror(slow, publisher)
+        self.assertEqual(mirror.state, game_state(self.game))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from poker_detection_fusion import DetectionFusion
+from poker_detection_protocol import encode_detection
+from poker_detector_server import DetectorServer
+from poker_reactor import Reactor
+from poker_tracing import TRACER, CardTrace, Tracer, chrome_trace, export_chrome_trace, new_trace_id
+
+
+class TestTracer(unittest.TestCase):
+    def test_disabled(self):
+        """A disabled tracer records nothing"""
+        tracer = Tracer("test")
+        with tracer.span("work"):
+            pass
+        tracer.record("work", 0, 1)
+        self.assertEqual(tracer.spans(), [])
+
+    def test_thread_rings(self):
+        """Each thread records into its own ring, which keeps the newest spans"""
+        tracer = Tracer("test", capacity=100)
+        tracer.enable()
+
+        def work(name):
+            for i in range(250):
+                tracer.record(name, i, i + 1)
+
+        threads = [threading.Thread(target=work, args=(f"t{i}",), name=f"worker-{i}") for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with tracer.span("main", trace_id=7, card="AS"):
+            pass
+
+        spans = tracer.spans()
+        self.assertEqual(len(spans), 4 * 100 + 1)
+        by_thread = {}
+        for thread_id, thread_name, span in spans:
+            by_thread.setdefault(thread_name, []).append(span)
+        self.assertEqual(sorted(span[1] for span in by_thread["worker-0"]), list(range(150, 250)))
+        (name, start, end, trace_id, args), = by_thread[threading.current_thread().name]
+        self.assertEqual((name, trace_id, args), ("main", 7, {"card": "AS"}))
+        self.assertLessEqual(start, end)
+
+    def test_chrome_trace(self):
+        """Dumps of two processes merge into one timeline with the card's spans linked"""
+        trace_id = new_trace_id()
+        detector = Tracer("detector")
+        detector.enable()
+        detector.record("inference", 1000, 5000, trace_id)
+        detector.record("send", 6000, 7000, trace_id)
+        game = Tracer("game")
+        game.enable()
+        game.record("receive", 8000, 9000, trace_id)
+        game.record("render", 10000, 12000, trace_id)
+        game.record("idle", 0, 500)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        paths = [os.path.join(directory, name) for name in ("detector.json", "game.json", "trace.json")]
+        detector.dump(paths[0])
+        with open(paths[0]) as f:
+            dump = json.load(f)
+        dump["pid"] += 1  # as if from another process
+        with open(paths[0], 'w') as f:
+            json.dump(dump, f)
+        game.dump(paths[1])
+        export_chrome_trace(paths[:2], paths[2])
+        with open(paths[2]) as f:
+            events = json.load(f)["traceEvents"]
+
+        names = {event["args"]["name"] for event in events if event["name"] == "process_name"}
+        self.assertEqual(names, {"detector", "game"})
+        spans = [event for event in events if event["ph"] == "X"]
+        self.assertEqual(len(spans), 5)
+        inference, = [event for event in spans if event["name"] == "inference"]
+        self.assertEqual((inference["ts"], inference["dur"], inference["args"]["trace_id"]), (1.0, 4.0, trace_id))
+        flows = sorted((event for event in events if event["ph"] in "stf"), key=lambda event: event["ts"])
+        self.assertEqual([event["ph"] for event in flows], ["s", "t", "t", "f"])
+        self.assertEqual(len({event["pid"] for event in flows}), 2)
+        self.assertEqual(chrome_trace([])["traceEvents"], [])
+
+
+class TestTraceIds(unittest.TestCase):
+    def test_card_trace_ends_with_send(self):
+        """A card's trace holds the frames from its first to the one sending it, and no later ones"""
+        tracer = Tracer("detector")
+        tracer.enable()
+        trace = CardTrace(tracer)
+        clock = iter(range(0, 10000, 10))
+
+        def frame(decide=None):
+            # Captured and classified, then tracked (which may start or send a card)
+            trace.begin_frame()
+            spans = [("capture", next(clock), next(clock)), ("inference", next(clock), next(clock))]
+            if decide is not None:
+                decide()
+            trace.record_frame(spans)
+
+        def send():
+            tracer.record("send", next(clock), next(clock), trace.trace_id)
+            trace.end()
+
+        frame()
+        frame(trace.start)
+        trace_id = trace.trace_id
+        frame()
+        frame(send)
+        for _ in range(3):
+            frame()
+
+        spans = sorted((span for _, _, span in tracer.spans()), key=lambda span: span[1])
+        traced = [span[0] for span in spans if span[3] == trace_id]
+        self.assertEqual(traced, ["capture", "inference"] * 3 + ["send"])
+        send_end = next(span[2] for span in spans if span[0] == "send")
+        self.assertEqual([span[3] for span in spans if span[1] > send_end], [None] * 6)
+        self.assertIsNone(spans[0][3])
+
+    def test_trace_through_game(self):
+        """A detection's trace id is recorded when it is received and survives fusion"""
+        TRACER.enable()
+        self.addCleanup(setattr, TRACER, 'enabled', False)
+        reactor = Reactor()
+        self.addCleanup(reactor.close)
+        fusion = DetectionFusion()
+        fused = []
+        server = DetectorServer(reactor, 'localhost', 0,
+                                on_messages=lambda client, messages: fused.extend(
+                                    event for message in messages for event in fusion.add(message)))
+        self.addCleanup(server.close)
+
+        trace_id = new_trace_id()
+        client = socket.create_connection(server.address)
+        self.addCleanup(client.close)
+        client.sendall(encode_detection("9C", detector="cam", trace_id=trace_id))
+        deadline = time.monotonic() + 2
+        while not fused and time.monotonic() < deadline:
+            reactor.run_once(0.05)
+
+        self.assertEqual(fused[0]["traces"], [trace_id])
+        received = [span for _, _, span in TRACER.spans() if span[0] == "receive" and span[3] == trace_id]
+        self.assertEqual(len(received), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,9 @@ int last_dispense_speed = 0;
 String input_string = "";
 bool command_ready = false;
 
+// Sequence number of the last command run (-1 = none)
+long last_seq = -1;
+
 void setup() {
   // Connecting with RPI
   Serial.begin(9600);
@@ -50,6 +53,9 @@ void setup() {
   servo_disp.write(180);
   motor.setSpeed(0);
   motor.run(RELEASE);
+
+  // Tell the host the board is up
+  Serial.println("STATUS:READY");
 }
 
 // Main loop
@@ -66,61 +72,32 @@ void loop() {
   }
 
   if (command_ready) {
-    // Input check for proper format of "A" + "0" + "\n"
-    if (input_string.length() >= 2) {
-      char commandType = input_string.charAt(0);
-      int commandValue = input_string.substring(1).toInt();
-
-      // Game Phase - (0: preflop, 1: flop, 2: turn, 3: river)
-      if (commandType == 'P') {
-        if (commandValue == 0) {
-          preflop();
-        } else if (commandValue == 1) {
-          flop();
-        } else if (commandValue == 2) {
-          turn();
-        } else if (commandValue == 3) {
-          river();
-        }
-      }
-
-      // Body control
-      else if (commandType == 'B') {
-        if (commandValue == 1) {
-          servo_body.write(player_1_angle_2);
-          delay(30);
-        } else if (commandValue == 2) {
-          servo_body.write(player_2_angle_2);
-          delay(30);
-        } else if (commandValue == 3) {
-          servo_body.write(player_3_angle_1);
-          delay(30);
-        } else if (commandValue == 4) {
-          servo_body.write(player_4_angle_1);
-          delay(30);
-        }
-      }
+    // Optional "#seq" suffix from the host: acknowledged as "ack:seq", and a
+    // repeated seq (a retry) is acknowledged again without running twice
+    long seq = -1;
+    int seq_start = input_string.indexOf('#');
+    if (seq_start >= 0) {
+      seq = input_string.substring(seq_start + 1).toInt();
+      input_string = input_string.substring(0, seq_start);
+    }
 
-      // Dispenser control
-      else if (commandType == 'D') {
-        if (commandValue == 1) {
-          give_card(player_1_angle_2, far_speed);
-          delay(30);
-        } else if (commandValue == 2) {
-          give_card(player_2_angle_2, close_speed);
-          delay(30);
-        } else if (commandValue == 3) {
-          give_card(player_3_angle_1, close_speed);
-          delay(30);
-        } else if (commandValue == 4) {
-          give_card(player_4_angle_1, far_speed);
-          delay(30);
-        }
+    if (input_string == "ID") {
+      // Handshake so the host can tell the dispenser from the sensor board.
+      // It starts a host session, whose sequence numbers are not retries
+      last_seq = -1;
+      Serial.println("ID:DISPENSER");
+    } else {
+      if (seq < 0 || seq != last_seq) {
+        run_command(input_string);
       }
 
-      // Redo (Re-dispense)
-      else if (commandType == 'R') {
-        dispense(last_dispense_speed);
+      // Acknowledge every command once it is done
+      if (seq >= 0) {
+        last_seq = seq;
+        Serial.print("ack:");
+        Serial.println(seq);
+      } else {
+        Serial.println("ack");
       }
     }
 
@@ -130,6 +107,66 @@ void loop() {
   }
 }
 
+void run_command(String command) {
+  // Input check for proper format of "A" + "0"
+  if (command.length() >= 2) {
+    char commandType = command.charAt(0);
+    int commandValue = command.substring(1).toInt();
+
+    // Game Phase - (0: preflop, 1: flop, 2: turn, 3: river)
+    if (commandType == 'P') {
+      if (commandValue == 0) {
+        preflop();
+      } else if (commandValue == 1) {
+        flop();
+      } else if (commandValue == 2) {
+        turn();
+      } else if (commandValue == 3) {
+        river();
+      }
+    }
+
+    // Body control
+    else if (commandType == 'B') {
+      if (commandValue == 1) {
+        servo_body.write(player_1_angle_2);
+        delay(30);
+      } else if (commandValue == 2) {
+        servo_body.write(player_2_angle_2);
+        delay(30);
+      } else if (commandValue == 3) {
+        servo_body.write(player_3_angle_1);
+        delay(30);
+      } else if (commandValue == 4) {
+        servo_body.write(player_4_angle_1);
+        delay(30);
+      }
+    }
+
+    // Dispenser control
+    else if (commandType == 'D') {
+      if (commandValue == 1) {
+        give_card(player_1_angle_2, far_speed);
+        delay(30);
+      } else if (commandValue == 2) {
+        give_card(player_2_angle_2, close_speed);
+        delay(30);
+      } else if (commandValue == 3) {
+        give_card(player_3_angle_1, close_speed);
+        delay(30);
+      } else if (commandValue == 4) {
+        give_card(player_4_angle_1, far_speed);
+        delay(30);
+      }
+    }
+
+    // Redo (Re-dispense)
+    else if (commandType == 'R') {
+      dispense(last_dispense_speed);
+    }
+  }
+}
+
 // General dispense command
 void dispense(int dispense_speed) {
   // Save dispense value
@@ -182,7 +219,6 @@ void preflop() {
       give_card(player_4_angle_1, far_speed);
       delay(500);
       give_card(player_4_angle_2, far_speed);
-      Serial.print("ack");
     }
   }
 }
@@ -198,8 +234,6 @@ void flop() {
     // Delay between dispenses
     delay(1000);
   }
-  Serial.print("ack");
-
 }
 
 void turn() {
@@ -207,7 +241,6 @@ void turn() {
   delay(500);
   servo_body.write(100);
   dispense(community_speed);
-  Serial.print("ack");
 }
 
 void river() {
@@ -215,5 +248,4 @@ void river() {
   delay(500);
   servo_body.write(110);
   dispense(community_speed);
-  Serial.print("ack");
 }
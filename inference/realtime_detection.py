@@ -4,7 +4,6 @@ import time
 import argparse
 import os
 import socket
-import json
 os.environ["QT_QPA_PLATFORM"] = "xcb"
 os.environ["GDK_BACKEND"] = "x11"
 os.environ["OPENCV_VIDEOIO_PRIORITY_BACKEND"] = "gstreamer"
@@ -16,6 +15,20 @@ from picamera2 import Picamera2
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from train.model import PokerCardClassifier
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "game_state_management"))
+from poker_shm_transport import ShmDetectionWriter
+from poker_detection_protocol import parse_address, encode_hello, encode_detection
+from poker_metrics import REGISTRY, MetricsServer
+from poker_tracing import TRACER, CardTrace
+
+# Metrics (served with --metrics-port)
+FRAMES = REGISTRY.counter("detector_frames_total", "Camera frames processed")
+FRAME_SECONDS = REGISTRY.histogram("detector_frame_seconds", "Time to capture, classify and show a frame")
+INFERENCE_SECONDS = REGISTRY.histogram("detector_inference_seconds", "Time to preprocess and classify a frame")
+DETECTIONS_SENT = REGISTRY.counter("detector_detections_sent_total", "Final card detections sent to the game")
+SEND_FAILURES = REGISTRY.counter("detector_send_failures_total", "Detections that could not be sent")
+CONNECTS = REGISTRY.counter("detector_connects_total", "Connections made to the game state manager")
+CONNECT_FAILURES = REGISTRY.counter("detector_connect_failures_total", "Failed connection attempts to the game")
 
 # ─────────────────────────── model loader ──────────────────────────
 
@@ -41,7 +54,10 @@ class RealtimeCardDetector:
         conf_threshold: float = 0.7,
         fps_avg_frames: int = 10,
         socket_host="localhost",
-        socket_port=12345
+        socket_port=12345,
+        detector_id: str | None = None,
+        shm_name: str | None = None,
+        camera_num: int = 0
     ) -> None:
         self.device = device
         self.class_names = class_names
@@ -61,6 +77,7 @@ class RealtimeCardDetector:
         # FPS tracking
         self.fps_times: list[float] = []
         self.fps_avg = fps_avg_frames
+        self.fps = 0.0
 
         # Finalisation state
         self.finalised = False
@@ -69,14 +86,26 @@ class RealtimeCardDetector:
         self.t70_start: float | None = None
         self.t90_start: float | None = None
         
-        # Socket connection for transmitting results
+        # Trace id of the current candidate card, sent with its detection (--trace)
+        self.trace = CardTrace(TRACER)
+        self.predict_times = (0, 0, 0)
+        
+        # Socket connection for transmitting results, and the name the game knows this detector by
+        # (unique per camera: the game replaces a connection when another one takes its name)
+        self.detector_id = detector_id or f"{socket.gethostname()}-cam{camera_num}"
         self.socket_host = socket_host
         self.socket_port = socket_port
         self.socket = None
-        self.connect_socket()
+        
+        # On the game's machine detections can go through its shared-memory ring instead
+        self.shm_writer = ShmDetectionWriter(self.detector_id, shm_name) if shm_name else None
+        if self.shm_writer is None:
+            self.connect_socket()
+        elif not self.shm_writer.attach():
+            print(f"Shared memory ring {shm_name} not available yet, will retry")
 
         # Initialize camera
-        self.picam = Picamera2()
+        self.picam = Picamera2(camera_num)
         self.picam.configure(
             self.picam.create_preview_configuration(
                 main={"size": (640, 480), "format": "BGR888"}
@@ -88,12 +117,18 @@ class RealtimeCardDetector:
     def connect_socket(self):
         """Establish socket connection to the game state manager"""
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.socket_host, self.socket_port))
-            print(f"Connected to game state manager at {self.socket_host}:{self.socket_port}")
+            # "unix:/path" hosts are Unix domain sockets on this machine
+            family, address = parse_address(self.socket_host, self.socket_port)
+            self.socket = socket.socket(family, socket.SOCK_STREAM)
+            self.socket.connect(address)
+            # Introduce ourselves so the game can tell the detectors apart
+            self.socket.sendall(encode_hello(self.detector_id))
+            print(f"Connected to game state manager at {address}")
+            CONNECTS.inc()
         except Exception as e:
             print(f"Failed to connect to game state manager: {e}")
             self.socket = None
+            CONNECT_FAILURES.inc()
 
     def _preprocess(self, frame):
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -102,11 +137,17 @@ class RealtimeCardDetector:
 
     @torch.no_grad()
     def _predict(self, frame):
+        start = time.monotonic_ns()
         tensor = self._preprocess(frame)
+        preprocessed = time.monotonic_ns()
         outputs = self.model(tensor)
         probs = torch.nn.functional.softmax(outputs, dim=1)
         conf, idx = torch.max(probs, 1)
-        return self.class_names[idx.item()], conf.item() * 100
+        result = self.class_names[idx.item()], conf.item() * 100
+        end = time.monotonic_ns()
+        self.predict_times = (start, preprocessed, end)
+        INFERENCE_SECONDS.observe((end - start) / 1e9)
+        return result
 
     def _update_fps(self):
         now = time.time()
@@ -126,14 +167,14 @@ class RealtimeCardDetector:
             print(f"New card detected: {cls}, confidence: {conf:.1f}%")
             self.finalised = False
             self.final_class = None
-            self.candidate_class = cls
+            self._new_candidate(cls)
             self.t70_start = now if conf >= 70 else None
             self.t90_start = now if conf >= 90 else None
             return
             
         # If not finalized yet, track stability as before
         if cls != self.candidate_class:
-            self.candidate_class = cls
+            self._new_candidate(cls)
             self.t80_start = now if conf >= 80 else None
             self.t90_start = now if conf >= 90 else None
             return
@@ -142,7 +183,7 @@ class RealtimeCardDetector:
             if self.t90_start is None:
                 self.t90_start = now
             elif now - self.t90_start >= 1:
-                self._finalise(cls)
+                self._finalise(cls, conf)
         else:
             self.t90_start = None
             
@@ -150,43 +191,53 @@ class RealtimeCardDetector:
             if self.t80_start is None:
                 self.t80_start = now
             elif now - self.t80_start >= 2:
-                self._finalise(cls)
+                self._finalise(cls, conf)
         else:
             self.t80_start = None
 
-    def _finalise(self, cls: str):
+    def _new_candidate(self, cls: str):
+        # Each candidate card is a new trace, from its first frame to the game's screen
+        self.candidate_class = cls
+        self.trace.start()
+
+    def _finalise(self, cls: str, conf: float = 100.0):
         self.finalised = True
         self.final_class = cls
         print(f"✔ Final prediction: {cls}")
         
+        TRACER.record("stability", self.trace.since_ns, time.monotonic_ns(), self.trace.trace_id, {"card": cls})
+        
         # Send the detection to the game state manager
-        if self.socket:
-            try:
-                # Simply send the card class as a string
-                self.socket.sendall(cls.encode('utf-8'))
-                print(f"Sent detection '{cls}' to game state manager")
-            except Exception as e:
-                print(f"Failed to send detection: {e}")
-                # Try to reconnect on failure
-                self.connect_socket()
+        with TRACER.span("send", self.trace.trace_id):
+            self._send_detection(cls, conf)
         
-    def _send_detection(self, card_class: str):
-        """Send detection result to the game state manager"""
-        if self.socket:
+        # Frames that keep showing the card are not part of its trace
+        self.trace.end()
+        
+    def _send_detection(self, card_class: str, conf: float = 100.0):
+        """Send detection result to the game state manager (a ring record, or one line of JSON)"""
+        if self.shm_writer is not None:
             try:
-                # Create a message with the card data
-                message = {
-                    "type": "card_detection",
-                    "card": card_class,
-                    "timestamp": time.time()
-                }
-                
-                # Convert to JSON and send
-                json_message = json.dumps(message) + "\n"  # Add newline as message delimiter
-                self.socket.sendall(json_message.encode('utf-8'))
+                written = self.shm_writer.write(card_class, conf / 100, trace_id=self.trace.trace_id)
+            except ValueError as e:
+                print(f"Error sending detection: {e}")
+                SEND_FAILURES.inc()
+                return
+            if written:
                 print(f"Sent detection '{card_class}' to game state manager")
+                DETECTIONS_SENT.inc()
+            else:
+                print(f"Game state manager not available, detection '{card_class}' dropped")
+                SEND_FAILURES.inc()
+        elif self.socket:
+            try:
+                self.socket.sendall(encode_detection(card_class, detector=self.detector_id, confidence=conf / 100,
+                                                     trace_id=self.trace.trace_id))
+                print(f"Sent detection '{card_class}' to game state manager")
+                DETECTIONS_SENT.inc()
             except Exception as e:
                 print(f"Failed to send detection: {e}")
+                SEND_FAILURES.inc()
                 # Try to reconnect on failure
                 self.connect_socket()
 
@@ -199,17 +250,27 @@ class RealtimeCardDetector:
         
         try:
             while True:
+                frame_start = time.monotonic_ns()
                 frame = self.picam.capture_array()
+                captured = time.monotonic_ns()
                 
                 # Always predict and track stability - don't skip when finalized
+                self.trace.begin_frame()
                 cls, conf = self._predict(frame)
                 self._track_stability(cls, conf)
                 
+                # Frame spans belong to the candidate card they were tracked for
+                if TRACER.enabled:
+                    start, preprocessed, end = self.predict_times
+                    self.trace.record_frame([("capture", frame_start, captured),
+                                             ("preprocess", start, preprocessed),
+                                             ("inference", preprocessed, end)])
+                
                 # For display purposes, if finalized, use the final_class
                 display_cls = self.final_class if self.finalised else cls
                 display_conf = 100.0 if self.finalised else conf
                 
-                fps = self._update_fps()
+                fps = self.fps = self._update_fps()
                 disp = frame.copy()
 
                 # Overlay text
@@ -231,13 +292,18 @@ class RealtimeCardDetector:
 
                 # Show and handle key
                 cv2.imshow("Poker Card Detection", disp)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                key = cv2.waitKey(1) & 0xFF
+                FRAMES.inc()
+                FRAME_SECONDS.observe((time.monotonic_ns() - frame_start) / 1e9)
+                if key == ord('q'):
                     break
         except KeyboardInterrupt:
             pass
         finally:
             if self.socket:
                 self.socket.close()
+            if self.shm_writer is not None:
+                self.shm_writer.close()
             self.picam.stop()
             cv2.destroyAllWindows()
             print("Detection ended")
@@ -256,9 +322,21 @@ def main():
     parser.add_argument("--threshold", type=float, default=0.8)
     parser.add_argument("--display_scale", type=float, default=1.0)
     parser.add_argument("--device", default="cpu")
-    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--host", default="localhost", help="Game host, or 'unix:/path' for its Unix domain socket")
     parser.add_argument("--port", type=int, default=12345)
+    parser.add_argument("--camera", type=int, default=0, help="Index of the camera to use")
+    parser.add_argument("--detector-id", default=None,
+                        help="Name of this camera in the game, unique per camera (default: <hostname>-cam<camera>)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics on this local HTTP port (/metrics)")
+    parser.add_argument("--trace", default=None,
+                        help="Record pipeline trace spans and write them to this file on exit")
+    parser.add_argument("--shm", default=None, metavar="NAME",
+                        help="Send detections through the game's shared-memory ring of this name instead of TCP "
+                             "(one detector per ring)")
     args = parser.parse_args()
+    if args.trace:
+        TRACER.enable("realtime_detection")
 
     detector = RealtimeCardDetector(
         model_path=args.model,
@@ -266,9 +344,26 @@ def main():
         device=args.device,
         conf_threshold=args.threshold,
         socket_host=args.host,
-        socket_port=args.port
+        socket_port=args.port,
+        detector_id=args.detector_id,
+        camera_num=args.camera,
+        shm_name=args.shm
     )
-    detector.run(display_scale=args.display_scale)
+    metrics_server = None
+    if args.metrics_port is not None:
+        REGISTRY.gauge("detector_fps", "Frames per second", function=lambda: detector.fps)
+        REGISTRY.gauge("detector_connected", "Whether the game state manager is reachable",
+                       function=lambda: int(detector.socket is not None
+                                            or (detector.shm_writer is not None and detector.shm_writer.attached)))
+        metrics_server = MetricsServer(REGISTRY, "localhost", args.metrics_port)
+        print(f"Serving metrics on http://localhost:{args.metrics_port}/metrics")
+    try:
+        detector.run(display_scale=args.display_scale)
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        if args.trace:
+            TRACER.dump(args.trace)
 
 
 if __name__ == "__main__":